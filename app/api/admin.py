@@ -0,0 +1,33 @@
+"""
+app/api/admin.py
+─────────────────
+Operational endpoints, guarded by ADMIN_TOKEN (disabled when it is unset).
+- POST /admin/reload  → hot-reload portfolio, indexes and identity block
+"""
+
+import hmac
+import logging
+from fastapi import APIRouter, Header, HTTPException, Request
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _require_admin(token: str | None) -> None:
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.post("/admin/reload")
+async def reload(request: Request, x_admin_token: str | None = Header(None)):
+    """Rebuild the app snapshot off to the side and swap it in; in-flight requests finish on the old one."""
+    _require_admin(x_admin_token)
+    try:
+        result = await request.app.state.reloader.reload("admin")
+    except Exception as e:
+        logger.error(f"Admin reload failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Reload failed, still serving the previous snapshot: {e}")
+    return {"status": "reloaded", **result}
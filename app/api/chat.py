@@ -7,16 +7,18 @@ POST /api/v1/chat        → streaming SSE response
 POST /api/v1/chat/sync   → non-streaming JSON response (for testing)
 """
 
-import json
 import logging
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import StreamingResponse
 from app.models.chat import ChatRequest, ChatResponse
 from app.core.rag_engine import RAGEngine
-from app.core.claude_client import stream_claude, complete_claude
+from app.core.claude_client import stream_claude, complete_claude, FALLBACK_MESSAGES
 from app.core.persona_guard import PersonaGuard
+from app.core.response_cache import SemanticResponseCache
+from app.config import settings
 from app.security.sanitizer import InputSanitizer
 from app.security.rate_limiter import RateLimiter
+from app.utils.sse import DONE_FRAME, coalesce, error_frame, token_frame
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -25,6 +27,10 @@ router = APIRouter()
 _guard = PersonaGuard()
 _sanitizer = InputSanitizer()
 _limiter = RateLimiter()
+_response_cache = SemanticResponseCache()
+
+# Size of the slices a cached answer is replayed in over SSE
+_CACHED_CHUNK_CHARS = 48
 
 
 async def _run_pipeline(request: Request, body: ChatRequest):
@@ -33,9 +39,11 @@ async def _run_pipeline(request: Request, body: ChatRequest):
     1. Rate limit
     2. Sanitize input
     3. Off-topic check
-    4. RAG retrieval
-    5. Build system prompt
+    4. Semantic response cache lookup
+    5. RAG retrieval
+    6. Build system prompt
     Returns (system_prompt, clean_query, context_chunks) or raises/returns early message.
+    A cache hit is returned as the early message and recorded on request.state.
     """
     # 1. Rate limit
     client_ip = request.client.host if request.client else "unknown"
@@ -46,20 +54,62 @@ async def _run_pipeline(request: Request, body: ChatRequest):
     if error:
         return None, None, None, error
 
-    # 3. Off-topic check
-    if _guard.is_off_topic(clean_query):
+    # 3. Off-topic check (the same scan finds project mentions for retrieval)
+    rag: RAGEngine = request.app.state.rag_engine
+    request.state.rag = rag  # the whole request uses this snapshot, even across a hot reload
+    scan = rag.guard.scan_query(clean_query, rag.portfolio)
+    if scan.off_topic:
         return None, None, None, _guard.get_redirect_message(clean_query)
 
-    # 4. RAG retrieval
-    rag: RAGEngine = request.app.state.rag_engine
-    context_chunks = await rag.retrieve(clean_query, mode=body.mode.value)
+    # 4. Semantic response cache (the embedding is reused for retrieval)
+    query_embedding = await rag.embed_query(clean_query)
+    request.state.query_embedding = query_embedding
+    request.state.data_version = rag.version
+    request.state.project_repo = scan.project_repo  # answers about different projects never mix
+    if settings.RESPONSE_CACHE_ENABLED:
+        cached = _response_cache.get(body.mode.value, query_embedding, rag.version, scan.project_repo)
+        if cached is not None:
+            request.state.cached_response = cached
+            return None, None, None, cached.response
+
+    # 5. RAG retrieval
+    context_chunks = await rag.retrieve(
+        clean_query, mode=body.mode.value, query_embedding=query_embedding, scan=scan
+    )
 
-    # 5. System prompt
+    # 6. System prompt
     system_prompt = _guard.build_system_prompt(body.mode.value)
 
     return system_prompt, clean_query, context_chunks, None
 
 
+def _context_sources(context_chunks: list[str]) -> list[str]:
+    sources = list({c.split("]")[0].lstrip("[") for c in context_chunks if "]" in c})
+    return sources[:5]
+
+
+def _cache_response(request: Request, body: ChatRequest, response: str, sources: list[str]) -> None:
+    """Store a completed answer — never placeholders or streams that ended in an error."""
+    if not settings.RESPONSE_CACHE_ENABLED or not response.strip():
+        return
+    if any(response.endswith(m) for m in FALLBACK_MESSAGES):
+        return
+    _response_cache.put(
+        body.mode.value,
+        request.state.query_embedding,
+        request.state.data_version,
+        response,
+        sources,
+        project=request.state.project_repo,
+    )
+
+
+async def _replay(text: str):
+    """Replay a cached answer as a token stream."""
+    for i in range(0, len(text), _CACHED_CHUNK_CHARS):
+        yield text[i:i + _CACHED_CHUNK_CHARS]
+
+
 @router.post("/chat")
 async def chat_stream(request: Request, body: ChatRequest):
     """
@@ -72,22 +122,35 @@ async def chat_stream(request: Request, body: ChatRequest):
     """
     system_prompt, clean_query, context_chunks, early_msg = await _run_pipeline(request, body)
 
-    if early_msg:
+    cached = getattr(request.state, "cached_response", None)
+
+    if early_msg and cached is None:
         # Return early message as a single SSE stream
         async def early_stream():
-            yield f"data: {json.dumps({'type': 'token', 'data': early_msg})}\n\n"
-            yield f"data: {json.dumps({'type': 'done', 'data': ''})}\n\n"
+            yield token_frame(early_msg) + DONE_FRAME
         return StreamingResponse(early_stream(), media_type="text/event-stream")
 
     async def token_generator():
+        tokens = []
         try:
-            async for token in stream_claude(system_prompt, clean_query, context_chunks):
-                payload = json.dumps({"type": "token", "data": token})
-                yield f"data: {payload}\n\n"
-            yield f"data: {json.dumps({'type': 'done', 'data': ''})}\n\n"
+            if cached is not None:
+                source = _replay(cached.response)
+            else:
+                source = stream_claude(
+                    system_prompt, clean_query, context_chunks, request.state.rag.identity_block
+                )
+            # Tokens that arrive together go out as one frame (first token immediately)
+            async for text in coalesce(source):
+                tokens.append(text)
+                yield token_frame(text)
+            yield DONE_FRAME
         except Exception as e:
             logger.error(f"Streaming error: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'data': 'Stream interrupted. Please retry.'})}\n\n"
+            yield error_frame("Stream interrupted. Please retry.")
+            return
+
+        if cached is None:
+            _cache_response(request, body, "".join(tokens), _context_sources(context_chunks))
 
     return StreamingResponse(
         token_generator(),
@@ -108,15 +171,27 @@ async def chat_sync(request: Request, body: ChatRequest):
     """
     system_prompt, clean_query, context_chunks, early_msg = await _run_pipeline(request, body)
 
+    cached = getattr(request.state, "cached_response", None)
+    if cached is not None:
+        return ChatResponse(
+            response=cached.response,
+            mode=body.mode.value,
+            session_id=body.session_id,
+            context_sources=cached.context_sources,
+        )
+
     if early_msg:
         return ChatResponse(response=early_msg, mode=body.mode.value)
 
-    response_text = await complete_claude(system_prompt, clean_query, context_chunks)
-    sources = list({c.split("]")[0].lstrip("[") for c in context_chunks if "]" in c})
+    response_text = await complete_claude(
+        system_prompt, clean_query, context_chunks, request.state.rag.identity_block
+    )
+    sources = _context_sources(context_chunks)
+    _cache_response(request, body, response_text, sources)
 
     return ChatResponse(
         response=response_text,
         mode=body.mode.value,
         session_id=body.session_id,
-        context_sources=sources[:5],
+        context_sources=sources,
     )
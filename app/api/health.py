@@ -6,6 +6,7 @@ Health check endpoints for load balancer + monitoring.
 
 from fastapi import APIRouter, Request
 from datetime import datetime
+from app.ingestion.embedder import get_query_cache
 
 router = APIRouter()
 
@@ -32,3 +33,24 @@ async def readiness(request: Request):
         }
     except Exception as e:
         return {"status": "not_ready", "error": str(e)}, 503
+
+
+@router.get("/metrics")
+async def metrics(request: Request):
+    """In-process cache and batching counters for monitoring."""
+    result = {"embedding_cache": get_query_cache().stats()}
+    index_manager = getattr(request.app.state, "index_manager", None)
+    if index_manager is not None:
+        result["repo_indexes"] = index_manager.repo_cache_stats()
+    rag = getattr(request.app.state, "rag_engine", None)
+    if rag is not None:
+        result["embedding_batches"] = rag.batcher.stats()
+        result["data_version"] = rag.version
+    reloader = getattr(request.app.state, "reloader", None)
+    if reloader is not None:
+        result["reloads"] = {"count": reloader.reloads, "last": reloader.last_reload}
+    redis_pool = getattr(request.app.state, "redis", None)
+    if redis_pool is not None:
+        result["redis"] = redis_pool.stats()
+    result["timestamp"] = datetime.utcnow().isoformat()
+    return result
@@ -2,7 +2,7 @@
 app/api/projects.py
 ────────────────────
 Project listing and detail endpoints.
-- GET /projects         → list all projects
+- GET /projects         → list all projects (pre-encoded + gzipped once per portfolio)
 - GET /projects/{slug}  → single project detail
 """
 
@@ -10,16 +10,27 @@ import logging
 from fastapi import APIRouter, Request, HTTPException
 from app.core.claude_client import complete_claude
 from app.core.persona_guard import PersonaGuard
+from app.utils.compression import PrecompressedBody
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 _guard = PersonaGuard()
 
+# (portfolio the body was built from, body) — rebuilt when a hot reload swaps the portfolio
+_projects_body: tuple[dict, PrecompressedBody] | None = None
+
 
 @router.get("/projects")
 async def list_projects(request: Request):
     """Return list of all projects from portfolio."""
+    global _projects_body
     portfolio = request.app.state.portfolio
+    if _projects_body is None or _projects_body[0] is not portfolio:
+        _projects_body = (portfolio, PrecompressedBody(_project_list(portfolio)))
+    return _projects_body[1].response(request)
+
+
+def _project_list(portfolio: dict) -> dict:
     projects = portfolio.get("projects", [])
     return {
         "count": len(projects),
@@ -89,7 +100,7 @@ async def explain_project(slug: str, request: Request):
     query = f"Explain the {project['name']} project in detail — architecture, tech stack, challenges, and what makes it impressive."
     context_chunks = await rag.retrieve(query, mode="technical")
     system_prompt = _guard.build_system_prompt("technical")
-    explanation = await complete_claude(system_prompt, query, context_chunks)
+    explanation = await complete_claude(system_prompt, query, context_chunks, rag.identity_block)
 
     return {
         "project_name": project["name"],
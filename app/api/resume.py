@@ -45,7 +45,7 @@ async def resume_view():
 async def resume_summary(request: Request):
     """AI-generated resume summary using portfolio context."""
     rag = request.app.state.rag_engine
-    portfolio = request.app.state.portfolio
+    portfolio = rag.portfolio  # same snapshot as the engine, even across a hot reload
 
     identity = portfolio.get("identity", {})
     skills = portfolio.get("skills", {})
@@ -72,7 +72,7 @@ Certifications: {', '.join(c['name'] for c in certs)}
     system_prompt = _guard.build_system_prompt("hr")
     query = "Give a comprehensive, structured resume summary covering my background, skills, key projects, and career highlights."
 
-    summary = await complete_claude(system_prompt, query, [context])
+    summary = await complete_claude(system_prompt, query, [context], rag.identity_block)
 
     return {
         "name": identity.get("full_name", "Venkat"),
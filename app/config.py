@@ -23,24 +23,44 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str = Field("", env="GEMINI_API_KEY")
     GEMINI_MODEL: str = Field("gemini-1.5-flash", env="GEMINI_MODEL")
     CLAUDE_MAX_TOKENS: int = 1500  # keep this, unused but referenced
+    LLM_STREAM_QUEUE_SIZE: int = 64  # max buffered chunks per stream before the producer waits
+    SSE_COALESCE_CHARS: int = 256  # flush a merged token frame at this size (0 = one frame per chunk)
+    SSE_COALESCE_WINDOW_MS: float = 8.0  # ...or once its oldest chunk has waited this long
 
     # ── GitHub ─────────────────────────────────────────
     GITHUB_TOKEN: str = Field("", env="GITHUB_TOKEN")
     GITHUB_USERNAME: str = Field("", env="GITHUB_USERNAME")
+    GITHUB_FETCH_MODE: str = "tarball"  # "tarball" (one archive request) | "contents" (one call per file)
+    GITHUB_TARBALL_MAX_FILES: int = 200  # files indexed per repo in tarball mode
+    GITHUB_TARBALL_MAX_BYTES: int = 50 * 1024 * 1024  # larger archives fall back to per-file fetches
+    GITHUB_MAX_CONNECTIONS: int = 16  # pooled connections to api.github.com
+    GITHUB_FETCH_CONCURRENCY: int = 8  # parallel file fetches per repo
+    GITHUB_RATE_LIMIT_RESERVE: int = 50  # stop fetching extra files when this few requests remain
+    GITHUB_MAX_RETRIES: int = 2
+    GITHUB_MAX_BACKOFF_SECONDS: float = 10.0  # longer Retry-After / reset waits fail fast
 
     # ── Redis ──────────────────────────────────────────
-    REDIS_URL: str = Field("redis://localhost:6379", env="REDIS_URL")
+    REDIS_URL: str = Field("redis://localhost:6379", env="REDIS_URL")  # empty disables Redis
+    REDIS_MAX_CONNECTIONS: int = 16  # shared pool; callers wait when all are busy
+    REDIS_POOL_TIMEOUT: float = 0.5  # seconds to wait for a free pooled connection
+    REDIS_SOCKET_TIMEOUT: float = 0.25  # seconds; connect + command (Redis users fall back locally)
 
     # ── Security ───────────────────────────────────────
     SECRET_KEY: str = Field("dev-secret-key-change-in-prod", env="SECRET_KEY")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    SANITIZER_RULES_PATH: str = "data/injection_rules.json"  # prompt-injection rules, hot-reloaded
+    SANITIZER_RULES_RELOAD_INTERVAL: float = 5.0  # seconds between rules-file mtime checks
 
     # ── AWS ────────────────────────────────────────────
     AWS_ACCESS_KEY_ID: str = Field("", env="AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY: str = Field("", env="AWS_SECRET_ACCESS_KEY")
     AWS_REGION: str = "us-east-1"
     S3_BUCKET_NAME: str = "venkatgpt-data"
+    S3_INDEX_PREFIX: str = "indexes"  # snapshot objects/manifests live under this key prefix
+    S3_UPLOAD_CONCURRENCY: int = 8  # parallel object / part uploads
+    S3_MULTIPART_THRESHOLD: int = 16 * 1024 * 1024  # files at least this big go up in parts
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024  # S3 minimum is 5 MB (except the last part)
 
     # ── CORS ───────────────────────────────────────────
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -50,6 +70,11 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     PORT: int = 8000
 
+    # ── Hot Reload ─────────────────────────────────────
+    ADMIN_TOKEN: str = Field("", env="ADMIN_TOKEN")  # enables POST /api/v1/admin/reload
+    RELOAD_WATCH_INTERVAL: float = 10.0  # seconds between source/index file checks (0 = off)
+    RELOAD_GRACE_SECONDS: float = 60.0  # old snapshot's workers are released after this
+
     # ── File Paths ─────────────────────────────────────
     PORTFOLIO_JSON_PATH: str = "data/portfolio.json"
     RESUME_PDF_PATH: str = "data/resume.pdf"
@@ -63,13 +88,57 @@ class Settings(BaseSettings):
     # ── RAG Settings ───────────────────────────────────
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # fast, good quality
     EMBEDDING_DIMENSION: int = 384
+    EMBEDDING_CACHE_ENABLED: bool = True  # reuse chunk embeddings across index builds (content-addressed, on disk)
+    EMBEDDING_CACHE_DIR: str = ""  # default: {INDEXES_DIR}/embedding_cache
+    EMBEDDING_CACHE_MAX_ROWS: int = 200_000  # ~300 MB at 384 dims; full → new text isn't cached (0: no limit)
+    QUERY_EMBED_CACHE_SIZE: int = 4096  # query embeddings kept in the in-process LRU
+    EMBED_BATCH_WINDOW_MS: float = 3.0  # how long concurrent queries wait to share a batch
+    EMBED_BATCH_MAX_SIZE: int = 32  # flush immediately once this many queries are waiting
     TOP_K_RETRIEVAL: int = 8
     SIMILARITY_THRESHOLD: float = 0.1
     MAX_CONTEXT_TOKENS: int = 3000
 
+    # ── Vector Index ───────────────────────────────────
+    VECTOR_INDEX_TYPE: str = "auto"  # auto | flat | hnsw | ivf | ivfpq
+    VECTOR_STORAGE: str = "float32"  # portfolio/resume vectors: float32 (exact) | fp16 | int8 (scalar quantized)
+    REPO_VECTOR_STORAGE: str = "fp16"  # repo index vectors — half the memory, recall ≈ float32
+    VECTOR_HNSW_MIN_VECTORS: int = 20_000  # auto: below this → exact flat search
+    VECTOR_IVF_MIN_VECTORS: int = 500_000  # auto: at/above this → IVF instead of HNSW
+    HNSW_M: int = 32
+    HNSW_EF_CONSTRUCTION: int = 80
+    HNSW_EF_SEARCH: int = 128
+    IVF_NLIST: int = 0  # 0 → ~4·sqrt(N)
+    IVF_NPROBE: int = 16
+    IVF_PQ_M: int = 48  # sub-quantizers; must divide EMBEDDING_DIMENSION
+    IVF_PQ_BITS: int = 8
+    SNAPSHOT_KEEP: int = 3  # versioned portfolio/resume snapshots kept on disk
+    SNAPSHOT_MODEL_MISMATCH: str = "rebuild"  # snapshot built with another EMBEDDING_MODEL: rebuild | refuse
+    INDEX_LOAD_MODE: str = "mmap"  # mmap (shared, read-only page cache) | memory
+    REPO_INDEX_CACHE_BYTES: int = 256 * 1024 * 1024  # in-memory budget for repo indexes (LRU)
+    INDEX_BUILD_EXECUTOR: str = "process"  # where repo index builds embed: process (own model copy) | thread
+    INDEX_BUILD_WORKERS: int = 1  # embedding processes for repo index builds
+    REPO_BUILD_FAILURE_TTL: int = 30  # seconds a failed repo fetch/build is remembered
+    REPO_WARMUP_ENABLED: bool = True  # build missing project repo indexes in the background at startup
+    REPO_WARMUP_DELAY_SECONDS: float = 5.0  # let startup traffic settle first
+    REPO_WARMUP_CONCURRENCY: int = 2  # parallel warm-up builds
+
+    # ── Response Cache ─────────────────────────────────
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_THRESHOLD: float = 0.92  # cosine similarity for a semantic hit
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    RESPONSE_CACHE_TTL: int = 6 * 3600  # seconds
+    RESPONSE_CACHE_MAX_BYTES: int = 4 * 1024 * 1024
+
+    # ── Compression ────────────────────────────────────
+    GZIP_MINIMUM_SIZE: int = 500  # bytes; smaller single-body responses go out as-is
+    GZIP_LEVEL: int = 6  # gzip level for responses and pre-compressed bodies
+
     # ── Rate Limiting ──────────────────────────────────
     RATE_LIMIT_REQUESTS: int = 20
     RATE_LIMIT_WINDOW: int = 60  # seconds
+    RATE_LIMIT_LEASE_MAX: int = 4  # slots reserved per Redis call for bursting clients well under the limit
+    RATE_LIMIT_LEASE_TTL: float = 1.0  # seconds a reserved slot may be used locally (also the burst gap)
+    RATE_LIMIT_REDIS_RETRY: float = 5.0  # seconds of local-only limiting after a Redis error
 
     class Config:
         env_file = ".env"
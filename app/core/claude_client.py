@@ -9,8 +9,10 @@ import logging
 import asyncio
 import json
 import os
-from typing import AsyncGenerator
+import threading
+from typing import AsyncGenerator, Callable, Iterable
 from dotenv import load_dotenv
+from app.config import settings
 
 load_dotenv()
 
@@ -18,6 +20,12 @@ logger = logging.getLogger(__name__)
 
 _GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 _MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-preview-04-17")
+_STREAM_QUEUE_SIZE = settings.LLM_STREAM_QUEUE_SIZE
+
+_MISSING_KEY_MESSAGE = "GEMINI_API_KEY missing in .env file. Please add it and restart."
+_ERROR_MESSAGE = "Sorry, something went wrong. Please try again."
+# Placeholder answers that must never be cached or treated as a real response
+FALLBACK_MESSAGES = frozenset({_MISSING_KEY_MESSAGE, _ERROR_MESSAGE})
 
 if not _GEMINI_API_KEY:
     logger.error("GEMINI_API_KEY not found in .env file!")
@@ -30,7 +38,15 @@ def _load_identity_block() -> str:
     try:
         with open("data/portfolio.json", "r") as f:
             p = json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not load identity block: {e}")
+        return ""
+    return build_identity_block(p)
+
 
+def build_identity_block(p: dict) -> str:
+    """Core identity facts injected into every prompt, from a portfolio dict."""
+    try:
         identity = p.get("identity", {})
         skills = p.get("skills", {})
         projects = p.get("projects", [])
@@ -84,18 +100,21 @@ Key Achievements:
 {chr(10).join(ach_lines[:3])}""".strip()
         return block
     except Exception as e:
-        logger.warning(f"Could not load identity block: {e}")
+        logger.warning(f"Could not build identity block: {e}")
         return ""
 
 
+# Default for callers without a portfolio snapshot; the app passes RAGEngine.identity_block,
+# which is rebuilt on every hot reload
 _IDENTITY_BLOCK = _load_identity_block()
 
 
-def _build_augmented_message(user_query: str, context_chunks: list[str]) -> str:
+def _build_augmented_message(user_query: str, context_chunks: list[str], identity_block: str | None = None) -> str:
     context_block = "\n\n".join(context_chunks) if context_chunks else "(No additional context retrieved)"
+    identity_block = _IDENTITY_BLOCK if identity_block is None else identity_block
 
     return f"""
-{_IDENTITY_BLOCK}
+{identity_block}
 
 ---
 ADDITIONAL RETRIEVED CONTEXT FROM PORTFOLIO DATABASE:
@@ -113,13 +132,67 @@ USER QUESTION: {user_query}
 """.strip()
 
 
+_STREAM_DONE = object()
+
+
+async def _iterate_in_thread(
+    make_iterable: Callable[[], Iterable],
+    maxsize: int = _STREAM_QUEUE_SIZE,
+) -> AsyncGenerator:
+    """
+    Drive a blocking iterator from a producer thread and yield its items on the event loop.
+
+    The producer hands items over through a bounded asyncio.Queue, so a slow
+    consumer (e.g. a slow SSE client) stalls the producer instead of letting the
+    queue grow. If the consumer goes away, the producer stops at the next item.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def _put(item) -> None:
+        # Blocks the producer thread (never the loop) until the queue has room
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def _produce() -> None:
+        try:
+            for item in make_iterable():
+                if stop.is_set():
+                    return
+                _put(item)
+        except BaseException as e:  # forwarded to the consumer and re-raised there
+            if not stop.is_set():
+                _put(e)
+            return
+        if not stop.is_set():
+            _put(_STREAM_DONE)
+
+    producer = threading.Thread(target=_produce, name="llm-stream", daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue so the thread can exit
+        while not queue.empty():
+            queue.get_nowait()
+
+
 async def stream_claude(
     system_prompt: str,
     user_query: str,
     context_chunks: list[str],
+    identity_block: str | None = None,
 ) -> AsyncGenerator[str, None]:
     if not _GEMINI_API_KEY:
-        yield "GEMINI_API_KEY missing in .env file. Please add it and restart."
+        yield _MISSING_KEY_MESSAGE
         return
 
     try:
@@ -128,29 +201,31 @@ async def stream_claude(
             system_instruction=system_prompt,
         )
 
-        augmented_message = _build_augmented_message(user_query, context_chunks)
+        augmented_message = _build_augmented_message(user_query, context_chunks, identity_block)
 
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: model.generate_content(augmented_message, stream=True)
-        )
+        # Both the request and every per-chunk network read block, so the whole
+        # iteration runs in a producer thread instead of on the event loop.
+        def _chunk_texts():
+            response = model.generate_content(augmented_message, stream=True)
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
 
-        for chunk in response:
-            if chunk.text:
-                yield chunk.text
+        async for text in _iterate_in_thread(_chunk_texts):
+            yield text
 
     except Exception as e:
         logger.error(f"Gemini API error: {e}")
-        yield "Sorry, something went wrong. Please try again."
+        yield _ERROR_MESSAGE
 
 
 async def complete_claude(
     system_prompt: str,
     user_query: str,
     context_chunks: list[str],
+    identity_block: str | None = None,
 ) -> str:
     full_response = ""
-    async for token in stream_claude(system_prompt, user_query, context_chunks):
+    async for token in stream_claude(system_prompt, user_query, context_chunks, identity_block):
         full_response += token
     return full_response
\ No newline at end of file
@@ -3,13 +3,16 @@ app/core/persona_guard.py
 ──────────────────────────
 Persona enforcement layer.
 - Builds mode-specific system prompts
-- Detects off-topic questions
+- Detects off-topic questions and project mentions (one Aho-Corasick scan
+  per query; the project automaton is built once per portfolio)
 - Returns redirect messages
 """
 
 import logging
+from dataclasses import dataclass
 from pathlib import Path
 from app.config import settings
+from app.utils.aho_corasick import AhoCorasick
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +31,36 @@ OFF_TOPIC_PATTERNS = [
     "joke", "riddle", "fun fact", "horoscope",
 ]
 
+OFF_TOPIC = "off_topic"
+
+
+def _off_topic_patterns() -> list[tuple[str, str]]:
+    # Whole-word matching: spell out the plural ("recipes", "stock prices") explicitly
+    return [(p + suffix, OFF_TOPIC) for p in OFF_TOPIC_PATTERNS for suffix in ("", "s")]
+
+
+_OFF_TOPIC_MATCHER = AhoCorasick(_off_topic_patterns())
+
+
+@dataclass(frozen=True)
+class QueryScan:
+    off_topic: bool
+    project_repo: str | None  # github_repo of the mentioned project ("" if it has none)
+
+
+def build_query_matcher(portfolio: dict) -> AhoCorasick:
+    """
+    Automaton over the off-topic phrases plus every project's name, slug,
+    github_repo ("owner/repo") and bare repo name. Project values are their
+    index in portfolio["projects"].
+    """
+    patterns = _off_topic_patterns()
+    for i, project in enumerate(portfolio.get("projects", [])):
+        repo = project.get("github_repo") or ""
+        keys = {project.get("name") or "", project.get("slug") or "", repo, repo.rsplit("/", 1)[-1]}
+        patterns.extend((key, i) for key in keys)
+    return AhoCorasick(patterns)
+
 
 class PersonaGuard:
     def __init__(self):
@@ -38,6 +71,7 @@ class PersonaGuard:
             "technical": self._load(prompts_dir / "technical_mode.txt"),
             "summary": self._load(prompts_dir / "summary_mode.txt"),
         }
+        self._matcher: tuple[dict, AhoCorasick] | None = None  # (portfolio it was built from, automaton)
 
     def _load(self, path: Path) -> str:
         if path.exists():
@@ -52,8 +86,7 @@ class PersonaGuard:
 
     def is_off_topic(self, query: str) -> bool:
         """Lightweight off-topic filter before hitting Claude."""
-        query_lower = query.lower()
-        return any(pattern in query_lower for pattern in OFF_TOPIC_PATTERNS)
+        return bool(_OFF_TOPIC_MATCHER.find_all(query))
 
     def get_redirect_message(self, query: str) -> str:
         return (
@@ -62,17 +95,32 @@ class PersonaGuard:
             "What would you like to know about my work?"
         )
 
+    def scan_query(self, query: str, portfolio: dict) -> QueryScan:
+        """
+        Off-topic phrases and project mentions (name, slug, repo) in one pass.
+        The longest project mention wins; ties go to the project listed first.
+        """
+        off_topic, best = False, None
+        for m in self._matcher_for(portfolio).find_all(query):
+            if m.value == OFF_TOPIC:
+                off_topic = True
+            elif best is None or (-len(m.pattern), m.value) < (-len(best.pattern), best.value):
+                best = m
+        repo = None if best is None else portfolio["projects"][best.value].get("github_repo", "")
+        return QueryScan(off_topic, repo)
+
     def detect_project_name(self, query: str, portfolio: dict) -> str | None:
         """
-        Fuzzy-match query against known project names.
+        Match the query against known project names, slugs and repo names.
         Returns the matching project slug (for GitHub API fetch) or None.
         """
-        projects = portfolio.get("projects", [])
-        query_lower = query.lower()
-        for project in projects:
-            name = project.get("name", "").lower()
-            slug = project.get("slug", "").lower()
-            github_repo = project.get("github_repo", "").lower()
-            if name in query_lower or slug in query_lower:
-                return project.get("github_repo", "")
-        return None
+        return self.scan_query(query, portfolio).project_repo
+
+    def _matcher_for(self, portfolio: dict) -> AhoCorasick:
+        cached = self._matcher
+        if cached is not None and cached[0] is portfolio:
+            return cached[1]
+        matcher = build_query_matcher(portfolio)  # a reload brings a new portfolio dict → rebuilt
+        self._matcher = (portfolio, matcher)
+        logger.info(f"Query matcher built: {len(matcher)} patterns")
+        return matcher
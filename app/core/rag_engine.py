@@ -5,41 +5,82 @@ RAG pipeline orchestrator.
 Handles: query embedding → retrieval → repo intelligence → context assembly.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
+import time
 import numpy as np
 from app.vectorstore.index_manager import IndexManager
+from app.vectorstore.chunk_store import ChunkRecord
 from app.ingestion.embedder import Embedder
+from app.ingestion.embedding_batcher import EmbeddingBatcher
 from app.ingestion.github_fetcher import GitHubFetcher
-from app.core.persona_guard import PersonaGuard
+from app.core.persona_guard import PersonaGuard, QueryScan
+from app.core.claude_client import build_identity_block
+from app.utils.singleflight import SingleFlight
+from app.vectorstore.faiss_store import FAISSStore
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+class RepoIndexUnavailable(Exception):
+    """A repo index could not be built (GitHub fetch failed or returned nothing)."""
+
+
 class RAGEngine:
-    def __init__(self, index_manager: IndexManager, portfolio: dict):
+    def __init__(self, index_manager: IndexManager, portfolio: dict, github: GitHubFetcher | None = None):
         self.index_manager = index_manager
         self.portfolio = portfolio
         self.embedder = Embedder()
-        self.github = GitHubFetcher()
+        self.batcher = EmbeddingBatcher(self.embedder)
+        self.github = github or GitHubFetcher()
         self.guard = PersonaGuard()
+        self.identity_block = build_identity_block(portfolio)  # prompt facts for this portfolio snapshot
+        # Concurrent cache misses for the same repo share one fetch + build
+        self._repo_builds: SingleFlight[FAISSStore] = SingleFlight(settings.REPO_BUILD_FAILURE_TTL)
+        self._portfolio_hash = hashlib.sha256(
+            json.dumps(portfolio, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+
+    @property
+    def version(self) -> str:
+        """Identifies the portfolio + index data answers are produced from."""
+        return f"{self._portfolio_hash}:{self.index_manager.version}"
+
+    def close(self) -> None:
+        """Release worker threads/processes once no request uses this engine any more."""
+        self.batcher.close()
+        self.index_manager.close()
+
+    async def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a user query off the event loop.
+        Concurrent calls are micro-batched into a single model pass.
+        Returns (D,) float32 array, L2-normalized.
+        """
+        return await self.batcher.embed(query)
 
     async def retrieve(
         self,
         query: str,
         mode: str = "hr",
         top_k: int = None,
+        query_embedding: np.ndarray | None = None,
+        scan: QueryScan | None = None,
     ) -> list[str]:
         """
         Full retrieval pipeline:
-        1. Embed query
+        1. Embed query (skipped if the caller already has the embedding)
         2. Search portfolio index
         3. Search resume index
-        4. If project name detected → trigger Repo Intelligence
+        4. If project name detected (from `scan` if the caller already scanned) → trigger Repo Intelligence
         5. Merge, deduplicate, return formatted context strings
         """
         top_k = top_k or settings.TOP_K_RETRIEVAL
-        query_embedding = self.embedder.embed(query)
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query)
 
         # ── Base retrieval ─────────────────────────────────────────────
         portfolio_results = self.index_manager.portfolio_index.search(
@@ -52,7 +93,9 @@ class RAGEngine:
         all_results = portfolio_results + resume_results
 
         # ── Repo Intelligence ──────────────────────────────────────────
-        repo_slug = self.guard.detect_project_name(query, self.portfolio)
+        if scan is None:
+            scan = self.guard.scan_query(query, self.portfolio)
+        repo_slug = scan.project_repo
         if repo_slug:
             logger.info(f"Repo Intelligence triggered: {repo_slug}")
             repo_results = await self._get_repo_chunks(repo_slug, query_embedding, k=6)
@@ -71,19 +114,83 @@ class RAGEngine:
 
     async def _get_repo_chunks(
         self, slug: str, query_embedding: np.ndarray, k: int = 6
-    ) -> list[dict]:
+    ) -> list[ChunkRecord]:
         """Get repo chunks from cache or fetch fresh from GitHub."""
+        repo_index = await self.ensure_repo_index(slug)
+        if repo_index is None:
+            return []
+        return repo_index.search(query_embedding, k=k)
+
+    async def ensure_repo_index(self, slug: str) -> FAISSStore | None:
+        """
+        Return the repo index, building it on a cache miss.
+        Concurrent callers for the same slug join a single build; a failed
+        build is shared and not retried until REPO_BUILD_FAILURE_TTL passes.
+        """
         repo_index = self.index_manager.get_repo_index(slug)
+        if repo_index is not None:
+            return repo_index
 
-        if repo_index is None:
-            # Cache miss — fetch from GitHub
-            logger.info(f"Cache miss for {slug} — fetching from GitHub...")
-            repo_chunks = await self.github.fetch_repo_chunks(slug)
-            repo_index = self.index_manager.build_repo_index(slug, repo_chunks)
+        try:
+            return await self._repo_builds.do(slug, lambda: self._build_repo_index(slug))
+        except Exception as e:
+            logger.warning(f"Repo Intelligence unavailable for {slug}: {e}")
+            return None
 
-        return repo_index.search(query_embedding, k=k)
+    async def _build_repo_index(self, slug: str) -> FAISSStore:
+        # Another caller may have finished the build while we were queued
+        repo_index = self.index_manager.get_repo_index(slug)
+        if repo_index is not None:
+            return repo_index
 
-    def _format_context(self, results: list[dict]) -> list[str]:
+        logger.info(f"Cache miss for {slug} — fetching from GitHub...")
+        update = await self.github.fetch_repo_update(slug)
+        if not update.chunks:
+            # Don't persist an empty index for what is usually a transient fetch failure
+            raise RepoIndexUnavailable(f"no content fetched for {slug}")
+        return await self.index_manager.build_repo_index_async(slug, update.chunks, update.state)
+
+    async def warm_repo_indexes(self, concurrency: int = 2, delay: float = 0.0) -> dict[str, str]:
+        """
+        Build missing repo indexes for every portfolio project with a github_repo,
+        so the first visitor to ask about one doesn't pay for the fetch + embed.
+
+        Meant to run as a background task: it waits `delay` seconds, builds at most
+        `concurrency` repos at a time, and stops starting new builds once the GitHub
+        quota is low. Builds go through the same single-flight as chat requests, so
+        a request for a repo being warmed joins that build. Returns slug → outcome.
+        """
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        slugs = list(dict.fromkeys(
+            p["github_repo"] for p in self.portfolio.get("projects", []) if p.get("github_repo")
+        ))
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        outcomes: dict[str, str] = {}
+
+        async def warm(slug: str) -> None:
+            async with semaphore:
+                if self.index_manager.has_repo_index(slug):
+                    outcomes[slug] = "cached"
+                elif self.github.quota_low:
+                    outcomes[slug] = "skipped"
+                else:
+                    ok = await self.ensure_repo_index(slug) is not None
+                    outcomes[slug] = "built" if ok else "failed"
+                await asyncio.sleep(0)  # let queued chat requests run between builds
+
+        started = time.perf_counter()
+        await asyncio.gather(*(warm(slug) for slug in slugs))
+        counts = {o: list(outcomes.values()).count(o) for o in set(outcomes.values())}
+        logger.info(f"Repo warm-up finished in {time.perf_counter() - started:.1f}s: {counts}")
+        return outcomes
+
+    async def refresh_repo_index(self, slug: str) -> str:
+        """Bring a cached repo index up to date; see IndexManager.refresh_repo_index."""
+        return await self.index_manager.refresh_repo_index(slug, self.github)
+
+    def _format_context(self, results: list[ChunkRecord]) -> list[str]:
         """
         Deduplicate by text, format for prompt injection.
         Returns list of strings like "[Source: ...]\n{text}"
@@ -0,0 +1,205 @@
+"""
+app/core/reloader.py
+─────────────────────
+Zero-downtime hot reload of the portfolio, indexes and identity block.
+
+A reload builds a complete new snapshot (portfolio dict, IndexManager,
+RAGEngine + identity block) on a worker thread, then swaps it onto
+app.state in one synchronous step — no await in between, so every request
+sees either the old snapshot or the new one. Requests already running keep
+the engine they started with; the old engine's workers are released after
+RELOAD_GRACE_SECONDS, or at shutdown if that comes first. The reloader also
+owns the background repo-index warm-up: a reload cancels the warm-up running
+on the old engine and starts one on the new engine, so builds never land on
+an engine being retired.
+
+Indexes are loaded memory-mapped, so old and new snapshots share pages
+instead of doubling memory. The portfolio / resume indexes are only rebuilt
+when the source hashes recorded in the index snapshot's manifest no longer
+match (and then mostly from the embedding cache).
+
+Triggers: POST /api/v1/admin/reload (ADMIN_TOKEN) reloads the worker
+that receives it; with RELOAD_WATCH_INTERVAL > 0 every worker polls the
+source and index files and reloads itself.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from app.config import settings
+from app.core.rag_engine import RAGEngine
+from app.ingestion.github_fetcher import GitHubFetcher
+from app.ingestion.portfolio_loader import PortfolioLoader
+from app.ingestion.resume_loader import ResumeLoader
+from app.vectorstore.index_manager import IndexManager
+from app.vectorstore.snapshot import CURRENT_FILE, SnapshotMismatch, build_lock
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AppSnapshot:
+    portfolio: dict
+    index_manager: IndexManager
+    rag_engine: RAGEngine
+
+
+def load_snapshot(github: GitHubFetcher) -> AppSnapshot:
+    """
+    Load portfolio + indexes and build a RAG engine around them (blocking).
+    The base indexes are rebuilt (as a new snapshot) when they are missing, were
+    built from different source files, or — unless SNAPSHOT_MODEL_MISMATCH is
+    "refuse", which raises instead — with a different embedding model.
+    """
+    portfolio_loader = PortfolioLoader()
+    portfolio = portfolio_loader.load(settings.PORTFOLIO_JSON_PATH)
+    logger.info(f"Portfolio loaded: {len(portfolio.get('projects', []))} projects, "
+                f"{len(portfolio.get('certifications', []))} certs")
+
+    index_manager = IndexManager()
+    if _needs_rebuild(index_manager):
+        # Workers that noticed the same change queue here; the first one builds
+        with build_lock(index_manager.indexes_dir):
+            if _needs_rebuild(index_manager):
+                logger.info("Base indexes missing or stale — building a new snapshot...")
+                index_manager.build_base_indexes(
+                    portfolio_loader.build_chunks(portfolio),
+                    ResumeLoader().load_and_chunk(settings.RESUME_PDF_PATH),
+                )
+                index_manager.load_all()  # serve the memory-mapped copy
+            else:
+                logger.info(f"Another worker published snapshot {index_manager.version} — using it")
+
+    return AppSnapshot(portfolio, index_manager, RAGEngine(index_manager, portfolio, github))
+
+
+def _needs_rebuild(index_manager: IndexManager) -> bool:
+    """(Re)load the current indexes; True if they are missing/stale or were built with another model."""
+    try:
+        index_manager.load_all()
+        return index_manager.sources_changed()
+    except SnapshotMismatch as e:
+        if settings.SNAPSHOT_MODEL_MISMATCH == "refuse":
+            raise
+        logger.warning(f"{e} — rebuilding")
+        return True
+
+
+def install_snapshot(app, snapshot: AppSnapshot) -> AppSnapshot | None:
+    """Swap a snapshot onto app.state. Synchronous on purpose: the swap can't interleave with requests."""
+    state = app.state
+    previous = None
+    if getattr(state, "rag_engine", None) is not None:
+        previous = AppSnapshot(state.portfolio, state.index_manager, state.rag_engine)
+    state.portfolio = snapshot.portfolio
+    state.index_manager = snapshot.index_manager
+    state.rag_engine = snapshot.rag_engine
+    return previous
+
+
+def source_fingerprint() -> tuple:
+    """mtime/size of everything a reload would pick up (a new snapshot flips CURRENT)."""
+    indexes_dir = Path(settings.INDEXES_DIR)
+    paths = [
+        Path(settings.PORTFOLIO_JSON_PATH),
+        Path(settings.RESUME_PDF_PATH),
+        indexes_dir / CURRENT_FILE,
+        indexes_dir / "portfolio" / "index.faiss",
+        indexes_dir / "resume" / "index.faiss",
+    ]
+    fingerprint = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            fingerprint.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+class Reloader:
+    def __init__(self, app, github: GitHubFetcher, grace_seconds: float | None = None):
+        self.app = app
+        self.github = github
+        self.grace_seconds = settings.RELOAD_GRACE_SECONDS if grace_seconds is None else grace_seconds
+        self._lock = asyncio.Lock()
+        self._retiring: dict[asyncio.Task, AppSnapshot] = {}  # close_later task → snapshot it closes
+        self.warmup: asyncio.Task | None = None
+        self._fingerprint: tuple | None = None
+        self.reloads = 0
+        self.last_reload: dict | None = None
+
+    async def reload(self, reason: str = "manual") -> dict:
+        """Build a new snapshot off the loop and swap it in. Concurrent calls queue behind one another."""
+        async with self._lock:
+            started = time.perf_counter()
+            snapshot = await asyncio.to_thread(load_snapshot, self.github)
+            previous = install_snapshot(self.app, snapshot)
+            self._fingerprint = source_fingerprint()  # includes indexes this reload rebuilt itself
+            if previous is not None:
+                self._retire(previous)
+            if self.warmup is not None:
+                self.start_warmup(snapshot.rag_engine)
+
+            self.reloads += 1
+            self.last_reload = {
+                "reason": reason,
+                "version": snapshot.rag_engine.version,
+                "seconds": round(time.perf_counter() - started, 3),
+                "portfolio_vectors": snapshot.index_manager.portfolio_index.size,
+                "resume_vectors": snapshot.index_manager.resume_index.size,
+                "at": time.time(),
+            }
+            logger.info(f"Hot reload ({reason}) done in {self.last_reload['seconds']}s → {self.last_reload['version']}")
+            return self.last_reload
+
+    async def watch(self, interval: float) -> None:
+        """Poll source/index files and reload when they change (e.g. after scripts/build_index.py)."""
+        self._fingerprint = source_fingerprint()
+        while True:
+            await asyncio.sleep(interval)
+            if source_fingerprint() == self._fingerprint:
+                continue
+            try:
+                await self.reload("file change")
+            except Exception as e:
+                logger.error(f"Hot reload failed, keeping the current snapshot: {e}")
+                self._fingerprint = source_fingerprint()  # don't retry until something changes again
+
+    def start_warmup(self, rag_engine: RAGEngine) -> None:
+        """(Re)start the background repo-index warm-up on `rag_engine` (REPO_WARMUP_ENABLED)."""
+        self._cancel_warmup()
+        if not settings.REPO_WARMUP_ENABLED:
+            return
+        self.warmup = asyncio.create_task(rag_engine.warm_repo_indexes(
+            concurrency=settings.REPO_WARMUP_CONCURRENCY,
+            delay=settings.REPO_WARMUP_DELAY_SECONDS,
+        ))
+
+    def _cancel_warmup(self) -> None:
+        if self.warmup is not None and not self.warmup.done():
+            self.warmup.cancel()
+
+    def _retire(self, snapshot: AppSnapshot) -> None:
+        async def close_later():
+            await asyncio.sleep(self.grace_seconds)  # let in-flight requests finish on it
+            snapshot.rag_engine.close()
+
+        task = asyncio.create_task(close_later())
+        self._retiring[task] = snapshot
+        task.add_done_callback(lambda t: self._retiring.pop(t, None))
+
+    async def aclose(self) -> None:
+        self._cancel_warmup()
+        if self.warmup is not None:
+            with suppress(asyncio.CancelledError, Exception):
+                await self.warmup
+        # Shutdown doesn't wait out the grace period, but the engines still get closed
+        for task, snapshot in list(self._retiring.items()):
+            task.cancel()
+            snapshot.rag_engine.close()
+        self._retiring.clear()
@@ -0,0 +1,171 @@
+"""
+app/core/response_cache.py
+───────────────────────────
+Semantic response cache in front of the LLM.
+
+Entries are keyed by (mode, detected project, query embedding). A lookup hits
+when the cosine similarity to a cached query with the same mode and project is
+above the threshold, so "what's your tech stack?" and "which technologies do
+you use?" can share one Gemini answer, while "how does X's auth work?" never
+returns the answer built from project Y's repo. Embeddings live in one
+preallocated float32 matrix; eviction is LRU with a TTL and a byte budget on
+the stored answers. Every entry is tagged with the data version it was
+produced from, and a version change drops the whole cache.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import numpy as np
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResponse:
+    response: str
+    context_sources: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _Entry:
+    mode: str
+    project: str | None  # repo of the project the query mentioned (its context differs)
+    value: CachedResponse
+    created_at: float
+    nbytes: int
+
+
+class SemanticResponseCache:
+    def __init__(
+        self,
+        threshold: float = None,
+        max_entries: int = None,
+        ttl_seconds: int = None,
+        max_bytes: int = None,
+        dimension: int = None,
+    ):
+        self.threshold = settings.RESPONSE_CACHE_THRESHOLD if threshold is None else threshold
+        self.max_entries = settings.RESPONSE_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = settings.RESPONSE_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self.max_bytes = settings.RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.dimension = settings.EMBEDDING_DIMENSION if dimension is None else dimension
+
+        self._vectors = np.zeros((self.max_entries, self.dimension), dtype="float32")
+        self._live = np.zeros(self.max_entries, dtype=bool)
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()  # slot → entry, LRU order
+        self._free = list(range(self.max_entries - 1, -1, -1))
+        self._bytes = 0
+        self._version: str | None = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        mode: str,
+        query_embedding: np.ndarray,
+        version: str,
+        project: str | None = None,
+    ) -> CachedResponse | None:
+        """Return the cached answer for the most similar same-mode, same-project query, if close enough."""
+        with self._lock:
+            self._check_version(version)
+            slot = self._best_match(mode, project, query_embedding)
+            if slot is None:
+                self.misses += 1
+                return None
+
+            entry = self._entries[slot]
+            if time.monotonic() - entry.created_at >= self.ttl:
+                self._evict(slot)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            return entry.value
+
+    def put(
+        self,
+        mode: str,
+        query_embedding: np.ndarray,
+        version: str,
+        response: str,
+        context_sources: list[str] | None = None,
+        project: str | None = None,
+    ) -> None:
+        nbytes = len(response.encode("utf-8"))
+        if nbytes > self.max_bytes or self.max_entries == 0:
+            return
+
+        with self._lock:
+            self._check_version(version)
+
+            # Near-duplicate of an existing entry → refresh it in place
+            slot = self._best_match(mode, project, query_embedding)
+            if slot is not None:
+                self._evict(slot)
+
+            while self._entries and (not self._free or self._bytes + nbytes > self.max_bytes):
+                self._evict(next(iter(self._entries)))
+
+            slot = self._free.pop()
+            self._vectors[slot] = query_embedding
+            self._live[slot] = True
+            self._entries[slot] = _Entry(
+                mode=mode,
+                project=project,
+                value=CachedResponse(response, list(context_sources or [])),
+                created_at=time.monotonic(),
+                nbytes=nbytes,
+            )
+            self._bytes += nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _best_match(self, mode: str, project: str | None, query_embedding: np.ndarray) -> int | None:
+        if not self._entries:
+            return None
+        sims = self._vectors @ query_embedding.astype("float32", copy=False)
+        sims[~self._live] = -1.0
+        for slot in np.argsort(sims)[::-1]:
+            if sims[slot] < self.threshold:
+                return None
+            entry = self._entries[int(slot)]
+            if entry.mode == mode and entry.project == project:
+                return int(slot)
+        return None
+
+    def _evict(self, slot: int) -> None:
+        entry = self._entries.pop(slot)
+        self._bytes -= entry.nbytes
+        self._live[slot] = False
+        self._free.append(slot)
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            if self._entries:
+                logger.info(f"Response cache invalidated (data version {self._version} → {version})")
+            self._clear()
+            self._version = version
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._live[:] = False
+        self._free = list(range(self.max_entries - 1, -1, -1))
+        self._bytes = 0
@@ -8,7 +8,11 @@ Model: all-MiniLM-L6-v2 (384-dim, fast, good quality for semantic search)
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from app.config import settings
+from collections import OrderedDict
 import logging
+import threading
+import time
+from app.ingestion.embedding_cache import get_embedding_cache
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +20,72 @@ logger = logging.getLogger(__name__)
 _model: SentenceTransformer | None = None
 
 
+def normalize_query(text: str) -> str:
+    """Cache-key form of a query: collapsed whitespace, case-folded (the default model is uncased)."""
+    return " ".join(text.split()).casefold()
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded, thread-safe LRU of query embeddings.
+    Vectors live in one preallocated (capacity, D) float32 array;
+    the LRU only maps key → row.
+    """
+
+    def __init__(self, capacity: int, dimension: int):
+        self.capacity = capacity
+        self._vectors = np.zeros((capacity, dimension), dtype="float32")
+        self._slots: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[str, str], record: bool = True) -> np.ndarray | None:
+        """Cached vector or None; record=False leaves hits/misses alone (a repeat lookup)."""
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                if record:
+                    self.misses += 1
+                return None
+            self._slots.move_to_end(key)
+            if record:
+                self.hits += 1
+            return self._vectors[slot].copy()
+
+    def put(self, key: tuple[str, str], vec: np.ndarray) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                if len(self._slots) < self.capacity:
+                    slot = len(self._slots)
+                else:
+                    _, slot = self._slots.popitem(last=False)  # reuse the LRU row
+            self._vectors[slot] = vec
+            self._slots[key] = slot
+            self._slots.move_to_end(key)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._slots),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# Shared by every Embedder instance in the process
+_query_cache = QueryEmbeddingCache(settings.QUERY_EMBED_CACHE_SIZE, settings.EMBEDDING_DIMENSION)
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    return _query_cache
+
+
 def get_model() -> SentenceTransformer:
     global _model
     if _model is None:
@@ -31,9 +101,42 @@ class Embedder:
         self.dimension = settings.EMBEDDING_DIMENSION
 
     def embed(self, text: str) -> np.ndarray:
-        """Embed a single string. Returns (D,) float32 array."""
-        vec = self.model.encode(text, normalize_embeddings=True)
-        return vec.astype("float32")
+        """Embed a single string. Returns (D,) float32 array. Repeat queries are served from cache."""
+        return self.embed_queries([text])[0]
+
+    def lookup_cached(self, text: str) -> np.ndarray | None:
+        """Return the cached query embedding without touching the model, or None."""
+        return _query_cache.get((settings.EMBEDDING_MODEL, normalize_query(text)))
+
+    def embed_queries(self, texts: list[str], record_stats: bool = True) -> np.ndarray:
+        """
+        Embed user queries through the query cache.
+        Cache misses (deduplicated) go to the model as one batch.
+        record_stats=False when the caller already counted these lookups
+        (the batcher checks the cache before queueing).
+        Returns (N, D) float32 array, L2-normalized.
+        """
+        out = np.empty((len(texts), self.dimension), dtype="float32")
+        missing: dict[tuple[str, str], list[int]] = {}
+        for i, text in enumerate(texts):
+            key = (settings.EMBEDDING_MODEL, normalize_query(text))
+            cached = None if key in missing else _query_cache.get(key, record=record_stats)
+            if cached is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                out[i] = cached
+
+        if missing:
+            rows = [positions[0] for positions in missing.values()]
+            vecs = self.model.encode(
+                [texts[i] for i in rows],
+                batch_size=max(len(rows), 1),
+                normalize_embeddings=True,
+            ).astype("float32")
+            for vec, (key, positions) in zip(vecs, missing.items()):
+                _query_cache.put(key, vec)
+                out[positions] = vec
+        return out
 
     def embed_batch(self, texts: list[str], batch_size: int = 64) -> np.ndarray:
         """
@@ -51,3 +154,29 @@ class Embedder:
             show_progress_bar=len(texts) > 50,
         )
         return vecs.astype("float32")
+
+    def embed_chunks(self, texts: list[str], batch_size: int = 64) -> np.ndarray:
+        """
+        embed_batch for index builds: chunks already in the persistent embedding
+        cache are reused, only new text goes to the model.
+        Returns (N, D) float32 array, L2-normalized.
+        """
+        cache = get_embedding_cache()
+        if cache is None or not texts:
+            return self.embed_batch(texts, batch_size)
+
+        started = time.perf_counter()
+        out, missing = cache.lookup(texts)
+        computed = list(dict.fromkeys(texts[i] for i in missing))
+        if computed:
+            vecs = self.embed_batch(computed, batch_size)
+            cache.add(computed, vecs)
+            by_text = dict(zip(computed, vecs))
+            for i in missing:
+                out[i] = by_text[texts[i]]
+        logger.info(
+            f"Embedded {len(texts)} chunks in {time.perf_counter() - started:.2f}s — "
+            f"{len(texts) - len(missing)} from cache ({1 - len(missing) / len(texts):.0%}), "
+            f"{len(computed)} computed"
+        )
+        return out
@@ -0,0 +1,100 @@
+"""
+app/ingestion/embedding_batcher.py
+───────────────────────────────────
+Async micro-batching front end for query embeddings.
+
+Concurrent embed() calls are collected for a short window (or until the batch
+is full), encoded as one model.encode batch on a worker thread, and each
+caller's future is resolved with its row. The event loop never runs the model.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import numpy as np
+from app.ingestion.embedder import Embedder
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embedder: Embedder,
+        window_ms: float = None,
+        max_batch: int = None,
+    ):
+        self.embedder = embedder
+        self.window = (window_ms if window_ms is not None else settings.EMBED_BATCH_WINDOW_MS) / 1000
+        self.max_batch = max_batch or settings.EMBED_BATCH_MAX_SIZE
+        # One worker: batches queue behind each other instead of competing for cores
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-embed")
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+        self.batches = 0
+        self.items = 0
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed one query. Returns (D,) float32 array, L2-normalized."""
+        cached = self.embedder.lookup_cached(text)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        batch = [(text, fut) for text, fut in batch if not fut.done()]  # drop cancelled callers
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        loop = asyncio.get_running_loop()
+        # embed() already counted these cache misses; the re-check inside stays silent
+        job = loop.run_in_executor(
+            self._executor, partial(self.embedder.embed_queries, [text for text, _ in batch], record_stats=False)
+        )
+        job.add_done_callback(lambda done: self._resolve(batch, done))
+
+    @staticmethod
+    def _resolve(batch: list[tuple[str, asyncio.Future]], job: asyncio.Future) -> None:
+        if job.cancelled() or job.exception() is not None:
+            error = asyncio.CancelledError() if job.cancelled() else job.exception()
+            logger.error(f"Batched embedding failed for {len(batch)} queries: {error!r}")
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(error)
+            return
+
+        vecs = job.result()
+        for (_, fut), vec in zip(batch, vecs):
+            if not fut.done():
+                fut.set_result(vec)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def close(self) -> None:
+        """Stop the worker thread after already-submitted batches finish."""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,262 @@
+"""
+app/ingestion/embedding_cache.py
+─────────────────────────────────
+Content-addressed, on-disk cache of chunk embeddings for index builds.
+
+Keyed by (embedding model, SHA-256 of the chunk text), so a rebuild only
+embeds text it has never seen. Per model, under EMBEDDING_CACHE_DIR:
+    keys.bin     — 32-byte SHA-256 digests, one per row, append-only
+    vectors.f32  — float32[rows, D], append-only, row i ↔ key i
+    meta.json    — {"model", "dimension"}
+
+Appends are serialized across processes with an exclusive flock; readers
+only trust the prefix where both files have a complete row, so a torn
+append is ignored (and trimmed by the next writer).
+
+Edited text leaves its old row behind, so the cache stops growing at
+EMBEDDING_CACHE_MAX_ROWS, and compact() (run by scripts/build_index.py)
+rewrites it with only the texts the current indexes use. Lookups hold a
+shared flock, so they never read a half-rewritten pair of files, and
+re-index from scratch once they see the files were replaced.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Iterable
+import numpy as np
+from app.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows — single-process builds only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+KEYS_FILE = "keys.bin"
+VECTORS_FILE = "vectors.f32"
+META_FILE = "meta.json"
+KEY_BYTES = 32
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class PersistentEmbeddingCache:
+    def __init__(self, root: Path, model: str, dimension: int, max_rows: int = 0):
+        self.dir = Path(root) / model.replace("/", "__")
+        self.model = model
+        self.dimension = dimension
+        self.max_rows = max_rows  # 0: unbounded
+        self._row_bytes = 4 * dimension
+        self._rows: dict[bytes, int] = {}  # digest → row
+        self._n_rows = 0  # rows indexed so far
+        self._files_id: tuple | None = None  # (dev, inode) of the keys file indexed
+        self._vectors: np.memmap | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.full = False  # an add() was cut short by max_rows
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._check_meta()
+
+    def lookup(self, texts: list[str]) -> tuple[np.ndarray, list[int]]:
+        """(N, D) array with every cached row filled in, plus the indices of texts that missed."""
+        out = np.zeros((len(texts), self.dimension), dtype="float32")
+        with self._lock, self._file_lock(shared=True):
+            self._sync()
+            found, missing = [], []
+            for i, text in enumerate(texts):
+                row = self._rows.get(text_key(text))
+                (missing if row is None else found).append((i, row))
+            if found:
+                positions, rows = zip(*found)
+                out[list(positions)] = self._matrix()[list(rows)]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return out, [i for i, _ in missing]
+
+    def add(self, texts: list[str], vectors: np.ndarray) -> None:
+        """Append embeddings for texts not already cached (by this or another process)."""
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        with self._lock, self._file_lock():
+            n = self._sync(trim=True)
+            new_keys, new_rows = [], []
+            for text, vec in zip(texts, vectors):
+                key = text_key(text)
+                if key not in self._rows:
+                    self._rows[key] = n + len(new_keys)
+                    new_keys.append(key)
+                    new_rows.append(vec)
+            if self.max_rows and n + len(new_keys) > self.max_rows:
+                room = max(self.max_rows - n, 0)
+                for key in new_keys[room:]:
+                    del self._rows[key]
+                new_keys, new_rows = new_keys[:room], new_rows[:room]
+                if not self.full:
+                    logger.warning(
+                        f"Embedding cache {self.dir} is full ({self.max_rows} rows) — new text is not "
+                        f"cached until scripts/build_index.py compacts it"
+                    )
+                self.full = True
+            if not new_keys:
+                return
+            # Vectors first: a row only counts once its key exists
+            with open(self.dir / VECTORS_FILE, "ab") as f:
+                f.write(np.stack(new_rows).tobytes())
+            with open(self.dir / KEYS_FILE, "ab") as f:
+                f.write(b"".join(new_keys))
+            self._n_rows = n + len(new_keys)
+            self._files_id = self._current_files_id()
+            self._vectors = None
+
+    def compact(self, keep: Iterable[str]) -> dict:
+        """
+        Rewrite the cache with only the rows of `keep` (every chunk text the live
+        indexes use), dropping embeddings of edited or removed text.
+        Returns {"rows_before", "rows", "bytes"}.
+        """
+        wanted = {text_key(t) for t in keep}
+        with self._lock, self._file_lock():
+            before = self._sync(trim=True)
+            kept = sorted((row, key) for key, row in self._rows.items() if key in wanted)
+            keys = [key for _, key in kept]
+            if kept:
+                vectors = np.ascontiguousarray(self._matrix()[[row for row, _ in kept]])
+            else:
+                vectors = np.empty((0, self.dimension), dtype="float32")
+            self._vectors = None  # drop the map before the file under it is replaced
+            for name, data in ((VECTORS_FILE, vectors.tobytes()), (KEYS_FILE, b"".join(keys))):
+                tmp = self.dir / f".{name}.tmp"
+                tmp.write_bytes(data)
+                os.replace(tmp, self.dir / name)
+            self._rows = {key: i for i, key in enumerate(keys)}
+            self._n_rows = len(keys)
+            self._files_id = self._current_files_id()
+            self.full = False
+        logger.info(f"Compacted embedding cache {self.dir}: {before} → {len(keys)} rows")
+        return {"rows_before": before, "rows": len(keys), "bytes": len(keys) * (self._row_bytes + KEY_BYTES)}
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "model": self.model,
+            "entries": self._n_rows,
+            "bytes": self._n_rows * (self._row_bytes + KEY_BYTES),
+            "max_rows": self.max_rows,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _complete_rows(self) -> int:
+        keys = self.dir / KEYS_FILE
+        vectors = self.dir / VECTORS_FILE
+        n_keys = keys.stat().st_size // KEY_BYTES if keys.exists() else 0
+        n_vectors = vectors.stat().st_size // self._row_bytes if vectors.exists() else 0
+        return min(n_keys, n_vectors)
+
+    def _current_files_id(self) -> tuple | None:
+        try:
+            st = os.stat(self.dir / KEYS_FILE)
+        except FileNotFoundError:
+            return None
+        return st.st_dev, st.st_ino
+
+    def _sync(self, trim: bool = False) -> int:
+        """Index rows appended since the last look. With trim (under the file lock), drop torn tails."""
+        files_id = self._current_files_id()
+        if files_id != self._files_id:  # compacted or cleared by another process: start over
+            self._rows, self._n_rows, self._vectors = {}, 0, None
+            self._files_id = files_id
+        n = self._complete_rows()
+        if n > self._n_rows:
+            with open(self.dir / KEYS_FILE, "rb") as f:
+                f.seek(self._n_rows * KEY_BYTES)
+                data = f.read((n - self._n_rows) * KEY_BYTES)
+            for i in range(n - self._n_rows):
+                self._rows.setdefault(data[i * KEY_BYTES:(i + 1) * KEY_BYTES], self._n_rows + i)
+            self._n_rows = n
+            self._vectors = None
+        if trim:
+            for name, row_bytes in ((KEYS_FILE, KEY_BYTES), (VECTORS_FILE, self._row_bytes)):
+                path = self.dir / name
+                if path.exists() and path.stat().st_size != n * row_bytes:
+                    with open(path, "r+b") as f:
+                        f.truncate(n * row_bytes)
+        return n
+
+    def _matrix(self) -> np.ndarray:
+        if self._vectors is None:
+            self._vectors = np.memmap(
+                self.dir / VECTORS_FILE, dtype="float32", mode="r", shape=(self._n_rows, self.dimension)
+            )
+        return self._vectors
+
+    def _file_lock(self, shared: bool = False):
+        return _FileLock(self.dir / ".lock", shared)
+
+    def _check_meta(self) -> None:
+        meta_path = self.dir / META_FILE
+        meta = {"model": self.model, "dimension": self.dimension}
+        if meta_path.exists():
+            saved = json.loads(meta_path.read_text())
+            if saved == meta:
+                return
+            logger.warning(f"Embedding cache {self.dir} was built for {saved} — starting it over")
+            with self._file_lock():
+                for name in (KEYS_FILE, VECTORS_FILE):
+                    (self.dir / name).unlink(missing_ok=True)
+        meta_path.write_text(json.dumps(meta))
+
+
+class _FileLock:
+    """Exclusive (or shared) advisory lock on a file (no-op where fcntl is unavailable)."""
+
+    def __init__(self, path: Path, shared: bool = False):
+        self.path = path
+        self.shared = shared
+        self._f = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._f = open(self.path, "a")
+            fcntl.flock(self._f, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._f is not None:
+            fcntl.flock(self._f, fcntl.LOCK_UN)
+            self._f.close()
+            self._f = None
+
+
+_caches: dict[tuple[str, str], PersistentEmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(indexes_dir: str | None = None) -> PersistentEmbeddingCache | None:
+    """
+    The process-wide cache for the configured model and directory, or None when
+    disabled. Without EMBEDDING_CACHE_DIR it lives under `indexes_dir`
+    (default: INDEXES_DIR).
+    """
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    root = settings.EMBEDDING_CACHE_DIR or str(Path(indexes_dir or settings.INDEXES_DIR) / "embedding_cache")
+    key = (root, settings.EMBEDDING_MODEL)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = PersistentEmbeddingCache(
+                Path(root), settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSION,
+                max_rows=settings.EMBEDDING_CACHE_MAX_ROWS,
+            )
+            _caches[key] = cache
+        return cache
@@ -3,11 +3,30 @@ app/ingestion/github_fetcher.py
 ────────────────────────────────
 GitHub API integration for Repo Intelligence Mode.
 Fetches README + relevant code files, returns chunks.
+Repeat fetches are incremental: only files whose Git blob SHA changed are downloaded.
+
+File contents come either from one repo tarball, extracted as it downloads
+(GITHUB_FETCH_MODE="tarball", the default; only the wanted files are kept in
+memory, never the archive), or from one /contents/{path} call per file
+("contents", capped at MAX_FILES_TO_FETCH).
+
+The HTTP client is long-lived and connection-pooled (HTTP/2 when the `h2`
+package is installed); the app lifespan owns it. File contents are fetched
+concurrently behind a semaphore, and all requests respect GitHub's
+X-RateLimit-Remaining / Retry-After headers.
 """
 
+import asyncio
 import httpx
 import base64
+import hashlib
+import io
 import logging
+import tarfile
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, BinaryIO
 from app.config import settings
 from app.ingestion.chunker import SmartChunker
 
@@ -16,18 +35,204 @@ logger = logging.getLogger(__name__)
 RELEVANT_EXTENSIONS = {".py", ".ts", ".js", ".go", ".md", ".yaml", ".yml", ".json", ".sh", ".tsx", ".jsx"}
 SKIP_DIRS = {"node_modules", ".git", "__pycache__", "dist", "build", ".next", "venv", "env", ".venv"}
 MAX_FILE_SIZE_BYTES = 80 * 1024  # 80 KB max per file
-MAX_FILES_TO_FETCH = 25
+MAX_FILES_TO_FETCH = 25  # per-file ("contents") mode only
 
+try:
+    import h2  # noqa: F401 — enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def is_relevant_file(path: str, size: int) -> bool:
+    """The RELEVANT_EXTENSIONS / SKIP_DIRS / MAX_FILE_SIZE_BYTES filter shared by both fetch modes."""
+    if any(skip in path.split("/") for skip in SKIP_DIRS):
+        return False
+    if not any(path.endswith(ext) for ext in RELEVANT_EXTENSIONS):
+        return False
+    return size <= MAX_FILE_SIZE_BYTES
+
+
+def git_blob_sha(content: bytes) -> str:
+    """The SHA Git (and the trees API) gives a file with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def extract_tarball(source: bytes | BinaryIO, wanted: set[str] | None = None) -> dict[str, bytes]:
+    """
+    Read files out of a GitHub repo tarball (bytes or a readable stream) in
+    one forward pass, without touching disk or seeking.
+    Paths lose the archive's "{owner}-{repo}-{sha}/" prefix. With `wanted`,
+    only those paths are read; otherwise every file passing is_relevant_file.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    files: dict[str, bytes] = {}
+    with tarfile.open(fileobj=source, mode="r|gz") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            _, _, path = member.name.partition("/")
+            if not path or member.size > MAX_FILE_SIZE_BYTES:
+                continue
+            if wanted is not None:
+                if path not in wanted:
+                    continue
+            elif not is_relevant_file(path, member.size):
+                continue
+            f = tar.extractfile(member)
+            if f is not None:
+                files[path] = f.read()
+            if wanted is not None and len(files) == len(wanted):
+                break  # nothing left to read — stop the download here
+    return files
+
+
+class TarballTooLarge(Exception):
+    """The archive passed GITHUB_TARBALL_MAX_BYTES while downloading."""
+
+
+class _BlockReader:
+    """
+    Blocking, read-only file view of an async byte stream, for tarfile's
+    stream mode in a worker thread: each read() waits on the event loop for
+    the next block of the response, so the download is paced by extraction
+    and stops at `max_bytes`.
+    """
+
+    BLOCK_TIMEOUT = 60.0  # seconds; httpx's own read timeout normally fires first
+
+    def __init__(self, blocks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop, max_bytes: int):
+        self._blocks = blocks
+        self._loop = loop
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._pending = b""
+
+    async def _next_block(self) -> bytes:
+        try:
+            return await self._blocks.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+    def read(self, n: int = -1) -> bytes:
+        while not self._pending:
+            block = asyncio.run_coroutine_threadsafe(self._next_block(), self._loop).result(self.BLOCK_TIMEOUT)
+            if not block:
+                return b""
+            self.size += len(block)
+            if self.size > self.max_bytes:
+                raise TarballTooLarge(f"over {self.max_bytes} bytes")
+            self._pending = block
+        if n < 0:
+            n = len(self._pending)
+        data, self._pending = self._pending[:n], self._pending[n:]
+        return data
+
+
+def github_headers() -> dict:
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    if settings.GITHUB_TOKEN:
+        headers["Authorization"] = f"token {settings.GITHUB_TOKEN}"
+    return headers
+
+
+def create_github_client(**kwargs) -> httpx.AsyncClient:
+    """Pooled client for api.github.com — create once (app lifespan) and share."""
+    kwargs.setdefault("headers", github_headers())
+    kwargs.setdefault("timeout", httpx.Timeout(20.0, connect=5.0))
+    kwargs.setdefault(
+        "limits",
+        httpx.Limits(
+            max_connections=settings.GITHUB_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.GITHUB_MAX_CONNECTIONS,
+        ),
+    )
+    kwargs.setdefault("http2", HTTP2_AVAILABLE)
+    kwargs.setdefault("follow_redirects", True)
+    return httpx.AsyncClient(**kwargs)
+
+
+class RateLimitExhausted(Exception):
+    """GitHub asked us to back off for longer than we are willing to wait."""
+
+
+class _RateLimitGate:
+    """Tracks GitHub's rate-limit headers and holds requests back while we're throttled."""
 
-class GitHubFetcher:
     def __init__(self):
-        self.headers = {
-            "Accept": "application/vnd.github.v3+json",
-        }
-        if settings.GITHUB_TOKEN:
-            self.headers["Authorization"] = f"token {settings.GITHUB_TOKEN}"
+        self.remaining: int | None = None
+        self.reset_at: float | None = None  # epoch seconds
+        self._paused_until = 0.0  # monotonic
+
+    async def wait(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def observe(self, r: httpx.Response) -> float | None:
+        """Record headers; returns how long to back off before retrying, or None if not throttled."""
+        remaining = r.headers.get("X-RateLimit-Remaining")
+        if remaining is not None and remaining.isdigit():
+            self.remaining = int(remaining)
+        reset = r.headers.get("X-RateLimit-Reset")
+        if reset is not None and reset.isdigit():
+            self.reset_at = float(reset)
+
+        if r.status_code not in (403, 429):
+            return None
+        retry_after = r.headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            backoff = float(retry_after)
+        elif self.remaining == 0 and self.reset_at is not None:
+            backoff = max(self.reset_at - time.time(), 0.0)
+        else:
+            return None  # a plain 403 (e.g. private repo) — not a throttle
+
+        self._paused_until = max(self._paused_until, time.monotonic() + backoff)
+        return backoff
+
+    @property
+    def low(self) -> bool:
+        return self.remaining is not None and self.remaining <= settings.GITHUB_RATE_LIMIT_RESERVE
+
+
+@dataclass
+class RepoUpdate:
+    """Result of fetch_repo_update — what to add to / remove from a repo index."""
+
+    state: dict = field(default_factory=dict)  # {"tree_sha", "etag", "files": {path: blob_sha}}
+    chunks: list[dict] = field(default_factory=list)  # chunks of new/changed files
+    changed_paths: set[str] = field(default_factory=set)  # files whose old chunks are replaced
+    removed_paths: set[str] = field(default_factory=set)  # files gone from the repo
+    unchanged: bool = False
+
+    @property
+    def stale_paths(self) -> set[str]:
+        return self.changed_paths | self.removed_paths
+
+
+class GitHubFetcher:
+    def __init__(self, client: httpx.AsyncClient | None = None):
+        self.headers = github_headers()
         self.base = "https://api.github.com"
         self.chunker = SmartChunker()
+        self._client = client  # shared pooled client, owned (and closed) by the app lifespan
+        self._gate = _RateLimitGate()
+
+    @asynccontextmanager
+    async def _client_context(self):
+        # Without a shared client (scripts, tests) fall back to a short-lived one
+        if self._client is not None:
+            yield self._client
+        else:
+            async with create_github_client(headers=self.headers) as client:
+                yield client
+
+    @property
+    def quota_low(self) -> bool:
+        """True once GitHub's remaining rate limit is down to GITHUB_RATE_LIMIT_RESERVE."""
+        return self._gate.low
 
     async def fetch_repo_chunks(self, repo_slug: str) -> list[dict]:
         """
@@ -35,95 +240,225 @@ class GitHubFetcher:
         repo_slug: "username/repo-name"
         Returns list of chunk dicts with text + source metadata.
         """
-        logger.info(f"Fetching GitHub repo: {repo_slug}")
-        chunks = []
+        update = await self.fetch_repo_update(repo_slug)
+        return update.chunks
+
+    async def fetch_repo_update(self, repo_slug: str, previous: dict | None = None) -> RepoUpdate:
+        """
+        Fetch what changed in a repo since `previous` (a RepoUpdate.state from an earlier fetch).
+
+        The tree is requested with If-None-Match, so an unchanged repo costs one
+        conditional request (which GitHub doesn't count against the rate limit).
+        Otherwise only files whose blob SHA differs are downloaded and chunked.
+        With previous=None every selected file counts as changed.
+        """
+        logger.info(f"Fetching GitHub repo: {repo_slug}" + (" (incremental)" if previous else ""))
+        started = time.perf_counter()
+        previous_files: dict[str, str] = (previous or {}).get("files", {})
+        update = RepoUpdate(state=dict(previous or {}))
 
         try:
-            async with httpx.AsyncClient(headers=self.headers, timeout=20.0) as client:
-                # 1. README — highest priority
-                readme = await self._fetch_readme(client, repo_slug)
-                if readme:
-                    readme_chunks = self.chunker.chunk_markdown(readme, f"github/{repo_slug}/README.md")
-                    chunks.extend(readme_chunks)
-                    logger.info(f"README: {len(readme_chunks)} chunks")
-
-                # 2. File tree
-                tree = await self._fetch_tree(client, repo_slug)
-                relevant_files = self._filter_files(tree)
-                logger.info(f"Relevant files found: {len(relevant_files)}")
-
-                # 3. Fetch file contents
-                fetched = 0
-                for file_path in relevant_files[:MAX_FILES_TO_FETCH]:
-                    if file_path.lower().endswith(".md"):
-                        continue  # Already got README, skip other md for now
-                    content = await self._fetch_file(client, repo_slug, file_path)
-                    if content:
-                        ext = "." + file_path.rsplit(".", 1)[-1] if "." in file_path else ""
-                        file_chunks = self.chunker.chunk_code(
-                            content,
-                            source=f"github/{repo_slug}/{file_path}",
-                            language=ext.lstrip("."),
-                        )
-                        chunks.extend(file_chunks)
-                        fetched += 1
-
-                logger.info(f"Repo {repo_slug}: {fetched} files → {len(chunks)} total chunks")
+            async with self._client_context() as client:
+                # 1. File tree (conditional) — blob SHAs tell us what changed
+                tree_url = f"{self.base}/repos/{repo_slug}/git/trees/HEAD?recursive=1"
+                headers = {"If-None-Match": previous["etag"]} if previous and previous.get("etag") else None
+                r = await self._get(client, tree_url, headers=headers)
+                if r.status_code == 304:
+                    update.unchanged = True
+                    logger.info(f"Repo {repo_slug}: unchanged (304)")
+                    return update
+                if r.status_code != 200:
+                    if previous:
+                        update.unchanged = True  # keep serving the existing index
+                        return update
+                    # No tree (empty repo, API error) — README-only, as before
+                    readme = await self._fetch_readme(client, repo_slug)
+                    if readme:
+                        update.chunks = self.chunker.chunk_markdown(readme, f"github/{repo_slug}/README.md")
+                    return update
+
+                data = r.json()
+                update.state = {"tree_sha": data.get("sha", ""), "etag": r.headers.get("ETag", ""), "files": {}}
+                if previous and update.state["tree_sha"] == previous.get("tree_sha"):
+                    update.state["files"] = dict(previous_files)
+                    update.unchanged = True
+                    return update
+
+                # 2. Diff blob SHAs against the previous fetch
+                use_tarball = settings.GITHUB_FETCH_MODE == "tarball"
+                limit = settings.GITHUB_TARBALL_MAX_FILES if use_tarball else MAX_FILES_TO_FETCH
+                selected = self._select_files(data.get("tree", []), limit)
+                logger.info(f"Relevant files found: {len(selected)}")
+                changed = [p for p, sha in selected.items() if previous_files.get(p) != sha]
+                update.removed_paths = set(previous_files) - set(selected)
+
+                # 3a. One archive request instead of one call per file
+                archived: dict[str, str] = {}
+                per_file = set(changed)
+                if use_tarball and len(changed) > 1:
+                    files = await self._fetch_tarball_files(client, repo_slug, per_file)
+                    if files is None:
+                        per_file = set(changed[:MAX_FILES_TO_FETCH + 1])  # fallback keeps the old cap
+                    else:
+                        for file_path, content in files.items():
+                            # Hash what we got — the archive may be a newer commit than the tree
+                            selected[file_path] = git_blob_sha(content)
+                            archived[file_path] = content.decode("utf-8", errors="ignore")
+
+                # 3b. Fetch remaining changed contents concurrently (bounded), keep tree order
+                semaphore = asyncio.Semaphore(settings.GITHUB_FETCH_CONCURRENCY)
+                first = next(iter(selected), "")
+                readme_path = first if self._is_root_readme(first) else None  # fetched even when quota is low
+
+                async def fetch_one(file_path: str) -> str | None:
+                    async with semaphore:
+                        if file_path in archived:
+                            return archived[file_path]
+                        if file_path not in per_file:
+                            return None  # picked up by a later refresh
+                        if self._gate.low and file_path != readme_path:
+                            return None  # keep the remaining quota for chat-time requests
+                        return await self._fetch_file(client, repo_slug, file_path)
+
+                contents = await asyncio.gather(*(fetch_one(p) for p in changed))
+
+                for file_path, content in zip(changed, contents):
+                    if content is None:
+                        # Keep the old version (if any) and retry this file next time
+                        if file_path in previous_files:
+                            update.state["files"][file_path] = previous_files[file_path]
+                        continue
+                    update.chunks.extend(self._chunk_file(repo_slug, file_path, content))
+                    update.changed_paths.add(file_path)
+                    update.state["files"][file_path] = selected[file_path]
+                for file_path, sha in selected.items():
+                    if file_path not in changed:
+                        update.state["files"][file_path] = sha
+
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Repo {repo_slug}: {len(update.changed_paths)}/{len(changed)} changed files fetched, "
+                    f"{len(update.removed_paths)} removed → {len(update.chunks)} new chunks "
+                    f"in {elapsed:.2f}s (rate limit remaining: {self._gate.remaining})"
+                )
 
         except httpx.TimeoutException:
             logger.warning(f"GitHub fetch timeout for {repo_slug}")
+        except RateLimitExhausted as e:
+            logger.warning(f"GitHub rate limit for {repo_slug}: {e}")
         except Exception as e:
             logger.error(f"GitHub fetch failed for {repo_slug}: {e}")
+        else:
+            return update
+
+        if previous:
+            # Never apply a half-finished diff — keep the existing index as is
+            return RepoUpdate(state=dict(previous), unchanged=True)
+        return update
+
+    def _chunk_file(self, repo_slug: str, file_path: str, content: str) -> list[dict]:
+        source = f"github/{repo_slug}/{file_path}"
+        if file_path.lower().endswith(".md"):
+            return self.chunker.chunk_markdown(content, source)
+        ext = "." + file_path.rsplit(".", 1)[-1] if "." in file_path else ""
+        return self.chunker.chunk_code(content, source=source, language=ext.lstrip("."))
+
+    @staticmethod
+    def _is_root_readme(path: str) -> bool:
+        return "/" not in path and path.lower().startswith("readme")
 
-        return chunks
+    def _select_files(self, tree: list[dict], limit: int = MAX_FILES_TO_FETCH) -> dict[str, str]:
+        """path → blob SHA for the files we index: root README first, then up to `limit` others."""
+        readmes = [
+            item for item in tree
+            if item.get("type") == "blob" and self._is_root_readme(item.get("path", ""))
+        ]
+        readmes.sort(key=lambda item: item["path"].lower() != "readme.md")
+        selected = {readmes[0]["path"]: readmes[0].get("sha", "")} if readmes else {}
+
+        shas = {item.get("path"): item.get("sha", "") for item in tree}
+        others = [
+            p for p in self._filter_files(tree)
+            if not p.lower().endswith(".md")  # README covers the docs; skip other md for now
+        ]
+        for path in others[:limit]:
+            selected[path] = shas[path]
+        return selected
+
+    async def _get(self, client: httpx.AsyncClient, url: str, headers: dict | None = None) -> httpx.Response:
+        """GET honoring rate-limit headers: waits out short Retry-After/reset windows and retries."""
+        for attempt in range(settings.GITHUB_MAX_RETRIES + 1):
+            await self._gate.wait()
+            r = await client.get(url, headers=headers)
+            backoff = self._gate.observe(r)
+            if backoff is None:
+                return r
+            if backoff > settings.GITHUB_MAX_BACKOFF_SECONDS or attempt == settings.GITHUB_MAX_RETRIES:
+                raise RateLimitExhausted(f"throttled for {backoff:.0f}s")
+            logger.info(f"GitHub throttled — retrying in {backoff:.1f}s")
+        return r
+
+    async def _fetch_tarball_files(
+        self, client: httpx.AsyncClient, repo_slug: str, wanted: set[str]
+    ) -> dict[str, bytes] | None:
+        """Extract `wanted` from the repo tarball as it streams in; None if the archive is unavailable or too big."""
+        url = f"{self.base}/repos/{repo_slug}/tarball"
+        started = time.perf_counter()
+        try:
+            await self._gate.wait()
+            async with client.stream("GET", url) as r:
+                self._gate.observe(r)
+                if r.status_code != 200:
+                    logger.info(f"Tarball unavailable for {repo_slug} ({r.status_code}) — fetching per file")
+                    return None
+                loop = asyncio.get_running_loop()
+                reader = _BlockReader(r.aiter_bytes(), loop, settings.GITHUB_TARBALL_MAX_BYTES)
+                files = await loop.run_in_executor(None, extract_tarball, reader, wanted)
+        except TarballTooLarge:
+            logger.info(f"Tarball for {repo_slug} exceeds {settings.GITHUB_TARBALL_MAX_BYTES} bytes — fetching per file")
+            return None
+        except (httpx.HTTPError, tarfile.TarError, TimeoutError) as e:
+            logger.warning(f"Tarball fetch failed for {repo_slug}: {e}")
+            return None
+        logger.info(
+            f"Tarball {repo_slug}: {reader.size / 1024:.0f} KB, {len(files)}/{len(wanted)} files "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        return files
 
     async def _fetch_readme(self, client: httpx.AsyncClient, repo_slug: str) -> str | None:
         try:
-            r = await client.get(f"{self.base}/repos/{repo_slug}/readme")
+            r = await self._get(client, f"{self.base}/repos/{repo_slug}/readme")
             if r.status_code == 200:
                 data = r.json()
                 return base64.b64decode(data["content"]).decode("utf-8", errors="ignore")
+        except RateLimitExhausted:
+            raise
         except Exception:
             pass
         return None
 
-    async def _fetch_tree(self, client: httpx.AsyncClient, repo_slug: str) -> list[dict]:
-        try:
-            r = await client.get(f"{self.base}/repos/{repo_slug}/git/trees/HEAD?recursive=1")
-            if r.status_code == 200:
-                return r.json().get("tree", [])
-        except Exception:
-            pass
-        return []
-
     def _filter_files(self, tree: list[dict]) -> list[str]:
         result = []
         for item in tree:
             if item.get("type") != "blob":
                 continue
             path = item.get("path", "")
-            size = item.get("size", 0)
-            # Skip if in a skip directory
-            if any(skip in path.split("/") for skip in SKIP_DIRS):
-                continue
-            # Check extension
-            if not any(path.endswith(ext) for ext in RELEVANT_EXTENSIONS):
-                continue
-            # Size check
-            if size > MAX_FILE_SIZE_BYTES:
-                continue
-            result.append(path)
+            if is_relevant_file(path, item.get("size", 0)):
+                result.append(path)
         # Sort: put main files first, then by depth
         result.sort(key=lambda p: (p.count("/"), p))
         return result
 
     async def _fetch_file(self, client: httpx.AsyncClient, repo_slug: str, file_path: str) -> str | None:
         try:
-            r = await client.get(f"{self.base}/repos/{repo_slug}/contents/{file_path}")
+            r = await self._get(client, f"{self.base}/repos/{repo_slug}/contents/{file_path}")
             if r.status_code == 200:
                 data = r.json()
                 if isinstance(data, dict) and "content" in data:
                     return base64.b64decode(data["content"]).decode("utf-8", errors="ignore")
+        except RateLimitExhausted:
+            return None  # skip this file; what we already have is still useful
         except Exception:
             pass
         return None
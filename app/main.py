@@ -4,27 +4,29 @@ app/main.py
 VenkatGPT — FastAPI Application Entry Point
 
 Startup sequence:
-1. Load portfolio.json
-2. Load FAISS indexes (build if missing)
-3. Initialize RAG engine
-4. Mount all routers
+1. Create the shared GitHub HTTP client and Redis pool
+2. Load portfolio.json + FAISS indexes (build if missing or stale)
+3. Initialize RAG engine — 2 and 3 form one snapshot that hot reload swaps
+4. Start the hot-reload file watcher (optional)
+5. Start the background repo-index warm-up (optional)
+6. Mount all routers
 
 Run locally:
     uvicorn app.main:app --reload --port 8000
 """
 
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 
 from app.config import settings
-from app.api import chat, resume, projects, health
-from app.vectorstore.index_manager import IndexManager
-from app.ingestion.portfolio_loader import PortfolioLoader
-from app.ingestion.resume_loader import ResumeLoader
-from app.core.rag_engine import RAGEngine
+from app.api import chat, resume, projects, health, admin
+from app.ingestion.github_fetcher import GitHubFetcher, create_github_client
+from app.core.reloader import Reloader, install_snapshot, load_snapshot
+from app.utils.redis_pool import create_redis_pool, set_redis_pool
+from app.utils.compression import CompressionMiddleware
 from app.utils.logger import setup_logging
 
 # Setup structured logging
@@ -38,39 +40,37 @@ async def lifespan(app: FastAPI):
 
     logger.info("═══ VenkatGPT Starting ═══")
 
-    # ── Load Portfolio ─────────────────────────────────────────────────
-    logger.info("Loading portfolio.json...")
-    portfolio_loader = PortfolioLoader()
-    portfolio = portfolio_loader.load(settings.PORTFOLIO_JSON_PATH)
-    app.state.portfolio = portfolio
-    logger.info(f"Portfolio loaded: {len(portfolio.get('projects', []))} projects, "
-                f"{len(portfolio.get('certifications', []))} certs")
-
-    # ── Load / Build Indexes ───────────────────────────────────────────
-    logger.info("Loading FAISS indexes...")
-    index_manager = IndexManager()
-
-    # Check if portfolio index exists; build if not
-    import os
-    portfolio_index_path = os.path.join(settings.INDEXES_DIR, "portfolio", "index.faiss")
-    if not os.path.exists(portfolio_index_path):
-        logger.info("Portfolio index not found — building now (first run)...")
-        portfolio_chunks = portfolio_loader.build_chunks(portfolio)
-        index_manager.build_portfolio_index(portfolio_chunks)
-
-        resume_loader = ResumeLoader()
-        resume_chunks = resume_loader.load_and_chunk(settings.RESUME_PDF_PATH)
-        index_manager.build_resume_index(resume_chunks)
-        logger.info("Indexes built successfully.")
-    else:
-        index_manager.load_all()
-
-    app.state.index_manager = index_manager
-
-    # ── Initialize RAG Engine ──────────────────────────────────────────
-    app.state.rag_engine = RAGEngine(index_manager, portfolio)
+    # ── Shared GitHub client (connection pool lives for the app) ───────
+    github_client = create_github_client()
+    app.state.github_client = github_client
+    github = GitHubFetcher(client=github_client)
+
+    # ── Shared Redis pool (rate limiting; None → per-process fallbacks) ─
+    redis_pool = create_redis_pool()
+    if redis_pool is not None:
+        await redis_pool.ping()  # unreachable is logged, not fatal
+    app.state.redis = redis_pool
+    set_redis_pool(redis_pool)
+
+    # ── Portfolio + indexes + RAG engine (one swappable snapshot) ──────
+    logger.info("Loading portfolio and FAISS indexes...")
+    snapshot = load_snapshot(github)
+    install_snapshot(app, snapshot)
+    rag_engine = snapshot.rag_engine
+    index_manager = snapshot.index_manager
     logger.info("RAG engine initialized.")
 
+    # ── Hot reload (admin endpoint + optional file watcher) ───────────
+    reloader = Reloader(app, github)
+    app.state.reloader = reloader
+    watch_task = None
+    if settings.RELOAD_WATCH_INTERVAL > 0:
+        watch_task = asyncio.create_task(reloader.watch(settings.RELOAD_WATCH_INTERVAL))
+
+    # ── Repo Intelligence warm-up (background, doesn't block readiness;
+    #    the reloader restarts it on each new engine) ─────────────────────
+    reloader.start_warmup(rag_engine)
+
     logger.info("═══ VenkatGPT Ready ═══")
     logger.info(f"Portfolio vectors: {index_manager.portfolio_index.size}")
     logger.info(f"Resume vectors:    {index_manager.resume_index.size}")
@@ -79,6 +79,16 @@ async def lifespan(app: FastAPI):
 
     # ── Shutdown ───────────────────────────────────────────────────────
     logger.info("VenkatGPT shutting down...")
+    if watch_task is not None:
+        watch_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await watch_task
+    await reloader.aclose()  # also stops the repo warm-up
+    await github_client.aclose()
+    set_redis_pool(None)
+    if redis_pool is not None:
+        await redis_pool.aclose()
+    app.state.rag_engine.close()
 
 
 # ── Create App ─────────────────────────────────────────────────────────
@@ -99,12 +109,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-app.add_middleware(GZipMiddleware, minimum_size=500)
+app.add_middleware(CompressionMiddleware)  # skips SSE; JSON/text only
 
 # ── Routers ────────────────────────────────────────────────────────────
 app.include_router(chat.router,     prefix="/api/v1", tags=["Chat"])
 app.include_router(resume.router,   prefix="/api/v1", tags=["Resume"])
 app.include_router(projects.router, prefix="/api/v1", tags=["Projects"])
+app.include_router(admin.router,    prefix="/api/v1", tags=["Admin"])
 app.include_router(health.router,                      tags=["Health"])
 
 
@@ -1,31 +1,99 @@
 """
 app/security/rate_limiter.py
 ─────────────────────────────
-Redis-based sliding window rate limiter.
-Falls back gracefully if Redis is unavailable.
+Redis-based sliding window rate limiter (on the app's shared Redis pool).
+
+- Sliding window log: one sorted set per client (member per request, scored
+  by the Redis server clock, so worker clock skew doesn't matter), trimmed,
+  counted and appended by a Lua script — a single atomic EVALSHA round trip,
+  and the key always carries an expiry.
+- Leases: when a client is sending a burst (its previous request here was
+  within RATE_LIMIT_LEASE_TTL) and has plenty of quota left, the script
+  reserves a few extra slots that this process serves without a Redis round
+  trip. Slots still unused after RATE_LIMIT_LEASE_TTL are removed again, so
+  the limit is unchanged; a leased slot only records its request up to
+  RATE_LIMIT_LEASE_TTL early.
+- Fallback: if Redis is missing or failing, an in-process token bucket with
+  the same rate keeps limiting (per worker) instead of letting everything
+  through. Redis is retried after RATE_LIMIT_REDIS_RETRY seconds.
 """
 
+import asyncio
 import logging
+import math
+import time
+import uuid
 from fastapi import HTTPException
 from app.config import settings
+from app.utils.redis_pool import get_redis_pool
 
 logger = logging.getLogger(__name__)
 
-# Try to import redis — graceful fallback for dev without Redis
-try:
-    import redis.asyncio as redis
-    _redis_client = None
+# KEYS[1] sorted set; ARGV: window_ms, limit, request id, max lease
+# Returns {allowed, remaining, retry_after_ms, leased}; leased slots are "<id>:1".."<id>:<leased>"
+SLIDING_WINDOW_LUA = """
+if redis.replicate_commands then redis.replicate_commands() end  -- TIME before writes (Redis < 5)
+local key = KEYS[1]
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local lease_max = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+local count = redis.call('ZCARD', key)
+if count >= limit then
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    local retry = window
+    if oldest[2] then
+        retry = tonumber(oldest[2]) + window - now
+    end
+    return {0, 0, retry, 0}
+end
+
+local spare = limit - count - 1
+local lease = math.min(lease_max, math.floor(spare / 4))
+for i = 0, lease do
+    redis.call('ZADD', key, now, ARGV[3] .. ':' .. i)
+end
+redis.call('PEXPIRE', key, window)
+return {1, spare - lease, 0, lease}
+"""
+
+# KEYS[1] sorted set; ARGV: unused leased members to give back
+RELEASE_LUA = """
+return redis.call('ZREM', KEYS[1], unpack(ARGV))
+"""
+
+
+class TokenBucket:
+    """In-process limiter: `capacity` requests, refilled continuously over `window` seconds."""
+
+    MAX_KEYS = 10_000
 
-    async def _get_redis():
-        global _redis_client
-        if _redis_client is None:
-            _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-        return _redis_client
+    def __init__(self, capacity: int, window: float):
+        self.capacity = capacity
+        self.rate = capacity / window  # tokens per second
+        self._buckets: dict[str, tuple[float, float]] = {}  # key → (tokens, updated_at)
 
-    REDIS_AVAILABLE = True
-except ImportError:
-    REDIS_AVAILABLE = False
-    logger.warning("Redis not available — rate limiting disabled.")
+    def acquire(self, key: str, now: float | None = None) -> tuple[bool, float]:
+        """(allowed, seconds until a token is available)."""
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            self._store(key, tokens - 1, now)
+            return True, 0.0
+        self._store(key, tokens, now)
+        return False, (1 - tokens) / self.rate
+
+    def _store(self, key: str, tokens: float, now: float) -> None:
+        if key not in self._buckets and len(self._buckets) >= self.MAX_KEYS:
+            # Forget clients whose bucket has refilled — they'd start full anyway
+            full = [k for k, (t, u) in self._buckets.items() if t + (now - u) * self.rate >= self.capacity]
+            for k in full:
+                del self._buckets[k]
+        self._buckets[key] = (tokens, now)
 
 
 class RateLimiter:
@@ -33,36 +101,110 @@ class RateLimiter:
         self,
         max_requests: int = None,
         window_seconds: int = None,
+        redis_client=None,
     ):
         self.max_requests = max_requests or settings.RATE_LIMIT_REQUESTS
         self.window = window_seconds or settings.RATE_LIMIT_WINDOW
+        self._redis = redis_client  # injected (tests), else the app's shared pool
+        self._scripts = None  # (sliding window, release) registered on _script_client
+        self._script_client = None
+        self._leases: dict[str, list[str]] = {}  # identifier → unused leased members
+        self._last_seen: dict[str, float] = {}  # identifier → last request here (monotonic)
+        self._releases: set[asyncio.Task] = set()
+        self._fallback = TokenBucket(self.max_requests, self.window)
+        self._redis_retry_at = 0.0
 
     async def check(self, identifier: str) -> None:
         """
         Check rate limit for identifier (IP address or API key).
         Raises HTTP 429 if limit exceeded.
         """
-        if not REDIS_AVAILABLE:
-            return  # Skip if Redis not configured
+        allowed, retry_after = await self.acquire(identifier)
+        if not allowed:
+            logger.warning(f"Rate limit exceeded for {identifier}")
+            raise HTTPException(
+                status_code=429,
+                detail=(
+                    f"Too many requests. You can send {self.max_requests} "
+                    f"messages per {self.window} seconds."
+                ),
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    async def acquire(self, identifier: str) -> tuple[bool, float]:
+        """(allowed, retry-after seconds) — takes one slot if allowed."""
+        now = time.monotonic()
+        lease = self._leases.get(identifier)
+        if lease:
+            lease.pop()
+            if not lease:
+                del self._leases[identifier]
+            return True, 0.0
 
+        scripts = self._redis_scripts(now)
+        if scripts is None:
+            return self._fallback.acquire(identifier, now)
+        last_seen = self._last_seen.get(identifier)
+        bursting = last_seen is not None and now - last_seen < settings.RATE_LIMIT_LEASE_TTL
+        self._remember(identifier, now)
+        key = f"venkatgpt:rl:{identifier}"
+        request_id = uuid.uuid4().hex
         try:
-            r = await _get_redis()
-            key = f"venkatgpt:rl:{identifier}"
-            count = await r.incr(key)
-            if count == 1:
-                await r.expire(key, self.window)
-            if count > self.max_requests:
-                logger.warning(f"Rate limit exceeded for {identifier}")
-                raise HTTPException(
-                    status_code=429,
-                    detail=(
-                        f"Too many requests. You can send {self.max_requests} "
-                        f"messages per {self.window} seconds."
-                    ),
-                    headers={"Retry-After": str(self.window)},
-                )
-        except HTTPException:
-            raise
+            allowed, _, retry_ms, leased = await scripts[0](
+                keys=[key],
+                args=[
+                    self.window * 1000,
+                    self.max_requests,
+                    request_id,
+                    settings.RATE_LIMIT_LEASE_MAX if bursting else 0,
+                ],
+            )
         except Exception as e:
-            # Don't block requests if Redis has issues
-            logger.warning(f"Rate limiter Redis error: {e}")
+            # Keep limiting locally; don't pay a Redis timeout on every request meanwhile
+            logger.warning(f"Rate limiter Redis error ({e}) — local limiting for {settings.RATE_LIMIT_REDIS_RETRY}s")
+            self._redis_retry_at = now + settings.RATE_LIMIT_REDIS_RETRY
+            return self._fallback.acquire(identifier, now)
+
+        if int(leased) > 0:
+            lease = [f"{request_id}:{i}" for i in range(1, int(leased) + 1)]
+            self._leases[identifier] = lease
+            asyncio.get_running_loop().call_later(
+                settings.RATE_LIMIT_LEASE_TTL, self._expire_lease, identifier, lease, key, scripts[1],
+            )
+        return bool(int(allowed)), int(retry_ms) / 1000
+
+    def _expire_lease(self, identifier: str, lease: list[str], key: str, release) -> None:
+        """Give unused leased slots back, so a lease never counts against the client."""
+        if self._leases.get(identifier) is lease:
+            del self._leases[identifier]
+        if not lease:
+            return
+        task = asyncio.create_task(self._release(release, key, list(lease)))
+        lease.clear()
+        self._releases.add(task)
+        task.add_done_callback(self._releases.discard)
+
+    async def _release(self, release, key: str, members: list[str]) -> None:
+        try:
+            await release(keys=[key], args=members)
+        except Exception as e:
+            logger.warning(f"Rate limiter could not release {len(members)} leased slots ({e})")
+
+    def _redis_scripts(self, now: float):
+        """The registered Lua scripts (EVALSHA, re-loaded on NOSCRIPT), or None while Redis is unusable."""
+        if now < self._redis_retry_at:
+            return None
+        client = self._redis or get_redis_pool()
+        if client is None:
+            return None
+        if client is not self._script_client:
+            self._scripts = (client.register_script(SLIDING_WINDOW_LUA), client.register_script(RELEASE_LUA))
+            self._script_client = client
+        return self._scripts
+
+    def _remember(self, identifier: str, now: float) -> None:
+        if identifier not in self._last_seen and len(self._last_seen) >= TokenBucket.MAX_KEYS:
+            cutoff = now - settings.RATE_LIMIT_LEASE_TTL
+            for key in [k for k, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[key]
+        self._last_seen[identifier] = now
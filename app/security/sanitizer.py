@@ -2,38 +2,196 @@
 app/security/sanitizer.py
 ──────────────────────────
 Input sanitization + prompt injection defense.
+
+Injection rules (name, regex, literals) live in SANITIZER_RULES_PATH and are
+hot-reloaded when the file changes. A literal prefilter (plain substring
+checks for the words each rule needs) picks the candidate rules; clean queries
+usually have none and skip regex work entirely. The candidates are compiled
+into one alternation of named groups, so a single search reports which rule
+fired. Non-ASCII text skips the prefilter (the regexes fold characters like ı
+and ſ that str.lower() doesn't). Rules with nested unbounded quantifiers (the
+catastrophic-backtracking shape) or backreferences are rejected at load.
 """
 
-import re
+import json
 import logging
+import re
+import time
+from pathlib import Path
+from app.config import settings
+
+try:
+    import re._parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
 
 logger = logging.getLogger(__name__)
 
 MAX_QUERY_LENGTH = 2000
 
-# Prompt injection attack patterns
-INJECTION_PATTERNS = [
-    r"ignore\s+(all\s+)?(previous|above|your)\s+instructions",
-    r"forget\s+(everything|what\s+i\s+said|your\s+(system|prompt))",
-    r"you\s+are\s+now\s+(a|an)\s+",
-    r"new\s+(persona|role|identity|instructions|system\s+prompt)",
-    r"act\s+as\s+(a|an)\s+(?!venkat)",  # Allow "act as venkat"
-    r"(reveal|show|print|output|display)\s+(your\s+)?(system\s+)?prompt",
-    r"<\s*(system|user|assistant)\s*>",  # XML injection
-    r"\[INST\]|<<SYS>>",  # LLaMA-style tokens
-    r"\\n\s*(system|user|assistant)\s*:",  # Delimiter injection
-    r"disregard\s+(all\s+)?(previous|prior)\s+(instructions|messages)",
-    r"pretend\s+(you\s+are|to\s+be)\s+(?!venkat)",
-    r"jailbreak",
-    r"DAN\s+mode",
-    r"do\s+anything\s+now",
+BLOCKED_MESSAGE = (
+    "I noticed something unusual in your message. "
+    "Please ask a straightforward question about my professional background!"
+)
+
+# Built-in prompt injection rules — used until / unless the rules file loads
+DEFAULT_RULES = [
+    {"name": "ignore_instructions", "pattern": r"ignore\s+(all\s+)?(previous|above|your)\s+instructions", "literals": ["ignore"]},
+    {"name": "forget_context", "pattern": r"forget\s+(everything|what\s+i\s+said|your\s+(system|prompt))", "literals": ["forget"]},
+    {"name": "you_are_now", "pattern": r"you\s+are\s+now\s+(a|an)\s+", "literals": ["now"]},
+    {"name": "new_persona", "pattern": r"new\s+(persona|role|identity|instructions|system\s+prompt)", "literals": ["persona", "role", "identity", "instructions", "system"]},
+    {"name": "act_as", "pattern": r"act\s+as\s+(a|an)\s+(?!venkat)", "literals": ["act"]},  # Allow "act as venkat"
+    {"name": "reveal_prompt", "pattern": r"(reveal|show|print|output|display)\s+(your\s+)?(system\s+)?prompt", "literals": ["prompt"]},
+    {"name": "role_tag", "pattern": r"<\s*(system|user|assistant)\s*>", "literals": ["<"]},  # XML injection
+    {"name": "llama_tokens", "pattern": r"\[INST\]|<<SYS>>", "literals": ["[inst]", "<<sys>>"]},  # LLaMA-style tokens
+    {"name": "role_delimiter", "pattern": r"\\n\s*(system|user|assistant)\s*:", "literals": ["\\n"]},  # Delimiter injection
+    {"name": "disregard_instructions", "pattern": r"disregard\s+(all\s+)?(previous|prior)\s+(instructions|messages)", "literals": ["disregard"]},
+    {"name": "pretend", "pattern": r"pretend\s+(you\s+are|to\s+be)\s+(?!venkat)", "literals": ["pretend"]},
+    {"name": "jailbreak", "pattern": r"jailbreak", "literals": ["jailbreak"]},
+    {"name": "dan_mode", "pattern": r"DAN\s+mode", "literals": ["mode"]},
+    {"name": "do_anything_now", "pattern": r"do\s+anything\s+now", "literals": ["anything"]},
 ]
 
-# Compiled patterns for performance
-_COMPILED_PATTERNS = [re.compile(p, re.IGNORECASE | re.DOTALL) for p in INJECTION_PATTERNS]
+# Null bytes and control characters (newlines and tabs kept) — removed by one str.translate pass
+_CONTROL_CHARS = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+_SPACE_RUN_RE = re.compile(r" {3,}")
+
+
+class UnsafeRuleError(ValueError):
+    """A rule whose pattern can't safely be combined or could backtrack catastrophically."""
+
+
+def check_rule_pattern(pattern: str) -> None:
+    """Reject nested unbounded quantifiers like (a+)+ or (\\s*x)* and backreferences."""
+    _check_nodes(_sre_parse.parse(pattern), outer=0, pattern=pattern)
+
+
+def _check_nodes(nodes, outer: int, pattern: str) -> None:
+    for op, av in nodes:
+        if op in (_sre_parse.GROUPREF, _sre_parse.GROUPREF_EXISTS):
+            raise UnsafeRuleError(f"backreferences are not supported: {pattern!r}")
+        inner = outer
+        if op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT):
+            hi = av[1]
+            if outer > 1 and hi > 1 and _sre_parse.MAXREPEAT in (outer, hi):
+                raise UnsafeRuleError(f"nested unbounded quantifier: {pattern!r}")
+            inner = max(outer, hi)
+        for sub in _subpatterns(av):
+            _check_nodes(sub, inner, pattern)
+
+
+def _subpatterns(av):
+    if isinstance(av, _sre_parse.SubPattern):
+        yield av
+    elif isinstance(av, (tuple, list)):
+        for item in av:
+            yield from _subpatterns(item)
+
+
+class RuleSet:
+    def __init__(self, rules: list[dict], source: str = "builtin"):
+        self.source = source
+        self.names: list[str] = []
+        self._patterns: list[str] = []
+        self._literals: dict[str, list[int]] = {}  # literal → rules that need it
+        self._unfiltered: list[int] = []  # rules without literals always run
+        for i, rule in enumerate(rules):
+            name, pattern = rule["name"], rule["pattern"]
+            re.compile(pattern)  # report a broken rule by itself, not as part of the alternation
+            check_rule_pattern(pattern)
+            self.names.append(name)
+            self._patterns.append(pattern)
+            if rule.get("literals"):
+                for lit in rule["literals"]:
+                    self._literals.setdefault(lit.lower(), []).append(i)
+            else:
+                self._unfiltered.append(i)
+        self._matchers: dict[tuple[int, ...], re.Pattern] = {}
+        self._all = tuple(range(len(rules)))
+        self._matcher(self._all)  # the full alternation must compile too
+
+    @classmethod
+    def from_file(cls, path: Path) -> "RuleSet":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(data["rules"], source=str(path))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def candidates(self, text: str) -> tuple[int, ...]:
+        """Rules whose literals occur in `text` (plain substring scans — much cheaper than any regex)."""
+        if not text.isascii():
+            # re.IGNORECASE also folds ı→i, ſ→s, K→k, İ→i, which str.lower() doesn't
+            # match up with — let the regexes decide for any non-ASCII text
+            return self._all
+        lowered = text.lower()
+        ids = set(self._unfiltered)
+        for lit, rule_ids in self._literals.items():
+            if lit in lowered:
+                ids.update(rule_ids)
+        return tuple(sorted(ids))
+
+    def match(self, text: str) -> str | None:
+        """Name of the matching rule (the leftmost match), or None."""
+        ids = self.candidates(text)
+        if not ids:
+            return None
+        m = self._matcher(ids).search(text)
+        return None if m is None else self.names[int(m.lastgroup[1:])]
+
+    def _matcher(self, ids: tuple[int, ...]) -> re.Pattern:
+        """One alternation of named groups (r<index>) over the given rules, compiled once per set."""
+        matcher = self._matchers.get(ids)
+        if matcher is None:
+            if len(self._matchers) >= 256:
+                self._matchers.clear()
+            alternation = "|".join(f"(?P<r{i}>{self._patterns[i]})" for i in ids)
+            matcher = re.compile(alternation, re.IGNORECASE | re.DOTALL)
+            self._matchers[ids] = matcher
+        return matcher
+
+
+_BUILTIN_RULES = RuleSet(DEFAULT_RULES)
 
 
 class InputSanitizer:
+    def __init__(self, rules_path: str | None = None, reload_interval: float | None = None):
+        self.rules_path = Path(rules_path or settings.SANITIZER_RULES_PATH)
+        self.reload_interval = (
+            settings.SANITIZER_RULES_RELOAD_INTERVAL if reload_interval is None else reload_interval
+        )
+        self.rules = _BUILTIN_RULES
+        self._mtime: int | None = None  # -1 while the file is missing
+        self._next_check = 0.0
+        self._maybe_reload()
+
+    def _maybe_reload(self) -> None:
+        """Pick up an edited rules file (at most one stat per reload_interval)."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            mtime = self.rules_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            if self._mtime != -1:  # log once, not on every check
+                logger.warning(f"Sanitizer rules file {self.rules_path} not found — using {self.rules.source} rules")
+            self._mtime = -1
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            self.rules = RuleSet.from_file(self.rules_path)
+            logger.info(f"Loaded {len(self.rules)} sanitizer rules from {self.rules_path}")
+        except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+            logger.error(f"Invalid sanitizer rules in {self.rules_path} ({e}) — keeping {self.rules.source} rules")
+
+    def check(self, text: str) -> str | None:
+        """Name of the injection rule `text` triggers, or None."""
+        self._maybe_reload()
+        return self.rules.match(text)
+
     def sanitize(self, query: str) -> tuple[str, str | None]:
         """
         Returns (sanitized_query, error_or_None).
@@ -43,22 +201,21 @@ class InputSanitizer:
         if len(query) > MAX_QUERY_LENGTH:
             return "", f"Please keep your question under {MAX_QUERY_LENGTH} characters."
 
+        # Strip control characters and normalize excessive whitespace (before
+        # detection, so "jail\x00break" can't slip past the rules)
+        cleaned = query.translate(_CONTROL_CHARS)
+        if "   " in cleaned:
+            cleaned = _SPACE_RUN_RE.sub("  ", cleaned)
+        cleaned = cleaned.strip()
+
         # Empty check
-        if not query.strip():
+        if not cleaned:
             return "", "Please ask a question."
 
         # Injection detection
-        for pattern in _COMPILED_PATTERNS:
-            if pattern.search(query):
-                logger.warning(f"Prompt injection attempt detected: {query[:100]}")
-                return "", (
-                    "I noticed something unusual in your message. "
-                    "Please ask a straightforward question about my professional background!"
-                )
-
-        # Strip null bytes and control characters (keep newlines/tabs)
-        cleaned = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]", "", query)
-        # Normalize excessive whitespace
-        cleaned = re.sub(r" {3,}", "  ", cleaned).strip()
+        rule = self.check(cleaned)
+        if rule is not None:
+            logger.warning(f"Prompt injection attempt detected ({rule}): {query[:100]}")
+            return "", BLOCKED_MESSAGE
 
         return cleaned, None
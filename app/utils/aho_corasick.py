@@ -0,0 +1,99 @@
+"""
+app/utils/aho_corasick.py
+──────────────────────────
+Aho-Corasick multi-pattern matcher.
+
+Built once from a set of (pattern, value) pairs, it finds every
+occurrence of every pattern in one left-to-right pass over the text —
+cost proportional to the text length plus the number of matches, not to
+the number of patterns. Matching is case-insensitive; with whole_words,
+a match must not be flanked by letters or digits ("food" doesn't match
+"seafood", "api" doesn't match "rapid").
+"""
+
+from dataclasses import dataclass
+from typing import Generic, Hashable, Iterable, TypeVar
+
+V = TypeVar("V", bound=Hashable)
+
+
+@dataclass(frozen=True)
+class Match(Generic[V]):
+    start: int
+    end: int  # exclusive
+    pattern: str
+    value: V
+
+
+class AhoCorasick(Generic[V]):
+    def __init__(self, patterns: Iterable[tuple[str, V]], whole_words: bool = True):
+        self.whole_words = whole_words
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[tuple[int, ...]] = [()]  # state → ids of patterns ending here
+        self._patterns: list[tuple[str, V]] = []
+
+        for pattern, value in patterns:
+            key = pattern.strip().lower()
+            if not key:
+                continue  # an empty pattern would match everywhere
+            self._add(key, value)
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def _add(self, key: str, value: V) -> None:
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] += (len(self._patterns),)
+        self._patterns.append((key, value))
+
+    def _link(self) -> None:
+        """Breadth-first failure links; each state inherits the outputs of its failure state."""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> list[Match[V]]:
+        """Every (word-bounded) occurrence of every pattern, in order of end position."""
+        text = text.lower()
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            for pid in out[state]:
+                key, value = patterns[pid]
+                start = end - len(key)
+                if self.whole_words and not _bounded(text, start, end):
+                    continue
+                matches.append(Match(start, end, key, value))
+        return matches
+
+    def values(self, text: str) -> set[V]:
+        return {m.value for m in self.find_all(text)}
+
+
+def _bounded(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
@@ -0,0 +1,154 @@
+"""
+app/utils/compression.py
+─────────────────────────
+Content-type-aware gzip for responses.
+
+CompressionMiddleware replaces Starlette's GZipMiddleware, which compresses
+every response, streaming ones included, into a GzipFile that is never
+flushed — SSE tokens sat in the compressor until enough output built up.
+Here:
+- text/event-stream (and already-encoded or binary types) pass through
+  untouched, headers sent at once, so time-to-first-byte is the app's own.
+- Other streaming bodies are compressed with a sync flush per chunk, so each
+  chunk is decodable as soon as it arrives.
+- Single-body text/JSON responses over GZIP_MINIMUM_SIZE are compressed whole.
+
+PrecompressedBody serves hot, rarely-changing JSON (GET /projects) from bytes
+encoded and gzipped once, skipping serialization and compression per request.
+"""
+
+import gzip
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+UNCOMPRESSED_TYPES = ("text/event-stream",)  # latency-critical streams
+
+
+def _qvalue(params: list[str]) -> float:
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return min(max(float(value.strip()), 0.0), 1.0)
+            except ValueError:
+                return 0.0  # malformed weight: don't guess the client can decode it
+    return 1.0
+
+
+def accepts_gzip(headers: Headers) -> bool:
+    """
+    True if Accept-Encoding allows gzip: a "gzip" (or legacy "x-gzip") coding
+    with q > 0, or "*" with q > 0 when gzip isn't listed. Codings are matched
+    as whole tokens, so "x-gzip-foo" or "gzipped" don't count, and "gzip;q=0"
+    refuses gzip even next to "*".
+    """
+    gzip_q = wildcard_q = None
+    for coding in headers.get("accept-encoding", "").split(","):
+        name, *params = coding.split(";")
+        name = name.strip().lower()
+        if name in ("gzip", "x-gzip"):
+            gzip_q = max(gzip_q or 0.0, _qvalue(params))
+        elif name == "*":
+            wildcard_q = _qvalue(params)
+    if gzip_q is not None:
+        return gzip_q > 0
+    return bool(wildcard_q)
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if not media_type or media_type in UNCOMPRESSED_TYPES:
+        return False
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith("+json")
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int | None = None, compresslevel: int | None = None):
+        self.app = app
+        self.minimum_size = settings.GZIP_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.compresslevel = settings.GZIP_LEVEL if compresslevel is None else compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not accepts_gzip(Headers(scope=scope)):
+            await self.app(scope, receive, send)
+            return
+        responder = _GzipResponder(send, self.minimum_size, self.compresslevel)
+        await self.app(scope, receive, responder.send)
+
+
+class _GzipResponder:
+    def __init__(self, send: Send, minimum_size: int, compresslevel: int):
+        self._send = send
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.start_message: Message | None = None
+        self.passthrough = False
+        self.compressor = None  # streaming zlib state once the body turns out to be chunked
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers or not _compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self._send(message)
+            else:
+                self.start_message = message  # headers depend on the first body chunk
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if not more_body:
+                if len(body) >= self.minimum_size:
+                    body = gzip.compress(body, compresslevel=self.compresslevel)
+                    headers = MutableHeaders(raw=start["headers"])
+                    headers["Content-Encoding"] = "gzip"
+                    headers["Content-Length"] = str(len(body))
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": body}
+                await self._send(start)
+                await self._send(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = "gzip"
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+            self.compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            await self._send(start)
+
+        data = self.compressor.compress(body)
+        data += self.compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+class PrecompressedBody:
+    """A JSON body rendered and gzipped once, served as-is to every request."""
+
+    def __init__(self, content, compresslevel: int | None = None):
+        self.raw = JSONResponse(content).body
+        level = settings.GZIP_LEVEL if compresslevel is None else compresslevel
+        self.gzipped = gzip.compress(self.raw, compresslevel=level)
+
+    def response(self, request: Request) -> Response:
+        headers = {"Vary": "Accept-Encoding"}
+        if accepts_gzip(request.headers):
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzipped, media_type="application/json", headers=headers)
+        return Response(self.raw, media_type="application/json", headers=headers)
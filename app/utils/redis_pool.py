@@ -0,0 +1,167 @@
+"""
+app/utils/redis_pool.py
+────────────────────────
+The app's one Redis connection pool, shared by every Redis user (rate
+limiter today; caches / sessions later). Created and closed by the app
+lifespan; get_redis_pool() returns it, or None when Redis isn't configured.
+
+Commands go through `execute()`: everything issued in the same event-loop
+tick — concurrent requests, or several awaits gathered in one request — is
+sent as one non-transactional pipeline, so N commands cost one round trip
+and one pooled connection. Pool saturation and round-trip latency are
+reported by `stats()` (GET /metrics).
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as redis
+    from redis.exceptions import NoScriptError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+_pool: "RedisPool | None" = None
+
+
+class RedisScript:
+    """A Lua script run with EVALSHA through the auto-pipeline (loaded on NOSCRIPT)."""
+
+    def __init__(self, pool: "RedisPool", lua: str):
+        self.pool = pool
+        self.lua = lua
+        self.sha = hashlib.sha1(lua.encode("utf-8")).hexdigest()
+
+    async def __call__(self, keys: list = (), args: list = ()):
+        command = ("EVALSHA", self.sha, len(keys), *keys, *args)
+        try:
+            return await self.pool.execute(*command)
+        except NoScriptError:
+            await self.pool.client.script_load(self.lua)  # new / flushed server
+            return await self.pool.execute(*command)
+
+
+class RedisPool:
+    LATENCY_SAMPLES = 1024
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int | None = None,
+        socket_timeout: float | None = None,
+        pool_timeout: float | None = None,
+    ):
+        self.max_connections = max_connections or settings.REDIS_MAX_CONNECTIONS
+        self._pool = redis.BlockingConnectionPool.from_url(
+            url,
+            max_connections=self.max_connections,
+            timeout=settings.REDIS_POOL_TIMEOUT if pool_timeout is None else pool_timeout,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT if socket_timeout is None else socket_timeout,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT if socket_timeout is None else socket_timeout,
+            health_check_interval=30,
+            decode_responses=True,
+        )
+        self.client = redis.Redis(connection_pool=self._pool)
+        self._pending: list[tuple[tuple, asyncio.Future]] = []
+        self._flushing: set[asyncio.Task] = set()
+        self.commands = 0
+        self.round_trips = 0
+        self.errors = 0  # failed commands
+        self.saturated = 0  # round trips that found every connection busy
+        self._latencies_ms: deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+
+    def register_script(self, lua: str) -> RedisScript:
+        return RedisScript(self, lua)
+
+    async def execute(self, *args):
+        """Queue one command; it is sent with everything else issued this loop tick."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((args, future))
+        if len(self._pending) == 1:
+            task = asyncio.create_task(self._flush())
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+        return await future
+
+    async def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if not self._pool.can_get_connection():
+            self.saturated += 1
+        start = time.perf_counter()
+        try:
+            if len(batch) == 1:
+                results = [await self.client.execute_command(*batch[0][0])]
+            else:
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for args, _ in batch:
+                        pipe.execute_command(*args)
+                    results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            results = [e] * len(batch)
+        self._latencies_ms.append((time.perf_counter() - start) * 1000)
+        self.round_trips += 1
+        self.commands += len(batch)
+        self.errors += sum(isinstance(r, Exception) for r in results)
+        for (_, future), result in zip(batch, results):
+            if future.done():  # caller cancelled
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def ping(self) -> bool:
+        try:
+            return bool(await self.execute("PING"))
+        except Exception as e:
+            logger.warning(f"Redis at {settings.REDIS_URL} not reachable ({e})")
+            return False
+
+    async def aclose(self) -> None:
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+        await self.client.aclose()
+        await self._pool.disconnect()
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies_ms)
+        n = len(latencies)
+        return {
+            "max_connections": self.max_connections,
+            "in_use": len(getattr(self._pool, "_in_use_connections", ())),
+            "idle": len(getattr(self._pool, "_available_connections", ())),
+            "saturated": self.saturated,
+            "commands": self.commands,
+            "round_trips": self.round_trips,
+            "commands_per_round_trip": round(self.commands / self.round_trips, 2) if self.round_trips else 0.0,
+            "errors": self.errors,
+            "latency_ms_p50": round(latencies[n // 2], 3) if n else None,
+            "latency_ms_p99": round(latencies[min(n - 1, int(n * 0.99))], 3) if n else None,
+        }
+
+
+def create_redis_pool(url: str | None = None) -> RedisPool | None:
+    """Pool for REDIS_URL (None without redis-py or a URL) — create once in the app lifespan."""
+    url = settings.REDIS_URL if url is None else url
+    if not url:
+        return None
+    if not REDIS_AVAILABLE:
+        logger.warning("redis package not installed — Redis features run per process.")
+        return None
+    return RedisPool(url)
+
+
+def set_redis_pool(pool: RedisPool | None) -> None:
+    global _pool
+    _pool = pool
+
+
+def get_redis_pool() -> RedisPool | None:
+    return _pool
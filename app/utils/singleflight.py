@@ -0,0 +1,56 @@
+"""
+app/utils/singleflight.py
+──────────────────────────
+Per-key single-flight for expensive async work.
+
+The first caller for a key starts the work; concurrent callers await the same
+result. Failures are shared too, and remembered for a short TTL so a broken
+key isn't retried by every request that arrives right after.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    def __init__(self, failure_ttl: float = 30.0):
+        self.failure_ttl = failure_ttl
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._failures: dict[str, tuple[float, Exception]] = {}  # key → (expires_at, error)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        failure = self._failures.get(key)
+        if failure is not None:
+            expires_at, error = failure
+            if time.monotonic() < expires_at:
+                raise error
+            del self._failures[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._inflight[key] = task
+            # Mark the exception as retrieved even if every waiter was cancelled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+        # A cancelled waiter must not cancel the shared work for everyone else
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            return await fn()
+        except Exception as e:
+            if self.failure_ttl > 0:
+                self._failures[key] = (time.monotonic() + self.failure_ttl, e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
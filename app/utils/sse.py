@@ -0,0 +1,123 @@
+"""
+app/utils/sse.py
+─────────────────
+Server-Sent Events framing for the chat stream.
+
+Frames are built as bytes from pre-encoded prefixes plus one serializer call
+for the payload (orjson when installed), so a token costs no dict, f-string
+or str → bytes pass. The wire format is unchanged:
+
+    data: {"type": "token" | "done" | "error", "data": "..."}\\n\\n
+
+`coalesce()` merges tokens that arrive close together into one frame (one
+ASGI send instead of one per token). The first token is always sent at once;
+after that a frame is flushed at SSE_COALESCE_CHARS or once its oldest
+token has waited SSE_COALESCE_WINDOW_MS.
+"""
+
+import asyncio
+from typing import AsyncIterator
+from app.config import settings
+
+try:
+    import orjson
+
+    def _encode_str(text: str) -> bytes:
+        return orjson.dumps(text)
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+
+    def _encode_str(text: str) -> bytes:
+        return json.dumps(text, ensure_ascii=False).encode("utf-8")
+
+    ORJSON_AVAILABLE = False
+
+_TOKEN_PREFIX = b'data: {"type": "token", "data": '
+_ERROR_PREFIX = b'data: {"type": "error", "data": '
+_FRAME_END = b"}\n\n"
+
+DONE_FRAME = b'data: {"type": "done", "data": ""}\n\n'
+
+
+def token_frame(text: str) -> bytes:
+    return _TOKEN_PREFIX + _encode_str(text) + _FRAME_END
+
+
+def error_frame(message: str) -> bytes:
+    return _ERROR_PREFIX + _encode_str(message) + _FRAME_END
+
+
+async def coalesce(
+    source: AsyncIterator[str],
+    max_chars: int | None = None,
+    window_ms: float | None = None,
+) -> AsyncIterator[str]:
+    """
+    Re-chunk a token stream: the first token as-is, then tokens joined until
+    `max_chars` or until the oldest buffered token has waited `window_ms`.
+    max_chars <= 0 passes tokens through unchanged. Tokens buffered when the
+    source fails are yielded before the error propagates.
+
+    The source is drained by one pump task, so a token costs a list append —
+    timers and wake-ups happen per frame, not per token.
+    """
+    max_chars = settings.SSE_COALESCE_CHARS if max_chars is None else max_chars
+    window = (settings.SSE_COALESCE_WINDOW_MS if window_ms is None else window_ms) / 1000
+    iterator = source.__aiter__()
+
+    try:
+        first = await iterator.__anext__()
+    except StopAsyncIteration:
+        return
+    yield first
+    if max_chars <= 0:
+        async for token in iterator:
+            yield token
+        return
+
+    buffer: list[str] = []
+    size = 0
+    finished = False
+    error: Exception | None = None
+    wake = asyncio.Event()  # buffer became non-empty / full, or the source ended
+
+    async def pump():
+        nonlocal size, finished, error
+        try:
+            async for token in iterator:
+                buffer.append(token)
+                size += len(token)
+                if len(buffer) == 1 or size >= max_chars:
+                    wake.set()
+        except Exception as e:
+            error = e
+        finally:
+            finished = True
+            wake.set()
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            await wake.wait()
+            wake.clear()
+            if buffer and size < max_chars and not finished:
+                # Give the burst one window to fill the frame
+                timer = loop.call_later(window, wake.set)
+                await wake.wait()
+                wake.clear()
+                timer.cancel()
+            if buffer:
+                chunk = "".join(buffer)
+                buffer.clear()
+                size = 0
+                yield chunk
+            if finished and not buffer:
+                if error is not None:
+                    raise error
+                return
+    finally:
+        if not task.done():
+            task.cancel()
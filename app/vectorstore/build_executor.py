@@ -0,0 +1,113 @@
+"""
+app/vectorstore/build_executor.py
+──────────────────────────────────
+Runs index-build work off the event loop.
+
+- embed(): chunk embedding (through the persistent embedding cache) in a
+  process pool whose workers load the model once (INDEX_BUILD_EXECUTOR=
+  "process"), so a large repo build neither blocks the loop nor competes
+  with chat requests for the GIL. Falls back to a thread using the
+  in-process model if the pool can't be used.
+- run_io(): FAISS construction and disk writes on a dedicated thread.
+
+start_embed_pool() / embed_in_worker() are the worker side, shared with the
+offline build (scripts/build_index.py).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, TypeVar
+import numpy as np
+from app.ingestion.embedder import Embedder
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_worker_embedder: Embedder | None = None
+
+
+def _init_worker(torch_threads: int) -> None:
+    global _worker_embedder
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)  # workers share the cores instead of oversubscribing
+    except ImportError:
+        pass
+    _worker_embedder = Embedder()  # loads the model once per worker process
+
+
+def embed_in_worker(texts: list[str], use_cache: bool = True) -> np.ndarray:
+    """Embed in a start_embed_pool worker — through the persistent embedding cache unless `use_cache` is off."""
+    if use_cache:
+        return _worker_embedder.embed_chunks(texts)
+    return _worker_embedder.embed_batch(texts)
+
+
+def start_embed_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool whose workers each load the embedding model once and split the cores between them."""
+    # spawn: forking a process that already runs torch/tokenizer threads can deadlock
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(max(1, (os.cpu_count() or 1) // max(workers, 1)),),
+    )
+
+
+class IndexBuildExecutor:
+    def __init__(self, embedder: Embedder, mode: str | None = None, workers: int | None = None):
+        self.embedder = embedder  # in-process fallback
+        self.mode = (mode or settings.INDEX_BUILD_EXECUTOR).lower()
+        self.workers = workers or settings.INDEX_BUILD_WORKERS
+        self._pool: Executor | None = None  # created on first use
+        self._embed_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-embed")
+        self._io_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-io")
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed build chunks without blocking the event loop. Returns (N, D) float32."""
+        if not texts:
+            return np.empty((0, self.embedder.dimension), dtype="float32")
+        loop = asyncio.get_running_loop()
+        pool = self._process_pool()
+        if pool is not None:
+            try:
+                return await loop.run_in_executor(pool, embed_in_worker, texts)
+            except BrokenProcessPool as e:
+                logger.warning(f"Embedding process pool broke ({e}) — falling back to a thread")
+                self.mode = "thread"
+                self._shutdown_pool()
+        return await loop.run_in_executor(self._embed_thread, self.embedder.embed_chunks, texts)
+
+    async def run_io(self, fn: Callable[..., T], *args) -> T:
+        """Run index construction / disk writes on the I/O thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_thread, fn, *args)
+
+    def _process_pool(self) -> Executor | None:
+        if self.mode != "process":
+            return None
+        if self._pool is None:
+            try:
+                self._pool = start_embed_pool(self.workers)
+                logger.info(f"Index build process pool started ({self.workers} worker(s))")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not start embedding process pool ({e}) — using a thread")
+                self.mode = "thread"
+                return None
+        return self._pool
+
+    def _shutdown_pool(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def shutdown(self) -> None:
+        self._shutdown_pool()
+        self._embed_thread.shutdown(wait=False, cancel_futures=True)
+        self._io_thread.shutdown(wait=False, cancel_futures=True)
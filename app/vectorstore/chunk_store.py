@@ -0,0 +1,157 @@
+"""
+app/vectorstore/chunk_store.py
+───────────────────────────────
+Columnar, mmap-friendly chunk metadata.
+
+On disk (next to index.faiss):
+    chunks.text.bin     — all chunk texts as one UTF-8 blob
+    chunks.offsets.npy  — int64[N + 1] byte offsets into the blob
+    chunks.source.npy   — uint32[N] codes into the source vocabulary
+    chunks.type.npy     — uint16[N] codes into the type vocabulary
+    chunks.lang.npy     — uint16[N] codes into the lang vocabulary ("" = none)
+    chunks.vocab.json   — {"source": [...], "type": [...], "lang": [...]}
+
+Everything is plain arrays and JSON — loading never unpickles anything —
+and the blob and arrays are mapped read-only, so a load is O(vocabulary)
+and all workers share the pages. Search hits come out as __slots__ records
+that only decode the text they point at.
+"""
+
+import json
+import mmap
+import pickle
+import logging
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TEXT_FILE = "chunks.text.bin"
+OFFSETS_FILE = "chunks.offsets.npy"
+VOCAB_FILE = "chunks.vocab.json"
+COLUMNS = {"source": "uint32", "type": "uint16", "lang": "uint16"}
+
+
+class ChunkRecord:
+    """A search hit. Supports r.text as well as r["text"] / r.get("text") for dict-style callers."""
+
+    __slots__ = ("text", "source", "type", "lang", "score")
+
+    def __init__(self, text: str, source: str, type: str, lang: str | None = None, score: float = 0.0):
+        self.text = text
+        self.source = source
+        self.type = type
+        self.lang = lang
+        self.score = score
+
+    @classmethod
+    def from_dict(cls, d: dict, score: float = 0.0) -> "ChunkRecord":
+        return cls(d.get("text", ""), d.get("source", ""), d.get("type", ""), d.get("lang"), score)
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def to_dict(self) -> dict:
+        d = {"text": self.text, "source": self.source, "type": self.type}
+        if self.lang:
+            d["lang"] = self.lang
+        return d
+
+    def __repr__(self) -> str:
+        return f"ChunkRecord(source={self.source!r}, type={self.type!r}, score={self.score:.3f})"
+
+
+def write_chunk_store(dir_path: Path, records) -> None:
+    """Serialize chunk dicts (or ChunkRecords) into the columnar layout."""
+    vocabs: dict[str, dict[str, int]] = {name: {} for name in COLUMNS}
+    vocabs["lang"][""] = 0
+    codes = {name: np.zeros(len(records), dtype=dtype) for name, dtype in COLUMNS.items()}
+    offsets = np.zeros(len(records) + 1, dtype="int64")
+
+    with open(dir_path / TEXT_FILE, "wb") as f:
+        for i, record in enumerate(records):
+            get = record.get
+            encoded = get("text", "").encode("utf-8")
+            f.write(encoded)
+            offsets[i + 1] = offsets[i] + len(encoded)
+            for name, vocab in vocabs.items():
+                value = get(name) or ""
+                codes[name][i] = vocab.setdefault(value, len(vocab))
+
+    for name, dtype in COLUMNS.items():
+        if len(vocabs[name]) > np.iinfo(dtype).max:
+            raise ValueError(f"Too many distinct '{name}' values for {dtype} codes")
+        np.save(dir_path / f"chunks.{name}.npy", codes[name])
+    np.save(dir_path / OFFSETS_FILE, offsets)
+    with open(dir_path / VOCAB_FILE, "w", encoding="utf-8") as f:
+        json.dump({name: list(vocab) for name, vocab in vocabs.items()}, f, ensure_ascii=False)
+
+
+def has_chunk_store(dir_path: Path) -> bool:
+    return (dir_path / VOCAB_FILE).exists() and (dir_path / TEXT_FILE).exists()
+
+
+class ChunkStore:
+    """Read-only columnar view. len(), store[i] / store.record(i, score) → ChunkRecord."""
+
+    def __init__(self, dir_path: Path, use_mmap: bool = True):
+        mode = "r" if use_mmap else None
+        self._offsets = np.load(dir_path / OFFSETS_FILE, mmap_mode=mode)
+        self._codes = {name: np.load(dir_path / f"chunks.{name}.npy", mmap_mode=mode) for name in COLUMNS}
+        with open(dir_path / VOCAB_FILE, encoding="utf-8") as f:
+            self._vocab: dict[str, list[str]] = json.load(f)
+
+        text_path = dir_path / TEXT_FILE
+        if text_path.stat().st_size == 0:
+            self._blob = b""
+        elif use_mmap:
+            with open(text_path, "rb") as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._blob = text_path.read_bytes()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def text(self, i: int) -> str:
+        return self._blob[int(self._offsets[i]):int(self._offsets[i + 1])].decode("utf-8")
+
+    def record(self, i: int, score: float = 0.0) -> ChunkRecord:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return ChunkRecord(
+            self.text(i),
+            self._vocab["source"][self._codes["source"][i]],
+            self._vocab["type"][self._codes["type"][i]],
+            self._vocab["lang"][self._codes["lang"][i]] or None,
+            score,
+        )
+
+    def __getitem__(self, i: int) -> ChunkRecord:
+        return self.record(i + len(self) if i < 0 else i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._blob) + self._offsets.nbytes + sum(c.nbytes for c in self._codes.values())
+
+
+class _PlainDataUnpickler(pickle.Unpickler):
+    """Only lets builtin containers/strings through — no class lookups, no code."""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name} from legacy metadata")
+
+
+def load_legacy_metadata(path: Path) -> list[dict]:
+    """Read a pre-columnar metadata.pkl (plain list of dicts) without executing pickled code."""
+    with open(path, "rb") as f:
+        return _PlainDataUnpickler(f).load()
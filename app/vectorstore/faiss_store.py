@@ -2,27 +2,120 @@
 app/vectorstore/faiss_store.py
 ───────────────────────────────
 FAISS vector store wrapper.
-Uses IndexFlatIP (inner product = cosine similarity on normalized vectors).
+All index types use inner product (= cosine similarity on normalized vectors).
+
+Index types:
+- flat   — IndexFlatIP, exact brute force (small indexes)
+- hnsw   — IndexHNSWFlat, graph ANN, no training
+- ivf    — IndexIVFFlat, inverted lists, trained on the first batch
+- ivfpq  — IndexIVFPQ, inverted lists + product-quantized codes (largest indexes);
+           built as ivf when the first batch is too small to train the
+           2**IVF_PQ_BITS-entry PQ codebooks
+- auto   — picked from the vector count on the first add()
+
+Vector storage (flat / hnsw / ivf; ivfpq is always compressed):
+- float32 — full precision (4 bytes per dimension)
+- fp16    — FAISS scalar quantizer, half precision (2 bytes), recall ≈ float32
+- int8    — FAISS scalar quantizer, 8-bit per dimension trained on the first
+            batch (1 byte), ~4× smaller than float32
 """
 
 import faiss
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
 import numpy as np
-import pickle
 import logging
 from pathlib import Path
 from app.ingestion.embedder import Embedder
+from app.vectorstore.chunk_store import (
+    ChunkRecord,
+    ChunkStore,
+    has_chunk_store,
+    load_legacy_metadata,
+    write_chunk_store,
+)
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+INDEX_TYPES = {"flat", "hnsw", "ivf", "ivfpq"}
+VECTOR_STORAGE = {
+    "float32": None,
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+BYTES_PER_DIM = {"float32": 4, "fp16": 2, "int8": 1}
+PARAMS_FILE = "index_params.json"
+LOAD_ATTEMPTS = 3
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """Automatic index selection by corpus size."""
+    if n_vectors < settings.VECTOR_HNSW_MIN_VECTORS:
+        return "flat"
+    if n_vectors < settings.VECTOR_IVF_MIN_VECTORS:
+        return "hnsw"
+    return "ivf"
+
+
+def publish_dir(src: Path, dst: Path, versioned: bool = False) -> None:
+    """
+    Make the fully written directory `src` visible at `dst` in one atomic step.
+
+    A new path (or an empty directory) is simply renamed onto. Otherwise —
+    or with `versioned` — `dst` is a symlink to a sibling version directory
+    (".{name}.v-<ns>-<pid>"), swapped with os.replace: `dst` never goes
+    missing and never mixes files of two versions. The replaced version is
+    kept for readers that resolved the link just before the swap; older ones
+    are deleted. A plain directory from before versioned saves is moved into
+    a version slot first (a gap of two renames, once).
+    """
+    if not versioned and not dst.is_symlink() and (not dst.exists() or not any(dst.iterdir())):
+        os.rename(src, dst)
+        return
+    version = dst.with_name(f".{dst.name}.v-{time.time_ns():020d}-{os.getpid()}")
+    os.rename(src, version)
+    if dst.exists() and not dst.is_symlink():
+        os.rename(dst, dst.with_name(f".{dst.name}.v-{0:020d}-{os.getpid()}"))
+    link = dst.with_name(f".{dst.name}.link-{os.getpid()}-{time.monotonic_ns()}")
+    os.symlink(version.name, link, target_is_directory=True)
+    try:
+        os.replace(link, dst)
+    except OSError:
+        link.unlink(missing_ok=True)
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+    live = dst.resolve()
+    versions = sorted(dst.parent.glob(f".{dst.name}.v-*"))
+    for old in versions[:-2]:  # keep the newest two (this one and the one it replaced)
+        if old.resolve() != live:
+            shutil.rmtree(old, ignore_errors=True)
+
 
 class FAISSStore:
-    def __init__(self, dimension: int = None):
+    def __init__(self, dimension: int = None, index_type: str = None, storage: str = None):
         self.dimension = dimension or settings.EMBEDDING_DIMENSION
+        requested = (index_type or settings.VECTOR_INDEX_TYPE).lower()
+        if requested != "auto" and requested not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{requested}'")
+        self.requested_type = requested
+        self.storage = (storage or settings.VECTOR_STORAGE).lower()
+        if self.storage not in VECTOR_STORAGE:
+            raise ValueError(f"Unknown vector storage '{self.storage}'")
+        # Until the first add() decides otherwise, an empty exact index
         # IndexFlatIP = exact search with inner product
         # On L2-normalized vectors, inner product == cosine similarity
         self.index = faiss.IndexFlatIP(self.dimension)
-        self.metadata: list[dict] = []  # Parallel list — metadata[i] corresponds to vector i
+        self.index_type = "flat"
+        self.params: dict = {}
+        # metadata[i] corresponds to vector i: chunk dicts while building, a ChunkStore once loaded
+        self.metadata: list[dict] | ChunkStore = []
+        self.read_only = False  # True for memory-mapped stores loaded from disk
+        self._nbytes: int | None = None
 
     def add(self, chunks: list[dict], embedder: Embedder = None) -> None:
         """
@@ -34,16 +127,97 @@ class FAISSStore:
 
         _embedder = embedder or Embedder()
         texts = [c["text"] for c in chunks]
-        embeddings = _embedder.embed_batch(texts)  # Already L2-normalized
+        embeddings = _embedder.embed_chunks(texts)  # Already L2-normalized
+        self.add_embeddings(chunks, embeddings)
+
+    def add_embeddings(self, chunks: list[dict], embeddings: np.ndarray) -> None:
+        """Add precomputed (N, D) L2-normalized embeddings with their chunk metadata."""
+        if not chunks:
+            return
+        if self.read_only:
+            raise RuntimeError("Cannot add to a memory-mapped FAISSStore — build a new store instead")
+        embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+
+        if self.index.ntotal == 0 and (self.requested_type != "flat" or self.storage != "float32"):
+            self._build_index(embeddings)
 
         self.index.add(embeddings)
         self.metadata.extend(chunks)
-        logger.info(f"Added {len(chunks)} vectors. Total: {self.index.ntotal}")
+        self._nbytes = None
+        logger.info(f"Added {len(chunks)} vectors ({self.index_type}). Total: {self.index.ntotal}")
+
+    def _build_index(self, training: np.ndarray) -> None:
+        """Create (and train, for IVF / scalar quantizers) the configured index type from the first batch."""
+        n = len(training)
+        index_type = choose_index_type(n) if self.requested_type == "auto" else self.requested_type
+        metric = faiss.METRIC_INNER_PRODUCT
+        qtype = VECTOR_STORAGE[self.storage]
+        if index_type == "ivfpq" and n < 2 ** settings.IVF_PQ_BITS:
+            # PQ k-means needs a training point per codebook entry
+            logger.warning(
+                f"{n} vectors can't train {2 ** settings.IVF_PQ_BITS}-entry PQ codebooks — "
+                f"building ivf ({self.storage}) instead of ivfpq"
+            )
+            index_type = "ivf"
+
+        if index_type == "hnsw":
+            params = {
+                "M": settings.HNSW_M,
+                "efConstruction": settings.HNSW_EF_CONSTRUCTION,
+                "efSearch": settings.HNSW_EF_SEARCH,
+            }
+            if qtype is None:
+                index = faiss.IndexHNSWFlat(self.dimension, params["M"], metric)
+            else:
+                index = faiss.IndexHNSWSQ(self.dimension, qtype, params["M"], metric)
+                index.train(training)
+            index.hnsw.efConstruction = params["efConstruction"]
+
+        elif index_type in ("ivf", "ivfpq"):
+            # ~4·sqrt(N) lists, but keep ≥39 training points per centroid
+            nlist = settings.IVF_NLIST or int(4 * math.sqrt(n))
+            nlist = max(1, min(nlist, n // 39 or 1))
+            params = {"nlist": nlist, "nprobe": min(settings.IVF_NPROBE, nlist)}
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            if index_type == "ivfpq":
+                pq_m = settings.IVF_PQ_M
+                if self.dimension % pq_m != 0:
+                    raise ValueError(f"IVF_PQ_M={pq_m} must divide dimension {self.dimension}")
+                params.update({"pq_m": pq_m, "pq_bits": settings.IVF_PQ_BITS})
+                index = faiss.IndexIVFPQ(
+                    quantizer, self.dimension, nlist, pq_m, params["pq_bits"], metric
+                )
+            elif qtype is None:
+                index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, metric)
+            else:
+                index = faiss.IndexIVFScalarQuantizer(quantizer, self.dimension, nlist, qtype, metric)
+            index.train(training)
 
-    def search(self, query_embedding: np.ndarray, k: int = 8) -> list[dict]:
+        elif qtype is not None:
+            params = {}
+            index = faiss.IndexScalarQuantizer(self.dimension, qtype, metric)
+            index.train(training)
+
+        else:
+            return  # flat — keep the exact index created in __init__
+
+        self.index = index
+        self.index_type = index_type
+        self.params = params
+        self._apply_search_params()
+        logger.info(f"Built {index_type} index ({self.storage_label}) for {n} vectors: {params}")
+
+    def _apply_search_params(self) -> None:
+        """Set query-time knobs (efSearch / nprobe) on the live index."""
+        if self.index_type == "hnsw":
+            self.index.hnsw.efSearch = self.params.get("efSearch", settings.HNSW_EF_SEARCH)
+        elif self.index_type in ("ivf", "ivfpq"):
+            faiss.extract_index_ivf(self.index).nprobe = self.params.get("nprobe", settings.IVF_NPROBE)
+
+    def search(self, query_embedding: np.ndarray, k: int = 8) -> list[ChunkRecord]:
         """
         Find top-K most similar chunks.
-        Returns list of {"text": ..., "source": ..., "score": float}
+        Returns list of ChunkRecord (text, source, type, lang, score; dict-style access works too)
         """
         if self.index.ntotal == 0:
             return []
@@ -56,14 +230,16 @@ class FAISSStore:
         scores, indices = self.index.search(q, k)
 
         results = []
-        for score, idx in zip(scores[0], indices[0]):
+        columnar = isinstance(self.metadata, ChunkStore)
+        for score, idx in zip(scores[0].tolist(), indices[0].tolist()):
             if idx == -1:
                 continue
             if score < settings.SIMILARITY_THRESHOLD:
                 continue
-            chunk = dict(self.metadata[idx])
-            chunk["score"] = float(score)
-            results.append(chunk)
+            if columnar:
+                results.append(self.metadata.record(idx, score))
+            else:
+                results.append(ChunkRecord.from_dict(self.metadata[idx], score))
 
         return results
 
@@ -71,33 +247,142 @@ class FAISSStore:
         """Convenience: returns just formatted text strings for prompt injection."""
         results = self.search(query_embedding, k)
         return [
-            f"[Source: {r['source']} | Relevance: {r['score']:.2f}]\n{r['text']}"
+            f"[Source: {r.source} | Relevance: {r.score:.2f}]\n{r.text}"
             for r in results
         ]
 
-    def save(self, dir_path: str) -> None:
-        """Save FAISS index + metadata to disk."""
+    def save(self, dir_path: str, extra_files: dict[str, str] | None = None, versioned: bool = False) -> None:
+        """
+        Save FAISS index + metadata to disk, atomically.
+        Everything is written to a temp dir next to the target and published with
+        publish_dir — replacing an existing index swaps a symlink to a new version
+        directory, so the path always holds one complete version, and processes
+        that have the old files memory-mapped keep their inodes. Pass `versioned`
+        for paths that will be replaced later (repo indexes). `extra_files`
+        (name → text) are written into the same directory.
+        """
         path = Path(dir_path)
-        path.mkdir(parents=True, exist_ok=True)
-        faiss.write_index(self.index, str(path / "index.faiss"))
-        with open(path / "metadata.pkl", "wb") as f:
-            pickle.dump(self.metadata, f)
-        logger.info(f"Saved FAISS store to {dir_path} ({self.index.ntotal} vectors)")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{path.name}.tmp-", dir=path.parent))
+        try:
+            faiss.write_index(self.index, str(staging / "index.faiss"))
+            write_chunk_store(staging, self.metadata)
+            with open(staging / PARAMS_FILE, "w") as f:
+                json.dump({"index_type": self.index_type, "storage": self.storage, "params": self.params}, f, indent=2)
+            for name, text in (extra_files or {}).items():
+                (staging / name).write_text(text)
+            publish_dir(staging, path, versioned)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self._nbytes = self._dir_bytes(path)
+        logger.info(
+            f"Saved FAISS store to {dir_path} ({self.index.ntotal} vectors, {self.index_type}, {self.storage_label})"
+        )
 
     @classmethod
-    def load(cls, dir_path: str) -> "FAISSStore":
-        """Load FAISS index + metadata from disk."""
-        path = Path(dir_path)
+    def load(cls, dir_path: str, mmap: bool = None) -> "FAISSStore":
+        """
+        Load FAISS index + metadata from disk.
+        With mmap (default: INDEX_LOAD_MODE == "mmap") the vectors and metadata
+        are mapped read-only instead of copied into process memory, so all
+        workers on a host share one copy in the page cache.
+        All files are read from the one version directory the path resolves to.
+        """
+        link = Path(dir_path)
+        for attempt in range(LOAD_ATTEMPTS):
+            path = link.resolve()
+            try:
+                return cls._load_version(path, dir_path, mmap)
+            except (OSError, RuntimeError):
+                # Saves swapped the link and pruned the version resolved above — try the new one
+                if attempt == LOAD_ATTEMPTS - 1 or link.resolve() == path:
+                    raise
+
+    @classmethod
+    def _load_version(cls, path: Path, dir_path: str, mmap: bool | None) -> "FAISSStore":
         if not (path / "index.faiss").exists():
             raise FileNotFoundError(f"No FAISS index at {dir_path}")
+        use_mmap = settings.INDEX_LOAD_MODE == "mmap" if mmap is None else mmap
+
+        store = cls(storage="float32")
+        # Indexes saved before index types existed have no params file → flat float32
+        params_path = path / PARAMS_FILE
+        if params_path.exists():
+            saved = json.loads(params_path.read_text())
+            store.index_type = saved.get("index_type", "flat")
+            store.storage = saved.get("storage", "float32")
+            store.params = saved.get("params", {})
+        store.requested_type = store.index_type
+
+        store.index = faiss.read_index(str(path / "index.faiss"), cls._io_flags(store.index_type, use_mmap))
+        store._apply_search_params()
 
-        store = cls()
-        store.index = faiss.read_index(str(path / "index.faiss"))
-        with open(path / "metadata.pkl", "rb") as f:
-            store.metadata = pickle.load(f)
-        logger.info(f"Loaded FAISS store from {dir_path} ({store.index.ntotal} vectors)")
+        if has_chunk_store(path):
+            store.metadata = ChunkStore(path, use_mmap=use_mmap)
+            if not use_mmap:
+                store.metadata = [r.to_dict() for r in store.metadata]
+        elif (path / "metadata.pkl").exists():
+            logger.warning(f"{dir_path} uses legacy metadata.pkl — rebuild to get the columnar chunk store")
+            store.metadata = load_legacy_metadata(path / "metadata.pkl")
+        else:
+            raise FileNotFoundError(f"No chunk metadata at {dir_path}")
+        store.read_only = use_mmap
+        store._nbytes = cls._dir_bytes(path)
+
+        logger.info(
+            f"Loaded FAISS store from {dir_path} ({store.index.ntotal} vectors, "
+            f"{store.index_type}, {store.storage_label}{', mmap' if use_mmap else ''})"
+        )
         return store
 
+    @staticmethod
+    def _io_flags(index_type: str, use_mmap: bool) -> int:
+        if not use_mmap:
+            return 0
+        # IVF maps its inverted lists; flat-code storage (flat, HNSW) maps its code array
+        mmap_flag = faiss.IO_FLAG_MMAP if index_type in ("ivf", "ivfpq") else faiss.IO_FLAG_MMAP_IFC
+        return mmap_flag | faiss.IO_FLAG_READ_ONLY
+
+    def vectors(self) -> np.ndarray:
+        """All stored vectors as an (N, D) float32 array (approximate for PQ / quantized storage)."""
+        if self.index.ntotal == 0:
+            return np.empty((0, self.dimension), dtype="float32")
+        if self.index_type in ("ivf", "ivfpq"):
+            faiss.extract_index_ivf(self.index).make_direct_map()
+        return self.index.reconstruct_n(0, self.index.ntotal)
+
+    def rows_without_sources(self, sources: set[str]) -> tuple[list[int], list[dict]]:
+        """Vector ids and chunk dicts of everything not coming from `sources`."""
+        records = list(self.metadata)  # dicts while building, ChunkRecords once loaded
+        keep = [i for i, r in enumerate(records) if r["source"] not in sources]
+        chunks = [
+            records[i].to_dict() if isinstance(records[i], ChunkRecord) else dict(records[i])
+            for i in keep
+        ]
+        return keep, chunks
+
+    def without_sources(self, sources: set[str]) -> tuple[list[dict], np.ndarray]:
+        """Chunks + (reconstructed) vectors of everything not coming from `sources`."""
+        keep, chunks = self.rows_without_sources(sources)
+        return chunks, self.vectors()[keep]
+
     @property
     def size(self) -> int:
         return self.index.ntotal
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate footprint: on-disk size once saved/loaded, else vectors + raw text."""
+        if self._nbytes is not None:
+            return self._nbytes
+        texts = sum(len(c["text"]) for c in self.metadata) if isinstance(self.metadata, list) else 0
+        return self.index.ntotal * self.dimension * BYTES_PER_DIM[self.storage] + texts
+
+    @property
+    def storage_label(self) -> str:
+        return "pq" if self.index_type == "ivfpq" else self.storage
+
+    @staticmethod
+    def _dir_bytes(path: Path) -> int:
+        return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
@@ -2,92 +2,281 @@
 app/vectorstore/index_manager.py
 ──────────────────────────────────
 Manages all FAISS indexes:
-- portfolio index (from portfolio.json)
-- resume index (from resume.pdf)
-- per-repo indexes (GitHub Repo Intelligence, cached)
+- portfolio index (from portfolio.json)  ┐ published together as versioned
+- resume index (from resume.pdf)         ┘ snapshots (see snapshot.py)
+- per-repo indexes (GitHub Repo Intelligence, cached on disk, loaded lazily)
 """
 
+import hashlib
+import json
 import logging
+import os
+import numpy as np
 from pathlib import Path
 from app.vectorstore.faiss_store import FAISSStore
+from app.vectorstore.repo_index_cache import RepoIndexCache
+from app.vectorstore.build_executor import IndexBuildExecutor
+from app.vectorstore.snapshot import (
+    BASE_INDEXES, check_compatible, current_snapshot, read_manifest, source_hashes, write_snapshot,
+)
 from app.ingestion.embedder import Embedder
+from app.ingestion.embedding_cache import get_embedding_cache
+from app.ingestion.github_fetcher import GitHubFetcher, RepoUpdate
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+REPO_STATE_FILE = "repo_state.json"  # tree SHA, ETag and per-file blob SHAs of the indexed repo
+
 
 class IndexManager:
     def __init__(self):
         self.indexes_dir = Path(settings.INDEXES_DIR)
         self.portfolio_index: FAISSStore | None = None
         self.resume_index: FAISSStore | None = None
-        self._repo_indexes: dict[str, FAISSStore] = {}  # slug → FAISSStore
+        self._repo_indexes = RepoIndexCache(
+            self.indexes_dir / "github_cache", settings.REPO_INDEX_CACHE_BYTES
+        )
         self.embedder = Embedder()
+        self.builder = IndexBuildExecutor(self.embedder)
+        self.snapshot_dir: Path | None = None  # current snapshot (None: legacy layout / nothing built)
+        self.manifest: dict | None = None
+        self.version = ""  # changes whenever the portfolio/resume indexes on disk change
 
     def load_all(self) -> None:
-        """Load all persistent indexes at startup."""
+        """
+        Load all persistent indexes at startup: the current snapshot if there is
+        one (raises SnapshotMismatch if it was built with another embedding model),
+        else the legacy indexes/portfolio and indexes/resume directories.
+        """
+        snapshot = current_snapshot(self.indexes_dir)
+        if snapshot is not None:
+            manifest = read_manifest(snapshot)
+            check_compatible(manifest)
+            self.snapshot_dir, self.manifest = snapshot, manifest
+        else:
+            self.snapshot_dir, self.manifest = None, None
         self.portfolio_index = self._load_or_empty("portfolio")
         self.resume_index = self._load_or_empty("resume")
+        self._refresh_version()
 
-        # Load any cached repo indexes
-        github_cache = self.indexes_dir / "github_cache"
-        if github_cache.exists():
-            for repo_dir in github_cache.iterdir():
-                if repo_dir.is_dir():
-                    try:
-                        slug = repo_dir.name.replace("__", "/")
-                        self._repo_indexes[slug] = FAISSStore.load(str(repo_dir))
-                        logger.info(f"Loaded cached repo index: {slug}")
-                    except Exception as e:
-                        logger.warning(f"Could not load repo cache {repo_dir}: {e}")
-
+        # Repo indexes under github_cache are loaded on first use (get_repo_index)
         logger.info(
-            f"Indexes ready — portfolio: {self.portfolio_index.size} vecs, "
+            f"Indexes ready ({self.version}) — portfolio: {self.portfolio_index.size} vecs, "
             f"resume: {self.resume_index.size} vecs, "
-            f"repos cached: {len(self._repo_indexes)}"
+            f"repo cache budget: {settings.REPO_INDEX_CACHE_BYTES / 1e6:.0f} MB"
+        )
+
+    def sources_changed(self) -> bool:
+        """Whether portfolio.json / resume.pdf differ from what the loaded base indexes were built from."""
+        if self.manifest is not None:
+            return self.manifest.get("sources") != source_hashes()
+        # Legacy layout: no recorded source hashes, compare mtimes
+        for source, name in ((settings.PORTFOLIO_JSON_PATH, "portfolio"), (settings.RESUME_PDF_PATH, "resume")):
+            index = self.indexes_dir / name / "index.faiss"
+            if _mtime(Path(source)) > _mtime(index):
+                return True
+        return False
+
+    def build_base_indexes(
+        self, portfolio_chunks: list[dict], resume_chunks: list[dict], build_info: dict | None = None
+    ) -> Path:
+        """Build the portfolio and resume indexes and publish them as one new snapshot."""
+        if not resume_chunks:
+            logger.warning("No resume chunks — resume index will be empty.")
+        return self._publish(
+            {"portfolio": self._build_store(portfolio_chunks), "resume": self._build_store(resume_chunks)},
+            build_info,
         )
 
     def build_portfolio_index(self, chunks: list[dict]) -> None:
-        """Build and save portfolio index from chunks."""
-        store = FAISSStore()
-        store.add(chunks, self.embedder)
-        store.save(str(self.indexes_dir / "portfolio"))
-        self.portfolio_index = store
-        logger.info(f"Portfolio index built: {store.size} vectors")
+        """Rebuild the portfolio index; publishes a snapshot with the current resume index."""
+        resume = self.resume_index if self.resume_index is not None else self._load_or_empty("resume")
+        self._publish({"portfolio": self._build_store(chunks), "resume": resume})
 
     def build_resume_index(self, chunks: list[dict]) -> None:
-        """Build and save resume index from chunks."""
+        """Rebuild the resume index; publishes a snapshot with the current portfolio index."""
         if not chunks:
             logger.warning("No resume chunks — resume index will be empty.")
-            self.resume_index = FAISSStore()
-            return
-        store = FAISSStore()
-        store.add(chunks, self.embedder)
-        store.save(str(self.indexes_dir / "resume"))
-        self.resume_index = store
-        logger.info(f"Resume index built: {store.size} vectors")
+        portfolio = self.portfolio_index if self.portfolio_index is not None else self._load_or_empty("portfolio")
+        self._publish({"portfolio": portfolio, "resume": self._build_store(chunks)})
 
-    def build_repo_index(self, slug: str, chunks: list[dict]) -> FAISSStore:
-        """Build and cache a repo-specific FAISS index."""
+    def _build_store(self, chunks: list[dict]) -> FAISSStore:
         store = FAISSStore()
         if chunks:
             store.add(chunks, self.embedder)
-        # Save with slug encoded (replace / with __)
-        safe_name = slug.replace("/", "__")
-        cache_path = str(self.indexes_dir / "github_cache" / safe_name)
-        store.save(cache_path)
-        self._repo_indexes[slug] = store
+        return store
+
+    def _publish(self, stores: dict[str, FAISSStore], build_info: dict | None = None) -> Path:
+        snapshot = write_snapshot(self.indexes_dir, stores, build_info)
+        self.snapshot_dir, self.manifest = snapshot, read_manifest(snapshot)
+        self.portfolio_index, self.resume_index = stores["portfolio"], stores["resume"]
+        self._refresh_version()
+        logger.info(
+            f"Base indexes built ({self.version}) — portfolio: {self.portfolio_index.size} vecs, "
+            f"resume: {self.resume_index.size} vecs"
+        )
+        return snapshot
+
+    def build_repo_index(self, slug: str, chunks: list[dict], state: dict | None = None) -> FAISSStore:
+        """Build and cache a repo-specific FAISS index. Blocking — the app uses build_repo_index_async."""
+        vectors = self.embedder.embed_chunks([c["text"] for c in chunks])
+        store = self._write_repo_index(slug, chunks, vectors, state)
+        self._repo_indexes.put(slug, store)
         logger.info(f"Repo index built and cached: {slug} ({store.size} vectors)")
         return store
 
+    async def build_repo_index_async(self, slug: str, chunks: list[dict], state: dict | None = None) -> FAISSStore:
+        """build_repo_index with embedding and disk writes in the build executor, off the event loop."""
+        vectors = await self.builder.embed([c["text"] for c in chunks])
+        store = await self.builder.run_io(self._write_repo_index, slug, chunks, vectors, state)
+        self._repo_indexes.put(slug, store)  # the cache itself is only touched from the loop
+        logger.info(f"Repo index built and cached: {slug} ({store.size} vectors)")
+        return store
+
+    async def refresh_repo_index(self, slug: str, github: GitHubFetcher) -> str:
+        """
+        Bring a cached repo index up to date, re-embedding only files whose blob SHA changed.
+        Returns "unchanged", "updated", "rebuilt", or "skipped" when an index without
+        recorded state got nothing from GitHub (it is left as is).
+        """
+        previous = self.load_repo_state(slug)
+        update = await github.fetch_repo_update(slug, previous)
+        if update.unchanged:
+            if update.state != previous:
+                self.save_repo_state(slug, update.state)  # e.g. a fresh ETag
+            return "unchanged"
+        if previous is None:
+            # Cached before blob tracking — rebuild once so later refreshes can diff
+            if not update.chunks:
+                logger.warning(f"Nothing fetched for {slug} — keeping its cached index")
+                return "skipped"
+            await self.build_repo_index_async(slug, update.chunks, update.state)
+            return "rebuilt"
+        await self.update_repo_index_async(slug, update)
+        return "updated"
+
+    async def update_repo_index_async(self, slug: str, update: RepoUpdate) -> FAISSStore:
+        """
+        Apply an incremental RepoUpdate off the event loop: drop vectors of
+        changed/removed files, embed only the new chunks, keep every other vector.
+        """
+        existing = self.get_repo_index(slug)
+        if existing is None:
+            return await self.build_repo_index_async(slug, update.chunks, update.state)
+
+        kept_chunks, kept_vectors = await self.builder.run_io(
+            self._kept_vectors, existing, self._stale_sources(slug, update)
+        )
+        new_vectors = await self.builder.embed([c["text"] for c in update.chunks])
+        store = await self.builder.run_io(
+            self._write_repo_index,
+            slug, kept_chunks + update.chunks, np.vstack([kept_vectors, new_vectors]), update.state,
+        )
+        self._repo_indexes.put(slug, store)
+        self._log_update(slug, len(kept_chunks), len(update.chunks), store)
+        return store
+
+    def _write_repo_index(
+        self, slug: str, chunks: list[dict], vectors: np.ndarray, state: dict | None
+    ) -> FAISSStore:
+        store = FAISSStore(storage=settings.REPO_VECTOR_STORAGE)
+        if chunks:
+            store.add_embeddings(chunks, vectors)
+        # Index and repo state are swapped in together
+        extra = {REPO_STATE_FILE: json.dumps(state, indent=2)} if state is not None else None
+        # Save with slug encoded (replace / with __)
+        store.save(str(self._repo_indexes.path_for(slug)), extra_files=extra, versioned=True)
+        return store
+
+    @staticmethod
+    def _kept_vectors(store: FAISSStore, stale: set[str]) -> tuple[list[dict], np.ndarray]:
+        """
+        Chunks not from `stale` with their original float32 vectors, looked up in the
+        embedding cache by text. The index itself may hold lossy codes (int8 / PQ);
+        re-encoding those on every refresh would drift. Texts the cache no longer
+        has fall back to the index's reconstruction.
+        """
+        keep, chunks = store.rows_without_sources(stale)
+        cache = get_embedding_cache()
+        if cache is None:
+            return chunks, store.vectors()[keep]
+        vectors, missing = cache.lookup([c["text"] for c in chunks])
+        if missing:
+            vectors[missing] = store.vectors()[[keep[i] for i in missing]]
+        return chunks, vectors
+
+    @staticmethod
+    def _stale_sources(slug: str, update: RepoUpdate) -> set[str]:
+        return {f"github/{slug}/{p}" for p in update.stale_paths}
+
+    @staticmethod
+    def _log_update(slug: str, kept: int, embedded: int, store: FAISSStore) -> None:
+        logger.info(
+            f"Repo index updated: {slug} — kept {kept}, "
+            f"embedded {embedded} new chunks ({store.size} vectors)"
+        )
+
+    def load_repo_state(self, slug: str) -> dict | None:
+        path = self._repo_indexes.path_for(slug) / REPO_STATE_FILE
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def save_repo_state(self, slug: str, state: dict) -> None:
+        path = self._repo_indexes.path_for(slug) / REPO_STATE_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, indent=2))
+        os.replace(tmp, path)
+
+    def cached_repo_slugs(self) -> list[str]:
+        """Slugs of every repo index on disk (not necessarily loaded)."""
+        cache_dir = self._repo_indexes.cache_dir
+        if not cache_dir.exists():
+            return []
+        return sorted(
+            d.name.replace("__", "/") for d in cache_dir.iterdir()
+            if d.is_dir() and not d.name.startswith(".") and (d / "index.faiss").exists()
+        )
+
+    def has_repo_index(self, slug: str) -> bool:
+        """Whether a repo index exists (in memory or on disk) — without loading it."""
+        return slug in self._repo_indexes or (self._repo_indexes.path_for(slug) / "index.faiss").exists()
+
     def get_repo_index(self, slug: str) -> FAISSStore | None:
+        """Repo index from memory, or lazily from the on-disk cache. None if never built."""
         return self._repo_indexes.get(slug)
 
+    def repo_cache_stats(self) -> dict:
+        return self._repo_indexes.stats()
+
+    def close(self) -> None:
+        """Stop the build executor's worker processes/threads."""
+        self.builder.shutdown()
+
+    def _refresh_version(self) -> None:
+        """Snapshot version, or for legacy indexes a fingerprint of the files (mtime + size)."""
+        if self.manifest is not None:
+            self.version = self.manifest["version"]
+            return
+        h = hashlib.sha256()
+        for name in BASE_INDEXES:
+            path = self.indexes_dir / name / "index.faiss"
+            if path.exists():
+                st = path.stat()
+                h.update(f"{name}:{st.st_mtime_ns}:{st.st_size};".encode())
+        self.version = h.hexdigest()[:16]
+
     def _load_or_empty(self, name: str) -> FAISSStore:
         """Try to load an index; return empty store if not found."""
-        path = str(self.indexes_dir / name)
+        path = str((self.snapshot_dir or self.indexes_dir) / name)
         try:
             return FAISSStore.load(path)
         except FileNotFoundError:
             logger.warning(f"Index '{name}' not found. Run scripts/build_index.py first.")
             return FAISSStore()
+
+
+def _mtime(path: Path) -> float:
+    return path.stat().st_mtime if path.exists() else 0.0
@@ -0,0 +1,91 @@
+"""
+app/vectorstore/repo_index_cache.py
+────────────────────────────────────
+Lazy, memory-budgeted LRU of GitHub repo indexes.
+
+Repo indexes are loaded from indexes/github_cache on first use and kept in
+LRU order until their combined size exceeds the byte budget. Evicted indexes
+stay on disk and are simply reloaded the next time someone asks.
+"""
+
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from app.vectorstore.faiss_store import FAISSStore
+
+logger = logging.getLogger(__name__)
+
+
+def repo_dir_name(slug: str) -> str:
+    """On-disk directory name for a repo slug ("user/repo" → "user__repo")."""
+    return slug.replace("/", "__")
+
+
+class RepoIndexCache:
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._stores: OrderedDict[str, FAISSStore] = OrderedDict()  # slug → store, LRU first
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, slug: str) -> FAISSStore | None:
+        """Return the repo index, loading it from disk on a miss. None if it was never built."""
+        store = self._stores.get(slug)
+        if store is not None:
+            self._stores.move_to_end(slug)
+            self.hits += 1
+            return store
+
+        self.misses += 1
+        path = self.path_for(slug)
+        if not (path / "index.faiss").exists():
+            return None
+        try:
+            store = FAISSStore.load(str(path))
+        except Exception as e:
+            logger.warning(f"Could not load repo cache {path}: {e}")
+            return None
+        self.loads += 1
+        self.put(slug, store)
+        return store
+
+    def put(self, slug: str, store: FAISSStore) -> None:
+        old = self._stores.pop(slug, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._stores[slug] = store
+        self._bytes += store.nbytes
+        self._evict_over_budget()
+
+    def path_for(self, slug: str) -> Path:
+        return self.cache_dir / repo_dir_name(slug)
+
+    def _evict_over_budget(self) -> None:
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._stores) > 1:
+            slug, store = self._stores.popitem(last=False)
+            self._bytes -= store.nbytes
+            self.evictions += 1
+            logger.info(f"Evicted repo index {slug} ({store.nbytes / 1e6:.1f} MB) from memory")
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._stores
+
+    def __len__(self) -> int:
+        return len(self._stores)
+
+    def stats(self) -> dict:
+        return {
+            "resident": len(self._stores),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
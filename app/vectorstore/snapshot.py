@@ -0,0 +1,187 @@
+"""
+app/vectorstore/snapshot.py
+────────────────────────────
+Immutable, versioned snapshots of the base (portfolio + resume) indexes.
+
+    indexes/snapshots/<version>/portfolio/…   — FAISSStore files
+    indexes/snapshots/<version>/resume/…
+    indexes/snapshots/<version>/manifest.json
+    indexes/CURRENT                           — name of the live snapshot
+
+The manifest ties a snapshot to what produced it: embedding model and
+dimension, SHA-256 of the source files (portfolio.json, resume.pdf),
+per-index vector/chunk counts, build time, and the SHA-256 + size of
+every file (the basis of delta uploads). A snapshot is never modified
+after it is published; a rebuild writes a new one and flips CURRENT.
+
+Workers sharing INDEXES_DIR rebuild under build_lock(), so when several
+notice the same source change only one builds and the rest load its
+snapshot; CURRENT is replaced through a unique temp file either way.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from app.config import settings
+from app.vectorstore.faiss_store import FAISSStore
+
+try:
+    import fcntl
+except ImportError:  # Windows — single-process servers only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+BASE_INDEXES = ("portfolio", "resume")
+BUILD_LOCK_FILE = ".build.lock"
+
+
+class SnapshotMismatch(Exception):
+    """The snapshot was built with a different embedding model/dimension than the running one."""
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_hashes() -> dict[str, str | None]:
+    """SHA-256 of the files the base indexes are built from (None if absent)."""
+    hashes = {}
+    for path in (Path(settings.PORTFOLIO_JSON_PATH), Path(settings.RESUME_PDF_PATH)):
+        hashes[path.name] = file_sha256(path) if path.exists() else None
+    return hashes
+
+
+def current_snapshot(indexes_dir: Path) -> Path | None:
+    current = indexes_dir / CURRENT_FILE
+    if not current.exists():
+        return None
+    path = indexes_dir / SNAPSHOTS_DIR / current.read_text().strip()
+    return path if (path / MANIFEST_FILE).exists() else None
+
+
+def read_manifest(snapshot_dir: Path) -> dict:
+    return json.loads((snapshot_dir / MANIFEST_FILE).read_text())
+
+
+def check_compatible(manifest: dict) -> None:
+    """Raise SnapshotMismatch unless the snapshot was embedded with the running model."""
+    expected = (settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSION)
+    found = (manifest.get("embedding_model"), manifest.get("dimension"))
+    if found != expected:
+        raise SnapshotMismatch(
+            f"snapshot {manifest.get('version')} was built with {found[0]} (dim {found[1]}), "
+            f"running {expected[0]} (dim {expected[1]})"
+        )
+
+
+def write_snapshot(indexes_dir: Path, stores: dict[str, FAISSStore], build_info: dict | None = None) -> Path:
+    """
+    Publish `stores` as a new snapshot and make it current. If the live snapshot
+    already has identical content (same files, model and sources), it is kept.
+    """
+    root = indexes_dir / SNAPSHOTS_DIR
+    root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".tmp-", dir=root))
+    try:
+        for name, store in stores.items():
+            store.save(str(staging / name))
+        files = {
+            str(p.relative_to(staging)): {"sha256": file_sha256(p), "size": p.stat().st_size}
+            for p in sorted(staging.rglob("*")) if p.is_file()
+        }
+        sources = source_hashes()
+        content = hashlib.sha256(json.dumps(
+            [settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSION, files, sources], sort_keys=True
+        ).encode()).hexdigest()
+
+        live = current_snapshot(indexes_dir)
+        if live is not None and read_manifest(live).get("content_hash") == content:
+            shutil.rmtree(staging, ignore_errors=True)
+            logger.info(f"Snapshot unchanged — keeping {live.name}")
+            return live
+
+        now = datetime.now(timezone.utc)
+        version = f"{now:%Y%m%dT%H%M%S%fZ}-{content[:8]}"  # sorts by creation time
+        manifest = {
+            "version": version,
+            "created_at": now.isoformat(timespec="seconds"),
+            "embedding_model": settings.EMBEDDING_MODEL,
+            "dimension": settings.EMBEDDING_DIMENSION,
+            "content_hash": content,
+            "sources": sources,
+            "indexes": {
+                name: {
+                    "vectors": store.size,
+                    "chunks": len(store.metadata),
+                    "index_type": store.index_type,
+                    "storage": store.storage_label,
+                }
+                for name, store in stores.items()
+            },
+            "files": files,
+            "build": build_info or {},
+        }
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+        if (root / version).exists():  # another worker published the same content
+            shutil.rmtree(staging, ignore_errors=True)
+        else:
+            os.rename(staging, root / version)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    set_current(indexes_dir, version)
+    prune_snapshots(indexes_dir, settings.SNAPSHOT_KEEP)
+    logger.info(f"Published index snapshot {version}")
+    return root / version
+
+
+def set_current(indexes_dir: Path, version: str) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=f".{CURRENT_FILE}.", suffix=".tmp", dir=indexes_dir)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(version + "\n")
+        os.replace(tmp, indexes_dir / CURRENT_FILE)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def build_lock(indexes_dir: Path):
+    """Exclusive, cross-process lock for rebuilding the base indexes (no-op where fcntl is unavailable)."""
+    indexes_dir.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(indexes_dir / BUILD_LOCK_FILE, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def prune_snapshots(indexes_dir: Path, keep: int) -> None:
+    """Delete all but the newest `keep` snapshots (never the current one)."""
+    root = indexes_dir / SNAPSHOTS_DIR
+    live = current_snapshot(indexes_dir)
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for path in versions[:-keep] if keep > 0 else []:
+        if path != live:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"Pruned old snapshot {path.name}")
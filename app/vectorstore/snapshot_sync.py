@@ -0,0 +1,166 @@
+"""
+app/vectorstore/snapshot_sync.py
+─────────────────────────────────
+Delta upload / download of index snapshots to S3.
+
+Layout under s3://{S3_BUCKET_NAME}/{S3_INDEX_PREFIX}/:
+    objects/<sha256>            — file contents, content-addressed (written once)
+    snapshots/<version>.json    — snapshot manifest
+    CURRENT                     — version name of the live snapshot
+
+Only objects the bucket doesn't already have are sent, in parallel;
+files ≥ S3_MULTIPART_THRESHOLD go up as multipart uploads whose parts
+share the same worker pool. Objects are written before the manifest and
+the manifest before CURRENT, so whoever follows CURRENT never meets a
+missing object.
+
+`s3` is any boto3-compatible S3 client.
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from app.config import settings
+from app.vectorstore.snapshot import MANIFEST_FILE, SNAPSHOTS_DIR, read_manifest, set_current
+
+logger = logging.getLogger(__name__)
+
+
+def _prefix(prefix: str | None) -> str:
+    return (settings.S3_INDEX_PREFIX if prefix is None else prefix).strip("/")
+
+
+def existing_objects(s3, bucket: str, prefix: str | None = None) -> set[str]:
+    """SHA-256 names of every object already uploaded."""
+    base = f"{_prefix(prefix)}/objects/"
+    found, token = set(), None
+    while True:
+        kwargs = {"Bucket": bucket, "Prefix": base}
+        if token:
+            kwargs["ContinuationToken"] = token
+        page = s3.list_objects_v2(**kwargs)
+        found.update(obj["Key"][len(base):] for obj in page.get("Contents", []))
+        if not page.get("IsTruncated"):
+            return found
+        token = page["NextContinuationToken"]
+
+
+def upload_snapshot(s3, bucket: str, snapshot_dir: Path, prefix: str | None = None) -> dict:
+    """Upload a snapshot's missing objects, then its manifest, then point CURRENT at it."""
+    prefix = _prefix(prefix)
+    manifest = read_manifest(snapshot_dir)
+    have = existing_objects(s3, bucket, prefix)
+
+    todo: dict[str, tuple[Path, int]] = {}  # sha → file (identical files go up once)
+    for rel, info in manifest["files"].items():
+        if info["sha256"] not in have:
+            todo.setdefault(info["sha256"], (snapshot_dir / rel, info["size"]))
+
+    threshold = settings.S3_MULTIPART_THRESHOLD
+    part_size = settings.S3_MULTIPART_PART_SIZE
+    multipart: list[tuple[str, str, list]] = []  # (key, upload id, part futures)
+    with ThreadPoolExecutor(max_workers=settings.S3_UPLOAD_CONCURRENCY) as pool:
+        futures = []
+        try:
+            for sha, (path, size) in todo.items():
+                key = f"{prefix}/objects/{sha}"
+                if size < threshold:
+                    futures.append(pool.submit(_put_file, s3, bucket, key, path))
+                    continue
+                upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+                parts = [
+                    pool.submit(_upload_part, s3, bucket, key, upload_id, path, number, offset, part_size)
+                    for number, offset in enumerate(range(0, size, part_size), start=1)
+                ]
+                multipart.append((key, upload_id, parts))
+                futures.extend(parts)
+            for future in futures:
+                future.result()
+            for key, upload_id, parts in multipart:
+                s3.complete_multipart_upload(
+                    Bucket=bucket, Key=key, UploadId=upload_id,
+                    MultipartUpload={"Parts": [p.result() for p in parts]},
+                )
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            for key, upload_id, _ in multipart:
+                try:
+                    s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+                except Exception as e:
+                    logger.warning(f"Could not abort multipart upload of {key}: {e}")
+            raise
+
+    version = manifest["version"]
+    s3.put_object(
+        Bucket=bucket, Key=f"{prefix}/snapshots/{version}.json",
+        Body=json.dumps(manifest, indent=2).encode(), ContentType="application/json",
+    )
+    s3.put_object(Bucket=bucket, Key=f"{prefix}/CURRENT", Body=version.encode())
+
+    stats = {
+        "version": version,
+        "files": len(manifest["files"]),
+        "uploaded": len(todo),
+        "multipart": len(multipart),
+        "skipped": len(manifest["files"]) - len(todo),
+        "bytes": sum(size for _, size in todo.values()),
+    }
+    logger.info(
+        f"Uploaded snapshot {version} to s3://{bucket}/{prefix}: {stats['uploaded']} new objects "
+        f"({stats['bytes'] / 1e6:.1f} MB, {stats['multipart']} multipart), {stats['skipped']} already there"
+    )
+    return stats
+
+
+def _put_file(s3, bucket: str, key: str, path: Path) -> None:
+    s3.put_object(Bucket=bucket, Key=key, Body=path.read_bytes())
+
+
+def _upload_part(s3, bucket: str, key: str, upload_id: str, path: Path,
+                 number: int, offset: int, part_size: int) -> dict:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        body = f.read(part_size)
+    r = s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body)
+    return {"PartNumber": number, "ETag": r["ETag"]}
+
+
+def download_snapshot(s3, bucket: str, indexes_dir: Path, prefix: str | None = None) -> Path:
+    """Fetch the snapshot CURRENT points at (verifying every file's hash) and make it current locally."""
+    prefix = _prefix(prefix)
+    version = s3.get_object(Bucket=bucket, Key=f"{prefix}/CURRENT")["Body"].read().decode().strip()
+    root = Path(indexes_dir) / SNAPSHOTS_DIR
+    target = root / version
+    if (target / MANIFEST_FILE).exists():
+        set_current(Path(indexes_dir), version)
+        return target
+
+    raw = s3.get_object(Bucket=bucket, Key=f"{prefix}/snapshots/{version}.json")["Body"].read()
+    manifest = json.loads(raw)
+    root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".tmp-", dir=root))
+    try:
+        def fetch(item: tuple[str, dict]) -> None:
+            rel, info = item
+            data = s3.get_object(Bucket=bucket, Key=f"{prefix}/objects/{info['sha256']}")["Body"].read()
+            if hashlib.sha256(data).hexdigest() != info["sha256"]:
+                raise ValueError(f"Checksum mismatch for {rel} in snapshot {version}")
+            path = staging / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+
+        with ThreadPoolExecutor(max_workers=settings.S3_UPLOAD_CONCURRENCY) as pool:
+            list(pool.map(fetch, manifest["files"].items()))
+        (staging / MANIFEST_FILE).write_bytes(raw)
+        staging.rename(target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    set_current(Path(indexes_dir), version)
+    logger.info(f"Downloaded snapshot {version} from s3://{bucket}/{prefix}")
+    return target
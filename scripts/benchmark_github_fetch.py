@@ -0,0 +1,102 @@
+"""
+scripts/benchmark_github_fetch.py
+──────────────────────────────────
+Cold Repo Intelligence fetch wall time against a local mock GitHub API
+with simulated per-request latency: per-file /contents calls (sequential
+vs. concurrent) against a single tarball download of a fixture archive.
+
+Usage:
+    python scripts/benchmark_github_fetch.py
+    python scripts/benchmark_github_fetch.py --files 200 --latency-ms 120
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import base64
+import io
+import tarfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from app.config import settings
+from app.ingestion.github_fetcher import GitHubFetcher, create_github_client, git_blob_sha
+
+REPO = "bench/repo"
+
+
+def fixture_files(n_files: int) -> dict[str, str]:
+    files = {f"pkg/mod_{i}.py": ("def handler():\n    return 'ok'\n" * 40) for i in range(n_files)}
+    files["README.md"] = "# Bench\n"
+    return files
+
+
+def fixture_archive(files: dict[str, str]) -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for path, content in files.items():
+            data = content.encode()
+            info = tarfile.TarInfo(f"bench-repo-0000000/{path}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def mock_github(files: dict[str, str], archive: bytes, latency: float):
+    counter = {"requests": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counter["requests"] += 1
+        await asyncio.sleep(latency)
+        path = request.url.path
+        if "/git/trees/" in path:
+            tree = [
+                {"type": "blob", "path": p, "size": len(c), "sha": git_blob_sha(c.encode())}
+                for p, c in files.items()
+            ]
+            return httpx.Response(200, json={"tree": tree})
+        if path.endswith("/tarball"):
+            return httpx.Response(200, content=archive)
+        file_path = path.split("/contents/", 1)[1]
+        return httpx.Response(200, json={"content": base64.b64encode(files[file_path].encode()).decode()})
+
+    return handler, counter
+
+
+async def run(files: dict[str, str], archive: bytes, latency: float, mode: str, concurrency: int):
+    settings.GITHUB_FETCH_MODE = mode
+    settings.GITHUB_FETCH_CONCURRENCY = concurrency
+    handler, counter = mock_github(files, archive, latency)
+    async with create_github_client(transport=httpx.MockTransport(handler)) as client:
+        fetcher = GitHubFetcher(client=client)
+        t0 = time.perf_counter()
+        update = await fetcher.fetch_repo_update(REPO)
+        return time.perf_counter() - t0, len(update.state["files"]), len(update.chunks), counter["requests"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="simulated per-request latency")
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    files = fixture_files(args.files)
+    archive = fixture_archive(files)
+    print(
+        f"mock repo: {len(files)} files, archive {len(archive) / 1024:.0f} KB, "
+        f"{args.latency_ms:.0f} ms per request\n"
+    )
+    print(f"{'mode':<9} {'concurrency':>11} {'wall s':>8} {'requests':>9} {'files':>6} {'chunks':>7}")
+    runs = [("contents", 1), ("contents", 8), ("contents", 16), ("tarball", 8)]
+    for mode, concurrency in runs:
+        wall, n_files, n_chunks, n_requests = asyncio.run(run(files, archive, latency, mode, concurrency))
+        print(f"{mode:<9} {concurrency:>11} {wall:>8.2f} {n_requests:>9} {n_files:>6} {n_chunks:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+scripts/benchmark_index.py
+───────────────────────────
+Recall-vs-latency benchmark of FAISSStore index types against the exact flat baseline.
+
+Uses synthetic clustered unit vectors (shaped like sentence embeddings) by
+default, or the vectors of an existing index directory with --from-index.
+
+Usage:
+    python scripts/benchmark_index.py                       # 50k synthetic vectors
+    python scripts/benchmark_index.py --n 200000 --k 6
+    python scripts/benchmark_index.py --from-index indexes/portfolio
+"""
+
+import sys
+import os
+import argparse
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss
+import numpy as np
+
+from app.config import settings
+from app.vectorstore.faiss_store import FAISSStore
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    assign = rng.integers(0, clusters, n)
+    vecs = centers[assign] + 0.6 * rng.standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(vecs)
+    return vecs
+
+
+def vectors_from_index(dir_path: str) -> np.ndarray:
+    index = faiss.read_index(os.path.join(dir_path, "index.faiss"))
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def build(index_type: str, vecs: np.ndarray) -> tuple[FAISSStore, float]:
+    store = FAISSStore(dimension=vecs.shape[1], index_type=index_type)
+    chunks = [{"text": "", "source": "bench", "type": "bench"}] * len(vecs)
+    t0 = time.perf_counter()
+    store.add_embeddings(chunks, vecs)
+    return store, time.perf_counter() - t0
+
+
+def run_queries(store: FAISSStore, queries: np.ndarray, k: int) -> tuple[np.ndarray, float]:
+    ids = np.empty((len(queries), k), dtype="int64")
+    t0 = time.perf_counter()
+    for i, q in enumerate(queries):
+        _, idx = store.index.search(q.reshape(1, -1), k)  # single-query, like a chat request
+        ids[i] = idx[0]
+    per_query_ms = (time.perf_counter() - t0) / len(queries) * 1000
+    return ids, per_query_ms
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=50_000, help="synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=settings.TOP_K_RETRIEVAL)
+    parser.add_argument("--from-index", help="benchmark the vectors of an existing index dir")
+    args = parser.parse_args()
+
+    if args.from_index:
+        vecs = vectors_from_index(args.from_index)
+        rng = np.random.default_rng(1)
+        queries = vecs[rng.integers(0, len(vecs), args.queries)]
+        queries = queries + 0.05 * rng.standard_normal(queries.shape).astype("float32")
+        faiss.normalize_L2(queries)
+    else:
+        vecs = synthetic_vectors(args.n, settings.EMBEDDING_DIMENSION)
+        queries = synthetic_vectors(args.queries, settings.EMBEDDING_DIMENSION, seed=1)
+    k = min(args.k, len(vecs))
+    print(f"corpus={len(vecs)} dim={vecs.shape[1]} queries={len(queries)} k={k}\n")
+
+    flat, flat_build = build("flat", vecs)
+    truth, flat_ms = run_queries(flat, queries, k)
+    print(f"{'index':<8} {'setting':<14} {'build s':>8} {'ms/query':>9} {'recall@k':>9}")
+    print(f"{'flat':<8} {'exact':<14} {flat_build:>8.2f} {flat_ms:>9.3f} {1.0:>9.3f}")
+
+    sweeps = {
+        "hnsw": ("efSearch", [16, 32, 64, 128, 256]),
+        "ivf": ("nprobe", [1, 4, 8, 16, 32, 64]),
+        "ivfpq": ("nprobe", [4, 16, 32, 64]),
+    }
+    for index_type, (knob, values) in sweeps.items():
+        if index_type != "hnsw" and len(vecs) < 39 * 16:
+            print(f"{index_type:<8} skipped (corpus too small to train)")
+            continue
+        store, build_s = build(index_type, vecs)
+        for value in values:
+            store.params[knob] = value
+            store._apply_search_params()
+            found, ms = run_queries(store, queries, k)
+            print(
+                f"{index_type:<8} {f'{knob}={value}':<14} {build_s:>8.2f} "
+                f"{ms:>9.3f} {recall_at_k(found, truth):>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+scripts/benchmark_persona_guard.py
+───────────────────────────────────
+Per-query cost of off-topic + project detection: the previous substring
+loops (every pattern / project checked with `in`, lowercase strings rebuilt
+per request) vs one Aho-Corasick scan over a prebuilt automaton.
+
+Usage:
+    python scripts/benchmark_persona_guard.py
+    python scripts/benchmark_persona_guard.py --projects 100 500 2000 --queries 5000
+"""
+
+import sys
+import os
+import argparse
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.persona_guard import OFF_TOPIC_PATTERNS, PersonaGuard, build_query_matcher
+
+WORDS = (
+    "cloud data stream vision graph neural edge smart pulse nova orbit quantum "
+    "ledger atlas echo forge relay spark vector delta prism beacon harbor"
+).split()
+
+
+def make_portfolio(n: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    projects = []
+    for i in range(n):
+        words = rng.sample(WORDS, 2)
+        name = f"{words[0].title()} {words[1].title()} {i}"
+        slug = f"{words[0]}-{words[1]}-{i}"
+        projects.append({"name": name, "slug": slug, "github_repo": f"someone/{slug}"})
+    return {"projects": projects}
+
+
+def make_queries(portfolio: dict, n: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    projects = portfolio["projects"]
+    templates = [
+        "How did you design the backend of {p}?",
+        "What tech stack does {p} use and why did you pick it over the alternatives?",
+        "Tell me about your experience with distributed systems and cloud deployments.",
+        "Can you walk me through the hardest bug you fixed recently?",
+        "any good recipes for dinner?",
+    ]
+    return [rng.choice(templates).format(p=rng.choice(projects)["name"]) for _ in range(n)]
+
+
+def naive(query: str, portfolio: dict) -> tuple[bool, str | None]:
+    """The pre-automaton implementation."""
+    query_lower = query.lower()
+    off_topic = any(pattern in query_lower for pattern in OFF_TOPIC_PATTERNS)
+    for project in portfolio.get("projects", []):
+        name = project.get("name", "").lower()
+        slug = project.get("slug", "").lower()
+        if name in query_lower or slug in query_lower:
+            return off_topic, project.get("github_repo", "")
+    return off_topic, None
+
+
+def per_query_us(fn, queries: list[str]) -> float:
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - t0) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    guard = PersonaGuard()
+    print(f"{'projects':>8} {'patterns':>9} {'build ms':>9} {'naive µs':>9} {'automaton µs':>13} {'speedup':>8}")
+    for n in args.projects:
+        portfolio = make_portfolio(n)
+        queries = make_queries(portfolio, args.queries)
+
+        t0 = time.perf_counter()
+        matcher = build_query_matcher(portfolio)
+        build_ms = (time.perf_counter() - t0) * 1000
+        guard.scan_query("warm-up", portfolio)  # builds the guard's own automaton once
+
+        naive_us = per_query_us(lambda q: naive(q, portfolio), queries)
+        ac_us = per_query_us(lambda q: guard.scan_query(q, portfolio), queries)
+        print(
+            f"{n:>8} {len(matcher):>9} {build_ms:>9.1f} {naive_us:>9.1f} "
+            f"{ac_us:>13.1f} {naive_us / ac_us:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+scripts/benchmark_quantization.py
+──────────────────────────────────
+Memory / load time / latency / recall@k of quantized vector storage
+(fp16, int8 scalar quantization) against the exact float32 baseline.
+
+By default benchmarks the vectors of every index on disk (current
+portfolio/resume snapshot or legacy dirs, plus all cached repo indexes);
+falls back to synthetic vectors when there are fewer than --min-vectors.
+Queries are corpus vectors with a little noise, so the same-text neighbour
+and its near duplicates are what recall has to find.
+
+Usage:
+    python scripts/benchmark_quantization.py                  # real indexes under INDEXES_DIR
+    python scripts/benchmark_quantization.py --synthetic 200000
+    python scripts/benchmark_quantization.py --types flat hnsw --k 6
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import faiss
+import numpy as np
+
+from app.config import settings
+from app.vectorstore.faiss_store import VECTOR_STORAGE, FAISSStore
+from app.vectorstore.snapshot import current_snapshot
+from scripts.benchmark_index import recall_at_k, run_queries, synthetic_vectors
+
+
+def index_dirs(indexes_dir: Path) -> list[Path]:
+    base = current_snapshot(indexes_dir) or indexes_dir
+    dirs = [base / "portfolio", base / "resume"]
+    cache = indexes_dir / "github_cache"
+    if cache.exists():
+        dirs += sorted(d for d in cache.iterdir() if d.is_dir() and not d.name.startswith("."))
+    return [d for d in dirs if (d / "index.faiss").exists()]
+
+
+def real_vectors(indexes_dir: Path) -> tuple[np.ndarray, int]:
+    dirs = index_dirs(indexes_dir)
+    parts = [FAISSStore.load(str(d), mmap=False).vectors() for d in dirs]
+    parts = [p for p in parts if len(p)]
+    vecs = np.vstack(parts) if parts else np.empty((0, settings.EMBEDDING_DIMENSION), dtype="float32")
+    return vecs, len(dirs)
+
+
+def measure(index_type: str, storage: str, vecs: np.ndarray, queries: np.ndarray,
+            truth: np.ndarray, k: int, workdir: Path) -> dict:
+    store = FAISSStore(dimension=vecs.shape[1], index_type=index_type, storage=storage)
+    chunks = [{"text": "", "source": "bench", "type": "bench"}] * len(vecs)
+    t0 = time.perf_counter()
+    store.add_embeddings(chunks, vecs)
+    build_s = time.perf_counter() - t0
+
+    path = workdir / f"{index_type}-{storage}"
+    store.save(str(path))
+    t0 = time.perf_counter()
+    loaded = FAISSStore.load(str(path), mmap=False)
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    found, ms = run_queries(loaded, queries, k)
+    return {
+        "build_s": build_s,
+        "load_ms": load_ms,
+        "index_bytes": (path / "index.faiss").stat().st_size,
+        "ms": ms,
+        "recall": recall_at_k(found, truth),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--indexes-dir", default=settings.INDEXES_DIR)
+    parser.add_argument("--synthetic", type=int, default=50_000, help="corpus size if real data is too small")
+    parser.add_argument("--min-vectors", type=int, default=1_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=settings.TOP_K_RETRIEVAL)
+    parser.add_argument("--types", nargs="+", default=["flat", "hnsw"], choices=["flat", "hnsw", "ivf"])
+    args = parser.parse_args()
+
+    vecs, n_dirs = real_vectors(Path(args.indexes_dir))
+    rng = np.random.default_rng(1)
+    if len(vecs) >= args.min_vectors:
+        source = f"{n_dirs} real index(es) under {args.indexes_dir}"
+    else:
+        print(f"Only {len(vecs)} real vectors — using {args.synthetic} synthetic ones")
+        vecs = synthetic_vectors(args.synthetic, settings.EMBEDDING_DIMENSION)
+        source = "synthetic"
+    queries = vecs[rng.integers(0, len(vecs), args.queries)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype("float32")
+    faiss.normalize_L2(queries)
+    k = min(args.k, len(vecs))
+    print(f"corpus={len(vecs)} ({source}) dim={vecs.shape[1]} queries={len(queries)} k={k}\n")
+
+    exact = FAISSStore(dimension=vecs.shape[1], index_type="flat", storage="float32")
+    exact.add_embeddings([{"text": "", "source": "bench", "type": "bench"}] * len(vecs), vecs)
+    truth, _ = run_queries(exact, queries, k)
+
+    print(f"{'index':<6} {'storage':<8} {'index MB':>9} {'vs f32':>7} {'load ms':>8} "
+          f"{'build s':>8} {'ms/query':>9} {'recall@k':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for index_type in args.types:
+            if index_type == "ivf" and len(vecs) < 39 * 16:
+                print(f"{index_type:<6} skipped (corpus too small to train)")
+                continue
+            baseline = None
+            for storage in VECTOR_STORAGE:
+                r = measure(index_type, storage, vecs, queries, truth, k, Path(tmp))
+                baseline = baseline or r["index_bytes"]
+                print(
+                    f"{index_type:<6} {storage:<8} {r['index_bytes'] / 1e6:>9.2f} "
+                    f"{r['index_bytes'] / baseline:>6.2f}x {r['load_ms']:>8.1f} {r['build_s']:>8.2f} "
+                    f"{r['ms']:>9.3f} {r['recall']:>9.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+scripts/benchmark_sse.py
+─────────────────────────
+Chat stream cost per response — the previous token_generator (json.dumps +
+f-string + one SSE frame per chunk) vs pre-encoded frames with coalescing —
+driven through a StreamingResponse with a counting ASGI `send`. Each
+http.response.body message is one transport write (≈ one send syscall under
+uvicorn); CPU is process time, so the simulated network gaps don't count.
+
+Sources: a cached answer replayed in 48-char slices (no gaps), and an LLM-like
+stream of short chunks arriving in bursts.
+
+Usage:
+    python scripts/benchmark_sse.py
+    python scripts/benchmark_sse.py --responses 50 --tokens 800 --burst 6 --gap-ms 3
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.utils.sse import DONE_FRAME, ORJSON_AVAILABLE, coalesce, token_frame
+
+WORDS = "the retrieval pipeline embeds each query once and reuses it for the cache lookup".split()
+
+
+def make_tokens(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [rng.choice(WORDS) + rng.choice([" ", " ", ", ", ". "]) for _ in range(n)]
+
+
+async def llm_source(tokens: list[str], burst: int, gap: float):
+    for i, token in enumerate(tokens):
+        if i and i % burst == 0:
+            await asyncio.sleep(gap)
+        yield token
+
+
+async def replay_source(tokens: list[str]):
+    text = "".join(tokens)
+    for i in range(0, len(text), 48):
+        yield text[i:i + 48]
+
+
+async def legacy_stream(source):
+    """The pre-coalescing token_generator."""
+    async for token in source:
+        payload = json.dumps({"type": "token", "data": token})
+        yield f"data: {payload}\n\n"
+    yield f"data: {json.dumps({'type': 'done', 'data': ''})}\n\n"
+
+
+async def coalesced_stream(source):
+    async for text in coalesce(source):
+        yield token_frame(text)
+    yield DONE_FRAME
+
+
+async def run(make_stream, make_source, responses: int) -> tuple[float, float, float]:
+    """(sends per response, CPU ms per response, wall ms per response)."""
+    sends = 0
+
+    async def receive():
+        await asyncio.sleep(3600)  # never disconnects
+
+    async def send(message):
+        nonlocal sends
+        if message["type"] == "http.response.body":
+            sends += 1
+
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}, "http_version": "1.1"}
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(responses):
+        response = StreamingResponse(make_stream(make_source()), media_type="text/event-stream")
+        await response(scope, receive, send)
+    cpu = (time.process_time() - cpu0) / responses * 1000
+    wall = (time.perf_counter() - wall0) / responses * 1000
+    return sends / responses, cpu, wall
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--responses", type=int, default=30)
+    parser.add_argument("--tokens", type=int, default=600, help="chunks per LLM response")
+    parser.add_argument("--burst", type=int, default=8, help="chunks that arrive back to back")
+    parser.add_argument("--gap-ms", type=float, default=2.0, help="pause between bursts")
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.tokens)
+    sources = {
+        "cached replay": lambda: replay_source(tokens),
+        "llm bursts": lambda: llm_source(tokens, args.burst, args.gap_ms / 1000),
+    }
+    print(
+        f"orjson: {ORJSON_AVAILABLE}   coalesce: {settings.SSE_COALESCE_CHARS} chars / "
+        f"{settings.SSE_COALESCE_WINDOW_MS} ms window\n"
+    )
+    print(f"{'source':<14} {'stream':<10} {'sends':>7} {'CPU ms':>8} {'wall ms':>8}")
+    for name, make_source in sources.items():
+        for label, make_stream in (("legacy", legacy_stream), ("coalesced", coalesced_stream)):
+            sends, cpu, wall = await run(make_stream, make_source, args.responses)
+            print(f"{name:<14} {label:<10} {sends:>7.0f} {cpu:>8.2f} {wall:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,165 +1,219 @@
 """
-app/core/claude_client.py
-──────────────────────────
-Google Gemini API integration with identity injection.
+scripts/build_index.py
+───────────────────────
+Offline index build: portfolio, resume and (with --repos) every project's
+GitHub repo, so the server starts with nothing left to embed.
+
+Stages:
+1. collect  — portfolio chunks, resume PDF and GitHub repos, concurrently
+2. embed    — all unique chunk texts at once; the persistent embedding cache
+              first, then the misses sharded across worker processes
+3. compact  — the embedding cache rewritten with only the texts the indexes
+              use after this build (this one's plus repo indexes it leaves as is)
+4. write    — FAISS indexes built in parallel threads; portfolio + resume
+              published as a new versioned snapshot (app/vectorstore/snapshot.py),
+              repo indexes saved (atomically) under github_cache
+
+The snapshot manifest records the model, counts, file hashes and this
+build's stats/timings; a per-stage timing and size report (embedding cache
+included) is printed.
+
+Usage:
+    python scripts/build_index.py                   # portfolio + resume
+    python scripts/build_index.py --repos           # + every project's github_repo
+    python scripts/build_index.py --workers 8       # embedding processes (default: cores / 2)
 """
 
-import google.generativeai as genai
-import logging
+import sys
+import os
+import argparse
 import asyncio
 import json
-import os
-from typing import AsyncGenerator
-from dotenv import load_dotenv
-
-load_dotenv()
-
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.config import settings
+from app.ingestion.embedder import Embedder
+from app.ingestion.embedding_cache import PersistentEmbeddingCache, get_embedding_cache
+from app.ingestion.github_fetcher import GitHubFetcher
+from app.ingestion.portfolio_loader import PortfolioLoader
+from app.ingestion.resume_loader import ResumeLoader
+from app.vectorstore.build_executor import embed_in_worker, start_embed_pool
+from app.vectorstore.faiss_store import FAISSStore
+from app.vectorstore.index_manager import REPO_STATE_FILE
+from app.vectorstore.repo_index_cache import repo_dir_name
+from app.vectorstore.snapshot import BASE_INDEXES, read_manifest, write_snapshot
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(message)s")
 logger = logging.getLogger(__name__)
 
-_GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
-_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-preview-04-17")
-
-if not _GEMINI_API_KEY:
-    logger.error("GEMINI_API_KEY not found in .env file!")
-else:
-    genai.configure(api_key=_GEMINI_API_KEY)
-    logger.info(f"Gemini configured. Model: {_MODEL_NAME}")
-
-
-def _load_identity_block() -> str:
-    try:
-        with open("data/portfolio.json", "r") as f:
-            p = json.load(f)
-
-        identity = p.get("identity", {})
-        skills = p.get("skills", {})
-        projects = p.get("projects", [])
-        certs = p.get("certifications", [])
-        achievements = p.get("achievements", [])
-
-        project_lines = []
-        for proj in projects:
-            line = f"  - {proj['name']}: {proj.get('description', '')[:100]}"
-            if proj.get("github_url"):
-                line += f" | GitHub: {proj['github_url']}"
-            if proj.get("demo_url"):
-                line += f" | Demo: {proj['demo_url']}"
-            project_lines.append(line)
-
-        cert_lines = [
-            f"  - {c['name']} by {c['issuer']} ({c.get('year', '')})"
-            for c in certs
-        ]
-
-        ach_lines = [
-            f"  - {a['title']} ({a.get('year', '')})"
-            for a in achievements
-        ]
-
-        github_username = identity.get('github', '').replace('https://github.com/', '') if identity.get('github') else ''
-        wp = identity.get('work_preferences', {})
-
-        block = f"""
-VENKAT'S CORE IDENTITY (Always use these exact facts — never say you don't know these):
-Full Name:     {identity.get('full_name', identity.get('name', ''))}
-Role:          {identity.get('tagline', '')}
-Email:         {identity.get('email', '')}
-Location:      {identity.get('location', '')}
-GitHub URL:    {identity.get('github', '')}
-GitHub User:   {github_username}
-LinkedIn:      {identity.get('linkedin', '')}
-Portfolio:     {identity.get('portfolio_url', '')}
-Experience:    {identity.get('years_of_experience', '')} years
-
-WORK PREFERENCES (Answer directly and confidently — do NOT say "I don't have info"):
-Open to Relocate:  {wp.get('relocation', 'Yes — open to relocate anywhere in India or abroad')}
-Remote Work:       {wp.get('remote_work', 'Yes — fully comfortable with remote, hybrid, or on-site')}
-Preferred Cities:  {', '.join(wp.get('preferred_locations', ['Bangalore', 'Hyderabad', 'Remote', 'Any location']))}
-Notice Period:     {wp.get('notice_period', 'Immediate to 30 days')}
-Employment Type:   {', '.join(wp.get('employment_type', ['Full-time', 'Contract']))}
-Key Message:       {wp.get('open_to', 'Location has never been a barrier — what matters is great work, great team, and meaningful problems.')}
-
-Top AI/ML Skills: {', '.join(skills.get('ai_ml', [])[:6])}
-Backend Skills:   {', '.join(skills.get('backend', [])[:5])}
-Cloud Skills:     {', '.join(skills.get('cloud', [])[:3])}
-
-Projects (with links):
-{chr(10).join(project_lines)}
-
-Certifications:
-{chr(10).join(cert_lines)}
-
-Key Achievements:
-{chr(10).join(ach_lines[:3])}""".strip()
-        return block
-    except Exception as e:
-        logger.warning(f"Could not load identity block: {e}")
-        return ""
-
-
-_IDENTITY_BLOCK = _load_identity_block()
-
-
-def _build_augmented_message(user_query: str, context_chunks: list[str]) -> str:
-    context_block = "\n\n".join(context_chunks) if context_chunks else "(No additional context retrieved)"
-
-    return f"""
-{_IDENTITY_BLOCK}
-
----
-ADDITIONAL RETRIEVED CONTEXT FROM PORTFOLIO DATABASE:
-{context_block}
----
-
-CRITICAL RULES:
-- When user asks for GitHub/LinkedIn/demo/portfolio URLs → provide the EXACT URLs from identity block above
-- When user asks for GitHub username → extract it from the GitHub URL above
-- NEVER say "I don't have that information" for anything shown in the identity block
-- Always speak in first person as Venkat
-- For unknown topics, use the Unknown Question Protocol
-
-USER QUESTION: {user_query}
-""".strip()
-
-
-async def stream_claude(
-    system_prompt: str,
-    user_query: str,
-    context_chunks: list[str],
-) -> AsyncGenerator[str, None]:
-    if not _GEMINI_API_KEY:
-        yield "GEMINI_API_KEY missing in .env file. Please add it and restart."
-        return
-
-    try:
-        model = genai.GenerativeModel(
-            model_name=_MODEL_NAME,
-            system_instruction=system_prompt,
+SHARD_SIZE = 256  # texts per worker task
+
+
+# ── Stage 1: collect ──────────────────────────────────────────────────
+
+async def collect(with_repos: bool, indexes_dir: Path) -> dict[str, dict]:
+    """name → {"dir", "chunks", "state"} for every index to build ("dir" None: part of the snapshot)."""
+    portfolio_loader = PortfolioLoader()
+    portfolio = portfolio_loader.load(settings.PORTFOLIO_JSON_PATH)
+
+    slugs = list(dict.fromkeys(
+        p["github_repo"] for p in portfolio.get("projects", []) if p.get("github_repo")
+    )) if with_repos else []
+
+    fetcher = GitHubFetcher()
+    portfolio_chunks, resume_chunks, *updates = await asyncio.gather(
+        asyncio.to_thread(portfolio_loader.build_chunks, portfolio),
+        asyncio.to_thread(ResumeLoader().load_and_chunk, settings.RESUME_PDF_PATH),
+        *(fetcher.fetch_repo_update(slug) for slug in slugs),
+    )
+
+    targets = {
+        "portfolio": {"dir": None, "chunks": portfolio_chunks, "state": None},
+        "resume": {"dir": None, "chunks": resume_chunks, "state": None},
+    }
+    for slug, update in zip(slugs, updates):
+        if not update.chunks:
+            logger.warning(f"Nothing fetched for {slug} — it will be built on first request")
+            continue
+        targets[f"repo:{slug}"] = {
+            "dir": indexes_dir / "github_cache" / repo_dir_name(slug),
+            "chunks": update.chunks,
+            "state": update.state,
+        }
+    return targets
+
+
+# ── Stage 2: embed ────────────────────────────────────────────────────
+
+def embed_all(
+    texts: list[str], workers: int, cache: PersistentEmbeddingCache | None
+) -> tuple[dict[str, np.ndarray], dict]:
+    """Embed every unique text once. Returns text → vector and cache/shard stats."""
+    unique = list(dict.fromkeys(texts))
+    if cache is not None:
+        vectors, missing = cache.lookup(unique)
+    else:
+        vectors, missing = np.zeros((len(unique), settings.EMBEDDING_DIMENSION), dtype="float32"), list(range(len(unique)))
+    todo = [unique[i] for i in missing]
+
+    if todo:
+        shards = [todo[i:i + SHARD_SIZE] for i in range(0, len(todo), SHARD_SIZE)]
+        workers = max(1, min(workers, len(shards)))
+        if workers == 1:
+            computed = Embedder().embed_batch(todo)
+        else:
+            # The cache is handled here, in one process; workers only run the model
+            with start_embed_pool(workers) as pool:
+                computed = np.vstack(list(pool.map(partial(embed_in_worker, use_cache=False), shards)))
+        vectors[missing] = computed
+        if cache is not None:
+            cache.add(todo, computed)
+
+    stats = {
+        "texts": len(texts),
+        "unique": len(unique),
+        "cached": len(unique) - len(todo),
+        "embedded": len(todo),
+        "workers": workers if todo else 0,
+    }
+    return dict(zip(unique, vectors)), stats
+
+
+# ── Stage 3: compact ──────────────────────────────────────────────────
+
+def referenced_texts(indexes_dir: Path, targets: dict[str, dict]) -> set[str]:
+    """Chunk texts in use after this build: its own, plus those of repo indexes on disk it doesn't rebuild."""
+    texts = {c["text"] for t in targets.values() for c in t["chunks"]}
+    rebuilt = {t["dir"] for t in targets.values() if t["dir"] is not None}
+    cache_dir = indexes_dir / "github_cache"
+    for path in sorted(cache_dir.iterdir()) if cache_dir.exists() else []:
+        if path.name.startswith(".") or path in rebuilt or not (path / "index.faiss").exists():
+            continue
+        texts.update(r["text"] for r in FAISSStore.load(str(path), mmap=True).metadata)
+    return texts
+
+
+# ── Stage 4: write ────────────────────────────────────────────────────
+
+def write_index(target: dict, vectors: dict[str, np.ndarray]) -> FAISSStore:
+    store = FAISSStore(storage=settings.REPO_VECTOR_STORAGE if target["dir"] is not None else None)
+    chunks = target["chunks"]
+    if chunks:
+        store.add_embeddings(chunks, np.stack([vectors[c["text"]] for c in chunks]))
+    if target["dir"] is not None:
+        extra = {REPO_STATE_FILE: json.dumps(target["state"], indent=2)} if target["state"] else None
+        store.save(str(target["dir"]), extra_files=extra, versioned=True)
+    return store
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repos", action="store_true", help="also build every project's GitHub repo index")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="embedding processes")
+    parser.add_argument("--output", default=settings.INDEXES_DIR, help="indexes directory")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the persistent embedding cache")
+    args = parser.parse_args(argv)
+
+    output = Path(args.output)
+    cache = None if args.no_cache else get_embedding_cache(args.output)
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+
+    t0 = time.perf_counter()
+    targets = asyncio.run(collect(args.repos, output))
+    timings["collect"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    all_texts = [c["text"] for t in targets.values() for c in t["chunks"]]
+    vectors, embed_stats = embed_all(all_texts, args.workers, cache)
+    timings["embed"] = time.perf_counter() - t0
+
+    cache_stats = None
+    if cache is not None:
+        t0 = time.perf_counter()
+        cache_stats = cache.compact(referenced_texts(output, targets))
+        timings["compact"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 1)) as pool:
+        stores = dict(zip(targets, pool.map(lambda t: write_index(t, vectors), targets.values())))
+    build_info = {
+        "embedding": embed_stats,
+        "embedding_cache": cache_stats,
+        "timings": {k: round(v, 3) for k, v in timings.items()},
+    }
+    snapshot = write_snapshot(output, {name: stores[name] for name in BASE_INDEXES}, build_info)
+    timings["write"] = time.perf_counter() - t0
+    timings["total"] = time.perf_counter() - started
+
+    manifest = read_manifest(snapshot)
+    print(f"\nSnapshot {manifest['version']}  ({manifest['embedding_model']}, dim {manifest['dimension']})\n")
+    print(f"{'stage':<10} {'seconds':>8}")
+    for stage, seconds in timings.items():
+        print(f"{stage:<10} {seconds:>8.2f}")
+    print(
+        f"\nembedding: {embed_stats['unique']} unique texts, {embed_stats['cached']} from cache, "
+        f"{embed_stats['embedded']} embedded on {embed_stats['workers']} worker(s)"
+    )
+    if cache_stats is not None:
+        print(
+            f"embedding cache: {cache_stats['rows']} rows, {cache_stats['bytes'] / 1e6:.1f} MB "
+            f"({cache_stats['rows_before'] - cache_stats['rows']} unreferenced rows dropped)"
         )
-
-        augmented_message = _build_augmented_message(user_query, context_chunks)
-
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: model.generate_content(augmented_message, stream=True)
-        )
-
-        for chunk in response:
-            if chunk.text:
-                yield chunk.text
-
-    except Exception as e:
-        logger.error(f"Gemini API error: {e}")
-        yield "Sorry, something went wrong. Please try again."
+    print()
+    print(f"{'index':<40} {'type':<6} {'storage':<8} {'vectors':>8} {'size KB':>9}")
+    for name, store in stores.items():
+        print(f"{name:<40} {store.index_type:<6} {store.storage_label:<8} {store.size:>8} {store.nbytes / 1024:>9.1f}")
 
 
-async def complete_claude(
-    system_prompt: str,
-    user_query: str,
-    context_chunks: list[str],
-) -> str:
-    full_response = ""
-    async for token in stream_claude(system_prompt, user_query, context_chunks):
-        full_response += token
-    return full_response
\ No newline at end of file
+if __name__ == "__main__":
+    main()
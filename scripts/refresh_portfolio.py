@@ -2,25 +2,34 @@
 scripts/refresh_portfolio.py
 ──────────────────────────────
 Rebuild all indexes after updating portfolio.json or resume.pdf.
-Optionally uploads to S3 and triggers ECS rolling deployment.
+The portfolio and resume indexes are published as a new versioned snapshot
+(see app/vectorstore/snapshot.py). Cached GitHub repo indexes are refreshed
+incrementally (only files whose blob SHA changed are re-fetched and
+re-embedded) instead of being wiped.
+Optionally uploads the snapshot to S3 (only objects the bucket doesn't have
+yet) and triggers ECS rolling deployment.
 
 Usage:
     python scripts/refresh_portfolio.py              # local only
     python scripts/refresh_portfolio.py --deploy     # + S3 upload + ECS deploy
+    python scripts/refresh_portfolio.py --pull       # fetch the current snapshot from S3 instead
 """
 
 import sys
 import os
 import argparse
+import asyncio
 import logging
-import shutil
+from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.config import settings
+from app.ingestion.github_fetcher import GitHubFetcher
 from app.ingestion.portfolio_loader import PortfolioLoader
 from app.ingestion.resume_loader import ResumeLoader
 from app.vectorstore.index_manager import IndexManager
+from app.vectorstore.snapshot_sync import download_snapshot, upload_snapshot
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(message)s")
 logger = logging.getLogger(__name__)
@@ -36,39 +45,42 @@ def rebuild_indexes():
     resume_loader = ResumeLoader()
     resume_chunks = resume_loader.load_and_chunk(settings.RESUME_PDF_PATH)
 
-    logger.info("Clearing GitHub repo cache...")
-    github_cache = os.path.join(settings.INDEXES_DIR, "github_cache")
-    if os.path.exists(github_cache):
-        shutil.rmtree(github_cache)
-        os.makedirs(github_cache)
-
     index_manager = IndexManager()
-    index_manager.build_portfolio_index(portfolio_chunks)
-    index_manager.build_resume_index(resume_chunks)
+    index_manager.build_base_indexes(portfolio_chunks, resume_chunks)
+
+    logger.info("Refreshing cached GitHub repo indexes...")
+    asyncio.run(refresh_repo_indexes(index_manager))
+    index_manager.close()
 
-    logger.info(f"Done. Portfolio: {index_manager.portfolio_index.size} vecs, Resume: {index_manager.resume_index.size} vecs")
+    logger.info(
+        f"Done. Snapshot {index_manager.version} — Portfolio: {index_manager.portfolio_index.size} vecs, "
+        f"Resume: {index_manager.resume_index.size} vecs"
+    )
     return index_manager
 
 
-def upload_to_s3():
+async def refresh_repo_indexes(index_manager: IndexManager):
+    fetcher = GitHubFetcher()
+    for slug in index_manager.cached_repo_slugs():
+        outcome = await index_manager.refresh_repo_index(slug, fetcher)
+        logger.info(f"  {slug}: {outcome}")
+
+
+def upload_to_s3(snapshot_dir: Path):
     try:
         import boto3
         s3 = boto3.client("s3", region_name=settings.AWS_REGION)
-        files = [
-            "indexes/portfolio/index.faiss",
-            "indexes/portfolio/metadata.pkl",
-            "indexes/resume/index.faiss",
-            "indexes/resume/metadata.pkl",
-        ]
-        for f in files:
-            if os.path.exists(f):
-                key = f
-                s3.upload_file(f, settings.S3_BUCKET_NAME, key)
-                logger.info(f"Uploaded {f} to s3://{settings.S3_BUCKET_NAME}/{key}")
+        upload_snapshot(s3, settings.S3_BUCKET_NAME, snapshot_dir)
     except Exception as e:
         logger.error(f"S3 upload failed: {e}")
 
 
+def pull_from_s3():
+    import boto3
+    s3 = boto3.client("s3", region_name=settings.AWS_REGION)
+    download_snapshot(s3, settings.S3_BUCKET_NAME, Path(settings.INDEXES_DIR))
+
+
 def trigger_ecs_deploy():
     try:
         import boto3
@@ -86,13 +98,18 @@ def trigger_ecs_deploy():
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--deploy", action="store_true", help="Upload to S3 and trigger ECS deploy")
+    parser.add_argument("--pull", action="store_true", help="Download the current snapshot from S3, don't rebuild")
     args = parser.parse_args()
 
-    rebuild_indexes()
+    if args.pull:
+        pull_from_s3()
+        sys.exit(0)
+
+    index_manager = rebuild_indexes()
 
     if args.deploy:
-        logger.info("Uploading indexes to S3...")
-        upload_to_s3()
+        logger.info("Uploading index snapshot to S3...")
+        upload_to_s3(index_manager.snapshot_dir)
         logger.info("Triggering ECS deployment...")
         trigger_ecs_deploy()
 
@@ -0,0 +1,67 @@
+"""
+tests/conftest.py
+──────────────────
+Shared fixtures: a fake SentenceTransformer (no model download), and index
+and portfolio settings pointed at tmp_path.
+"""
+
+import shutil
+import time
+import zlib
+import numpy as np
+import pytest
+
+import app.ingestion.embedder as embedder_mod
+from app.config import settings
+
+
+class FakeModel:
+    """
+    Deterministic stand-in for SentenceTransformer.encode: the same text always
+    gets the same unit vector, different texts get slightly different ones.
+    Counts calls / encoded texts; `delay` holds the calling thread per batch.
+    """
+
+    def __init__(self, dim: int = 384, delay: float = 0.0):
+        self.dim = dim
+        self.delay = delay
+        self.calls = 0
+        self.encoded = 0
+
+    def encode(self, text, **kwargs):
+        if self.delay:
+            time.sleep(self.delay)  # a real encode holds its thread for the whole batch
+        self.calls += 1
+        texts = [text] if isinstance(text, str) else text
+        self.encoded += len(texts)
+        out = np.stack([np.full(self.dim, len(t) % 7 + 1, dtype="float32") for t in texts])
+        out[:, 0] += [zlib.crc32(t.encode("utf-8")) % 97 / 10 for t in texts]
+        out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out[0] if isinstance(text, str) else out
+
+
+@pytest.fixture
+def fake_model(monkeypatch) -> FakeModel:
+    """Every Embedder created during the test uses a FakeModel."""
+    model = FakeModel()
+    monkeypatch.setattr(embedder_mod, "_model", model)
+    return model
+
+
+@pytest.fixture
+def index_settings(tmp_path, monkeypatch, fake_model):
+    """Indexes under tmp_path/indexes, built on threads (worker processes would load the real model)."""
+    indexes_dir = tmp_path / "indexes"
+    monkeypatch.setattr(settings, "INDEXES_DIR", str(indexes_dir))
+    monkeypatch.setattr(settings, "INDEX_BUILD_EXECUTOR", "thread")
+    return indexes_dir
+
+
+@pytest.fixture
+def portfolio_path(tmp_path, monkeypatch):
+    """A writable copy of data/portfolio.json; no resume PDF."""
+    path = tmp_path / "portfolio.json"
+    shutil.copy("data/portfolio.json", path)
+    monkeypatch.setattr(settings, "PORTFOLIO_JSON_PATH", str(path))
+    monkeypatch.setattr(settings, "RESUME_PDF_PATH", str(tmp_path / "missing.pdf"))
+    return path
@@ -0,0 +1,52 @@
+"""
+tests/test_build_index.py
+──────────────────────────
+Smoke test of the offline build CLI (scripts/build_index.py) with the fake encoder.
+"""
+
+import importlib.util
+from pathlib import Path
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.ingestion.embedding_cache import get_embedding_cache
+from app.vectorstore.faiss_store import FAISSStore
+from app.vectorstore.snapshot import current_snapshot, read_manifest
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "build_index.py"
+
+
+@pytest.fixture
+def build_index():
+    spec = importlib.util.spec_from_file_location("build_index", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_build_writes_snapshot_and_report(build_index, index_settings, portfolio_path, tmp_path, capsys):
+    output = tmp_path / "out"
+    build_index.main(["--output", str(output), "--workers", "1"])
+
+    snapshot = current_snapshot(output)
+    manifest = read_manifest(snapshot)
+    assert manifest["embedding_model"] == settings.EMBEDDING_MODEL
+    assert manifest["indexes"]["portfolio"]["vectors"] > 0
+    assert manifest["build"]["embedding"]["embedded"] == manifest["build"]["embedding"]["unique"]
+    assert FAISSStore.load(str(snapshot / "portfolio")).size == manifest["indexes"]["portfolio"]["vectors"]
+    assert not index_settings.exists()  # --output is used as given; INDEXES_DIR is left alone
+
+    report = capsys.readouterr().out
+    assert f"Snapshot {manifest['version']}" in report
+    assert "portfolio" in report and "resume" in report
+    cache_stats = manifest["build"]["embedding_cache"]
+    assert cache_stats["rows"] == manifest["build"]["embedding"]["unique"]
+    assert f"embedding cache: {cache_stats['rows']} rows" in report
+
+    # A second build embeds nothing new, keeps the live snapshot and drops text no index uses
+    get_embedding_cache(str(output)).add(["an edited-away chunk"], np.ones((1, settings.EMBEDDING_DIMENSION)))
+    build_index.main(["--output", str(output), "--workers", "1"])
+    assert current_snapshot(output) == snapshot
+    report = capsys.readouterr().out
+    assert "0 embedded" in report and "(1 unreferenced rows dropped)" in report
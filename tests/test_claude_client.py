@@ -0,0 +1,67 @@
+"""
+tests/test_claude_client.py
+────────────────────────────
+Streaming bridge tests — no API key needed.
+"""
+
+import asyncio
+import time
+import pytest
+
+from app.core.claude_client import _iterate_in_thread
+
+
+def _slow_tokens(n: int, delay: float):
+    for i in range(n):
+        time.sleep(delay)  # simulates a blocking network read
+        yield f"tok{i} "
+
+
+@pytest.mark.asyncio
+async def test_stream_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    tick_task = asyncio.create_task(ticker())
+    tokens = [t async for t in _iterate_in_thread(lambda: _slow_tokens(5, 0.04))]
+    tick_task.cancel()
+
+    assert tokens == [f"tok{i} " for i in range(5)]
+    # ~200ms of blocking reads; a blocked loop would barely tick at all
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_producer_errors_are_raised_in_consumer():
+    def failing():
+        yield "first"
+        raise RuntimeError("upstream closed")
+
+    received = []
+    with pytest.raises(RuntimeError, match="upstream closed"):
+        async for t in _iterate_in_thread(failing):
+            received.append(t)
+    assert received == ["first"]
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_applies_backpressure():
+    produced = 0
+
+    def counting():
+        nonlocal produced
+        for i in range(100):
+            produced += 1
+            yield i
+
+    stream = _iterate_in_thread(counting, maxsize=2)
+    assert await stream.__anext__() == 0
+    await asyncio.sleep(0.05)
+    # Producer may run at most queue-size (+ one in hand) ahead of the consumer
+    assert produced <= 5
+    await stream.aclose()
@@ -0,0 +1,161 @@
+"""
+tests/test_compression.py
+──────────────────────────
+Compression middleware: SSE untouched and unbuffered, per-chunk flushing for
+other streams, pre-compressed /projects body.
+"""
+
+import asyncio
+import gzip
+import time
+import zlib
+import pytest
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.api import projects
+from starlette.datastructures import Headers
+from app.config import settings
+from app.utils.compression import CompressionMiddleware, PrecompressedBody, accepts_gzip
+from app.utils.sse import DONE_FRAME, token_frame
+
+FIRST_FRAME_GAP = 0.5  # the app stalls this long after its first frame
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/sse")
+    async def sse():
+        async def frames():
+            yield token_frame("Hello")
+            await asyncio.sleep(FIRST_FRAME_GAP)
+            yield DONE_FRAME
+        return StreamingResponse(frames(), media_type="text/event-stream")
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            yield b'{"part": 1}\n' * 20
+            await asyncio.sleep(FIRST_FRAME_GAP)
+            yield b'{"part": 2}\n'
+        return StreamingResponse(lines(), media_type="application/x-ndjson+json")
+
+    @app.get("/big")
+    async def big():
+        return {"items": ["x" * 10] * 100}
+
+    return app
+
+
+async def _first_body(app, path: str) -> tuple[float, dict, bytes]:
+    """(seconds to the first non-empty body chunk, response headers, that chunk)."""
+    start = time.perf_counter()
+    result = {}
+
+    async def receive():
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body" and message.get("body") and "body" not in result:
+            result["elapsed"] = time.perf_counter() - start
+            result["body"] = message["body"]
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"accept-encoding", b"gzip, br")],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    await app(scope, receive, send)
+    return result["elapsed"], result["headers"], result["body"]
+
+
+@pytest.mark.asyncio
+async def test_sse_first_byte_not_delayed():
+    elapsed, headers, body = await _first_body(_app(), "/sse")
+    assert elapsed < FIRST_FRAME_GAP / 2  # the first frame didn't wait for the next one
+    assert "content-encoding" not in headers
+    assert body == token_frame("Hello")
+
+
+@pytest.mark.asyncio
+async def test_other_streams_flush_each_chunk():
+    elapsed, headers, body = await _first_body(_app(), "/stream")
+    assert elapsed < FIRST_FRAME_GAP / 2
+    assert headers["content-encoding"] == "gzip"
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert decoder.decompress(body) == b'{"part": 1}\n' * 20  # decodable without the rest
+
+
+def test_whole_bodies_compressed_by_size():
+    client = TestClient(_app())
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == {"items": ["x" * 10] * 100}
+    plain = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+
+def test_projects_body_precompressed_per_portfolio():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+    app.include_router(projects.router, prefix="/api/v1")
+    app.state.portfolio = {"projects": [
+        {"name": f"Project {i}", "description": "A project " * 10} for i in range(5)
+    ]}
+    client = TestClient(app)
+
+    first = client.get("/api/v1/projects", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["vary"] == "Accept-Encoding"
+    assert first.json()["count"] == 5
+    body = projects._projects_body[1]
+    assert gzip.decompress(body.gzipped) == body.raw
+
+    app.state.portfolio = {"projects": []}  # hot reload swaps the dict
+    assert client.get("/api/v1/projects").json() == {"count": 0, "projects": []}
+    assert "content-encoding" not in client.get(
+        "/api/v1/projects", headers={"Accept-Encoding": "identity"}
+    ).headers
+
+
+@pytest.mark.parametrize("header, accepted", [
+    ("gzip", True),
+    ("GZIP, br", True),
+    ("br;q=1.0, gzip;q=0.5", True),
+    ("x-gzip", True),
+    ("*", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.000, *", False),
+    ("*;q=0", False),
+    ("identity", False),
+    ("x-gzip-foo, gzipped", False),
+    ("gzip;q=bogus", False),
+    ("", False),
+])
+def test_accept_encoding_parsed_by_token(header, accepted):
+    assert accepts_gzip(Headers({"accept-encoding": header})) is accepted
+
+
+def test_refused_gzip_is_not_sent():
+    client = TestClient(_app())
+    response = client.get("/big", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_precompressed_body_uses_configured_level(monkeypatch):
+    content = {"items": [f"item {i}" for i in range(200)]}
+    stream = lambda body: body.gzipped[10:]  # past the gzip header and its timestamp
+    monkeypatch.setattr(settings, "GZIP_LEVEL", 1)
+    fast = stream(PrecompressedBody(content))
+    monkeypatch.setattr(settings, "GZIP_LEVEL", 9)
+    assert stream(PrecompressedBody(content)) != fast
+    assert stream(PrecompressedBody(content, compresslevel=1)) == fast
@@ -0,0 +1,160 @@
+"""
+tests/test_embedder.py
+───────────────────────
+Query and build embedding cache tests (no model download — the encoder is faked).
+"""
+
+import asyncio
+import numpy as np
+import pytest
+
+import app.ingestion.embedder as embedder_mod
+from app.config import settings
+from app.ingestion.embedder import Embedder, QueryEmbeddingCache, normalize_query
+from app.ingestion.embedding_cache import KEYS_FILE, PersistentEmbeddingCache
+from app.ingestion.embedding_batcher import EmbeddingBatcher
+
+
+@pytest.fixture
+def embedder(monkeypatch, fake_model):
+    monkeypatch.setattr(embedder_mod, "_query_cache", QueryEmbeddingCache(8, 384))
+    return Embedder(), fake_model
+
+
+def test_normalize_query():
+    assert normalize_query("  What's   your\tSTACK? ") == "what's your stack?"
+
+
+def test_repeat_queries_skip_model(embedder):
+    emb, model = embedder
+    first = emb.embed("Tell me about your projects")
+    second = emb.embed("  tell me   about your PROJECTS ")
+    assert model.calls == 1
+    np.testing.assert_array_equal(first, second)
+    stats = embedder_mod.get_query_cache().stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_cached_vectors_are_copies(embedder):
+    emb, _ = embedder
+    v = emb.embed("hello")
+    v[:] = 0
+    assert emb.embed("hello").any()
+
+
+def test_cache_is_bounded_lru():
+    cache = QueryEmbeddingCache(2, 4)
+    cache.put(("m", "a"), np.ones(4))
+    cache.put(("m", "b"), np.ones(4) * 2)
+    cache.get(("m", "a"))  # a becomes most recently used
+    cache.put(("m", "c"), np.ones(4) * 3)
+    assert cache.get(("m", "b")) is None
+    assert cache.get(("m", "a"))[0] == 1
+    assert cache.get(("m", "c"))[0] == 3
+    assert cache.stats()["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_batcher_coalesces_concurrent_queries(embedder):
+    emb, model = embedder
+    batcher = EmbeddingBatcher(emb, window_ms=20, max_batch=64)
+    queries = [f"question number {i}" for i in range(6)]
+
+    results = await asyncio.gather(*(batcher.embed(q) for q in queries))
+
+    assert model.calls == 1
+    assert batcher.stats()["batches"] == 1
+    for q, vec in zip(queries, results):
+        np.testing.assert_array_equal(vec, emb.embed(q))
+
+
+@pytest.mark.asyncio
+async def test_batcher_counts_each_miss_once(embedder):
+    emb, _ = embedder
+    batcher = EmbeddingBatcher(emb, window_ms=5, max_batch=64)
+    await asyncio.gather(batcher.embed("first question"), batcher.embed("second question"))
+    await batcher.embed("first question")
+    stats = embedder_mod.get_query_cache().stats()
+    assert stats["misses"] == 2 and stats["hits"] == 1
+    assert stats["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_when_full(embedder):
+    emb, model = embedder
+    batcher = EmbeddingBatcher(emb, window_ms=10_000, max_batch=2)
+    # A 10s window would time out the test unless the size trigger fires
+    await asyncio.wait_for(asyncio.gather(batcher.embed("a"), batcher.embed("bb")), timeout=2)
+    assert model.calls == 1
+
+
+def test_persistent_cache_roundtrip_across_instances(tmp_path):
+    cache = PersistentEmbeddingCache(tmp_path, "org/model", 4)
+    cache.add(["a", "b"], np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype="float32"))
+
+    reopened = PersistentEmbeddingCache(tmp_path, "org/model", 4)
+    vecs, missing = reopened.lookup(["b", "c", "a"])
+    assert missing == [1]
+    assert vecs[0][1] == 1 and vecs[2][0] == 1
+    assert reopened.stats()["hit_rate"] == pytest.approx(2 / 3, abs=1e-3)
+
+
+def test_persistent_cache_ignores_torn_append(tmp_path):
+    cache = PersistentEmbeddingCache(tmp_path, "m", 4)
+    cache.add(["a"], np.ones((1, 4)))
+    with open(cache.dir / KEYS_FILE, "ab") as f:
+        f.write(b"\x00" * 40)  # a key (and a half) without its vector
+
+    reopened = PersistentEmbeddingCache(tmp_path, "m", 4)
+    assert reopened.lookup(["a"])[1] == []
+    reopened.add(["b"], np.full((1, 4), 2.0))
+    vecs, missing = PersistentEmbeddingCache(tmp_path, "m", 4).lookup(["a", "b"])
+    assert missing == [] and vecs[1][0] == 2.0
+
+
+def test_persistent_cache_resets_on_dimension_change(tmp_path):
+    PersistentEmbeddingCache(tmp_path, "m", 4).add(["a"], np.ones((1, 4)))
+    assert PersistentEmbeddingCache(tmp_path, "m", 8).lookup(["a"])[1] == [0]
+
+
+def test_persistent_cache_compacts_to_referenced_texts(tmp_path):
+    cache = PersistentEmbeddingCache(tmp_path, "m", 4)
+    cache.add(["a", "b", "c", "d"], np.arange(16, dtype="float32").reshape(4, 4))
+    reader = PersistentEmbeddingCache(tmp_path, "m", 4)  # another worker, already indexed
+    assert reader.lookup(["d"])[1] == []
+
+    assert cache.compact(["b", "d", "never cached"]) == {"rows_before": 4, "rows": 2, "bytes": 2 * (16 + 32)}
+    assert (tmp_path / "m" / KEYS_FILE).stat().st_size == 2 * 32
+
+    vecs, missing = reader.lookup(["a", "b", "d"])  # re-indexes the rewritten files
+    assert missing == [0]
+    np.testing.assert_array_equal(vecs[1:], [[4, 5, 6, 7], [12, 13, 14, 15]])
+    reader.add(["e"], np.full((1, 4), 9.0))
+    assert PersistentEmbeddingCache(tmp_path, "m", 4).lookup(["b", "d", "e"])[1] == []
+
+
+def test_persistent_cache_stops_growing_at_max_rows(tmp_path):
+    cache = PersistentEmbeddingCache(tmp_path, "m", 4, max_rows=3)
+    cache.add(["a", "b"], np.ones((2, 4)))
+    cache.add(["c", "d", "e"], np.ones((3, 4)))
+    assert cache.full and cache.stats()["entries"] == 3
+    assert PersistentEmbeddingCache(tmp_path, "m", 4).lookup(["a", "c", "d"])[1] == [2]
+
+    cache.compact(["a"])
+    cache.add(["d"], np.ones((1, 4)))
+    assert not cache.full and cache.lookup(["a", "d"])[1] == []
+
+
+def test_rebuild_embeds_only_changed_chunks(embedder, tmp_path, monkeypatch):
+    emb, model = embedder
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_DIR", str(tmp_path))
+    chunks = [f"Project {i}: built a thing with Python" for i in range(20)]
+
+    first = emb.embed_chunks(chunks)
+    assert model.encoded == 20
+
+    chunks[7] = "Project 7: rewritten description"
+    second = emb.embed_chunks(chunks)
+    assert model.encoded == 21
+    np.testing.assert_array_equal(first[:7], second[:7])
+    np.testing.assert_array_equal(second[7], emb.embed_batch([chunks[7]])[0])
@@ -0,0 +1,326 @@
+"""
+tests/test_github_fetcher.py
+─────────────────────────────
+GitHubFetcher against an in-process mock of the GitHub API (httpx.MockTransport).
+"""
+
+import asyncio
+import base64
+import hashlib
+import io
+import tarfile
+import httpx
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.ingestion.github_fetcher import (
+    MAX_FILE_SIZE_BYTES,
+    GitHubFetcher,
+    create_github_client,
+    extract_tarball,
+    git_blob_sha,
+)
+import app.vectorstore.index_manager as index_manager_mod
+from app.vectorstore.index_manager import IndexManager
+
+REPO = "venkat/demo"
+
+
+def make_tarball(files: dict[str, str], prefix: str = "venkat-demo-abc1234") -> bytes:
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for path, content in files.items():
+            data = content.encode()
+            info = tarfile.TarInfo(f"{prefix}/{path}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+@pytest.fixture
+def contents_mode(monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_FETCH_MODE", "contents")
+
+
+class MockGitHub:
+    def __init__(self, n_files: int = 12, latency: float = 0.01):
+        self.files = {f"src/module_{i}.py": f"def f{i}():\n    return {i}\n" for i in range(n_files)}
+        self.files["README.md"] = "# Demo\nA demo repo."
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.throttle_once: set[str] = set()
+        self.remaining = 5000
+        self.fetched: list[str] = []
+        self.tarballs = 0
+        self.tarball_available = True
+        self.tarball_block = 0  # > 0: serve the archive in blocks of this size
+        self.tarball_blocks_sent = 0
+
+    @staticmethod
+    def blob_sha(content: str) -> str:
+        return git_blob_sha(content.encode())
+
+    def tree_etag(self) -> str:
+        return '"' + hashlib.sha1("".join(sorted(self.blob_sha(c) for c in self.files.values())).encode()).hexdigest() + '"'
+
+    def tarball(self) -> bytes:
+        return make_tarball(self.files)
+
+    def _json(self, data, status=200, **headers):
+        headers.setdefault("X-RateLimit-Remaining", str(self.remaining))
+        return httpx.Response(status, json=data, headers=headers)
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            path = request.url.path
+            if "/git/trees/" in path:
+                etag = self.tree_etag()
+                if request.headers.get("If-None-Match") == etag:
+                    return httpx.Response(304, headers={"ETag": etag})
+                tree = [
+                    {"type": "blob", "path": p, "size": len(c), "sha": self.blob_sha(c)}
+                    for p, c in self.files.items()
+                ]
+                return self._json({"sha": etag.strip('"'), "tree": tree}, ETag=etag)
+            if path.endswith("/tarball"):
+                self.tarballs += 1
+                if not self.tarball_available:
+                    return self._json({"message": "Not Found"}, status=404)
+                if not self.tarball_block:
+                    return httpx.Response(200, content=self.tarball())
+                return httpx.Response(200, content=self._blocks(self.tarball()))
+            if "/contents/" in path:
+                file_path = path.split("/contents/", 1)[1]
+                if file_path in self.throttle_once:
+                    self.throttle_once.discard(file_path)
+                    return self._json({"message": "secondary rate limit"}, status=429, **{"Retry-After": "0"})
+                self.fetched.append(file_path)
+                content = self.files[file_path].encode()
+                return self._json({"content": base64.b64encode(content).decode()})
+            return self._json({"message": "Not Found"}, status=404)
+        finally:
+            self.in_flight -= 1
+
+    async def _blocks(self, data: bytes):
+        for i in range(0, len(data), self.tarball_block):
+            self.tarball_blocks_sent += 1
+            yield data[i:i + self.tarball_block]
+
+    def fetcher(self) -> GitHubFetcher:
+        client = create_github_client(transport=httpx.MockTransport(self.handler))
+        return GitHubFetcher(client=client)
+
+
+@pytest.mark.asyncio
+async def test_fetches_files_concurrently_with_bound(contents_mode):
+    gh = MockGitHub(n_files=20)
+    chunks = await gh.fetcher().fetch_repo_chunks(REPO)
+
+    sources = {c["source"] for c in chunks}
+    assert f"github/{REPO}/README.md" in sources
+    assert all(f"github/{REPO}/{p}" in sources for p in gh.files)
+    assert 1 < gh.max_in_flight <= settings.GITHUB_FETCH_CONCURRENCY
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honored(contents_mode):
+    gh = MockGitHub(n_files=3)
+    gh.throttle_once.add("src/module_1.py")
+    chunks = await gh.fetcher().fetch_repo_chunks(REPO)
+
+    assert any(c["source"].endswith("module_1.py") for c in chunks)
+    assert gh.requests == 1 + 4 + 1  # tree + files (incl. README) + one retry
+
+
+@pytest.mark.asyncio
+async def test_low_rate_limit_stops_extra_file_fetches(contents_mode):
+    gh = MockGitHub(n_files=10)
+    gh.remaining = settings.GITHUB_RATE_LIMIT_RESERVE  # already at the reserve
+    chunks = await gh.fetcher().fetch_repo_chunks(REPO)
+
+    assert [c["source"] for c in chunks] == [f"github/{REPO}/README.md"]
+    assert gh.requests == 2  # tree + README only
+
+
+@pytest.mark.asyncio
+async def test_unchanged_repo_costs_one_conditional_request():
+    gh = MockGitHub(n_files=5)
+    fetcher = gh.fetcher()
+    first = await fetcher.fetch_repo_update(REPO)
+    gh.requests = 0
+
+    again = await fetcher.fetch_repo_update(REPO, first.state)
+
+    assert again.unchanged and not again.chunks
+    assert again.state == first.state
+    assert gh.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_only_changed_files_are_refetched(contents_mode):
+    gh = MockGitHub(n_files=5)
+    fetcher = gh.fetcher()
+    first = await fetcher.fetch_repo_update(REPO)
+    gh.files["src/module_2.py"] = "def f2():\n    return 'changed'\n"
+    del gh.files["src/module_4.py"]
+    gh.fetched.clear()
+
+    update = await fetcher.fetch_repo_update(REPO, first.state)
+
+    assert gh.fetched == ["src/module_2.py"]
+    assert update.changed_paths == {"src/module_2.py"}
+    assert update.removed_paths == {"src/module_4.py"}
+    assert {c["source"] for c in update.chunks} == {f"github/{REPO}/src/module_2.py"}
+    assert "src/module_4.py" not in update.state["files"]
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_chunks(self, texts, batch_size: int = 64):
+        self.embedded += len(texts)
+        out = np.stack([
+            np.frombuffer(hashlib.sha256(t.encode()).digest() * 48, dtype="uint8")[:384].astype("float32")
+            for t in texts
+        ])
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
+@pytest.mark.asyncio
+async def test_index_update_embeds_only_changed_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INDEXES_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "INDEX_BUILD_EXECUTOR", "thread")
+    monkeypatch.setattr(index_manager_mod, "Embedder", FakeEmbedder)
+    gh = MockGitHub(n_files=5)
+    fetcher = gh.fetcher()
+    manager = IndexManager()
+
+    first = await fetcher.fetch_repo_update(REPO)
+    manager.build_repo_index(REPO, first.chunks, first.state)
+    assert manager.load_repo_state(REPO) == first.state
+    total = manager.get_repo_index(REPO).size
+
+    gh.files["src/module_2.py"] = "def f2():\n    return 'changed'\n"
+    manager.embedder.embedded = 0
+    assert await manager.refresh_repo_index(REPO, fetcher) == "updated"
+
+    store = manager.get_repo_index(REPO)
+    assert manager.embedder.embedded == 1  # only the changed file's chunk
+    assert store.size == total
+    texts = [r["text"] for r in store.metadata]
+    assert any("changed" in t for t in texts)
+    assert not any("return 2" in t for t in texts)
+    assert manager.load_repo_state(REPO)["files"]["src/module_2.py"] == gh.blob_sha(gh.files["src/module_2.py"])
+
+    assert await manager.refresh_repo_index(REPO, fetcher) == "unchanged"
+    assert manager.embedder.embedded == 1
+    manager.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_keeps_float32_vectors_from_embedding_cache(index_settings, fake_model, monkeypatch):
+    monkeypatch.setattr(settings, "REPO_VECTOR_STORAGE", "int8")
+    gh = MockGitHub(n_files=5)
+    fetcher = gh.fetcher()
+    manager = IndexManager()
+    first = await fetcher.fetch_repo_update(REPO)
+    await manager.build_repo_index_async(REPO, first.chunks, first.state)
+    existing = manager.get_repo_index(REPO)
+
+    stale = {f"github/{REPO}/src/module_2.py"}
+    chunks, vectors = manager._kept_vectors(existing, stale)
+    exact = manager.embedder.embed_batch([c["text"] for c in chunks])
+    assert np.array_equal(vectors, exact)  # not the int8 reconstruction
+    assert not np.array_equal(existing.without_sources(stale)[1], exact)
+    manager.close()
+
+
+@pytest.mark.asyncio
+async def test_tarball_mode_fetches_whole_repo_in_two_requests():
+    gh = MockGitHub(n_files=60)
+    chunks = await gh.fetcher().fetch_repo_chunks(REPO)
+
+    sources = {c["source"] for c in chunks}
+    assert all(f"github/{REPO}/{p}" in sources for p in gh.files)  # past the 25-file per-file cap
+    assert gh.requests == 2 and gh.tarballs == 1  # tree + archive
+    assert gh.fetched == []
+
+
+@pytest.mark.asyncio
+async def test_tarball_state_matches_tree_shas():
+    gh = MockGitHub(n_files=4)
+    fetcher = gh.fetcher()
+    first = await fetcher.fetch_repo_update(REPO)
+    assert first.state["files"] == {p: gh.blob_sha(c) for p, c in gh.files.items()}
+
+    gh.files["src/module_0.py"] = "x = 0\n"
+    gh.files["src/module_1.py"] = "x = 1\n"
+    update = await fetcher.fetch_repo_update(REPO, first.state)
+    assert update.changed_paths == {"src/module_0.py", "src/module_1.py"}
+    assert gh.tarballs == 2
+
+
+@pytest.mark.asyncio
+async def test_tarball_unavailable_falls_back_to_per_file():
+    gh = MockGitHub(n_files=5)
+    gh.tarball_available = False
+    chunks = await gh.fetcher().fetch_repo_chunks(REPO)
+
+    assert {c["source"] for c in chunks} == {f"github/{REPO}/{p}" for p in gh.files}
+    assert sorted(gh.fetched) == sorted(gh.files)
+
+
+@pytest.mark.asyncio
+async def test_tarball_extracted_while_streaming():
+    gh = MockGitHub(n_files=60)
+    gh.tarball_block = 64
+    chunks = await gh.fetcher().fetch_repo_chunks(REPO)
+
+    assert {c["source"] for c in chunks} == {f"github/{REPO}/{p}" for p in gh.files}
+    assert gh.tarball_blocks_sent > 10 and gh.fetched == []
+
+
+@pytest.mark.asyncio
+async def test_tarball_download_stops_once_wanted_files_are_read():
+    gh = MockGitHub(n_files=60)
+    gh.tarball_block = 64
+    fetcher = gh.fetcher()
+    first = await fetcher.fetch_repo_update(REPO)
+
+    gh.files["src/module_0.py"] = "x = 0\n"  # first members of the archive
+    gh.files["src/module_1.py"] = "x = 1\n"
+    gh.tarball_blocks_sent = 0
+    update = await fetcher.fetch_repo_update(REPO, first.state)
+    assert update.changed_paths == {"src/module_0.py", "src/module_1.py"}
+    assert gh.tarball_blocks_sent < len(gh.tarball()) // gh.tarball_block
+
+
+@pytest.mark.asyncio
+async def test_oversized_tarball_stops_downloading_at_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_TARBALL_MAX_BYTES", 256)
+    gh = MockGitHub(n_files=60)
+    gh.tarball_block = 64
+    total_blocks = -(-len(gh.tarball()) // gh.tarball_block)
+    chunks = await gh.fetcher().fetch_repo_chunks(REPO)
+
+    assert gh.tarball_blocks_sent <= 256 // 64 + 1 < total_blocks  # the rest was never pulled
+    assert len(gh.fetched) == len(chunks) > 0  # fell back to per-file fetches
+
+
+def test_extract_tarball_applies_filters():
+    data = make_tarball({
+        "app/main.py": "print('hi')\n",
+        "node_modules/lib/index.js": "module.exports = 1\n",
+        "assets/logo.png": "not really a png",
+        "big.py": "x" * (MAX_FILE_SIZE_BYTES + 1),
+    })
+    assert set(extract_tarball(data)) == {"app/main.py"}
+    assert extract_tarball(data, wanted={"app/main.py"}) == {"app/main.py": b"print('hi')\n"}
@@ -0,0 +1,64 @@
+"""
+tests/test_persona_guard.py
+────────────────────────────
+Aho-Corasick matcher, off-topic detection and project-mention detection.
+"""
+
+from app.core.persona_guard import PersonaGuard
+from app.utils.aho_corasick import AhoCorasick
+
+PORTFOLIO = {
+    "projects": [
+        {"name": "VenkatGPT", "slug": "venkatgpt", "github_repo": "venkatesh1545/venkatgpt"},
+        {"name": "VenkatGPT Mobile", "slug": "venkatgpt-mobile", "github_repo": "venkatesh1545/venkatgpt-mobile"},
+        {"name": "API Gateway", "slug": "api", "github_repo": "someone/edge-proxy"},
+        {"name": "", "slug": "", "github_repo": ""},
+    ]
+}
+
+
+def test_finds_overlapping_patterns_in_one_pass():
+    ac = AhoCorasick([(p, p) for p in ("he", "she", "his", "hers")], whole_words=False)
+    found = [(m.start, m.pattern) for m in ac.find_all("USHERS")]
+    assert found == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_whole_words_and_empty_patterns():
+    ac = AhoCorasick([("food", 1), ("", 2), ("  ", 3), ("fun fact", 4)])
+    assert len(ac) == 2
+    assert ac.values("Any good FOOD nearby?") == {1}
+    assert ac.values("seafood, foodie") == set()
+    assert ac.values("fun facts") == set()
+    assert ac.values("a fun fact!") == {4}
+
+
+def test_off_topic_detection():
+    guard = PersonaGuard()
+    assert guard.is_off_topic("Can you share a recipe for biryani?")
+    assert guard.is_off_topic("any good Recipes?")
+    assert guard.is_off_topic("What's the stock price of NVDA")
+    assert not guard.is_off_topic("Did you work on seafood supply chains?")
+    assert not guard.is_off_topic("What did you build with FastAPI?")
+
+
+def test_project_detection_prefers_longest_mention():
+    guard = PersonaGuard()
+    assert guard.detect_project_name("How does VenkatGPT work?", PORTFOLIO) == "venkatesh1545/venkatgpt"
+    assert guard.detect_project_name("Tell me about venkatgpt mobile", PORTFOLIO) == "venkatesh1545/venkatgpt-mobile"
+    assert guard.detect_project_name("what is in venkatesh1545/venkatgpt-mobile?", PORTFOLIO) == (
+        "venkatesh1545/venkatgpt-mobile"
+    )
+    assert guard.detect_project_name("explain the edge-proxy repo", PORTFOLIO) == "someone/edge-proxy"
+    assert guard.detect_project_name("any rapid prototypes?", PORTFOLIO) is None  # "api" needs word bounds
+    assert guard.detect_project_name("hello", PORTFOLIO) is None
+
+
+def test_scan_reports_both_and_rebuilds_per_portfolio():
+    guard = PersonaGuard()
+    scan = guard.scan_query("tell me a joke about VenkatGPT", PORTFOLIO)
+    assert scan.off_topic and scan.project_repo == "venkatesh1545/venkatgpt"
+
+    reloaded = {"projects": [{"name": "Curvetopia", "slug": "curvetopia", "github_repo": "me/curvetopia"}]}
+    assert guard.detect_project_name("curvetopia?", PORTFOLIO) is None
+    assert guard.detect_project_name("curvetopia?", reloaded) == "me/curvetopia"
+    assert guard.detect_project_name("venkatgpt?", reloaded) is None
@@ -0,0 +1,120 @@
+"""
+tests/test_rag_engine.py
+─────────────────────────
+Repo Intelligence warm-up and off-loop builds (no network, no model download — GitHub and the encoder are faked).
+"""
+
+import asyncio
+import time
+import pytest
+
+from app.core.rag_engine import RAGEngine
+from app.ingestion.github_fetcher import RepoUpdate
+from app.vectorstore.index_manager import IndexManager
+
+
+class FakeGitHub:
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.fetches: dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.quota_low = False
+
+    async def fetch_repo_update(self, slug: str, previous: dict | None = None) -> RepoUpdate:
+        self.fetches[slug] = self.fetches.get(slug, 0) + 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        state = {"tree_sha": "t", "etag": "", "files": {"README.md": "s"}}
+        if previous == state:
+            return RepoUpdate(state=state, unchanged=True)
+        chunk = {"text": f"README of {slug}", "source": f"github/{slug}/README.md", "type": "documentation"}
+        return RepoUpdate(state=state, chunks=[chunk], changed_paths={"README.md"})
+
+
+@pytest.fixture
+def engine(index_settings):
+    portfolio = {"projects": [
+        {"name": f"Project {i}", "github_repo": f"venkat/repo-{i}"} for i in range(5)
+    ] + [{"name": "No repo"}, {"name": "Duplicate", "github_repo": "venkat/repo-0"}]}
+    github = FakeGitHub()
+    return RAGEngine(IndexManager(), portfolio, github), github
+
+
+@pytest.mark.asyncio
+async def test_warmup_builds_missing_indexes_with_bounded_concurrency(engine):
+    rag, github = engine
+    outcomes = await rag.warm_repo_indexes(concurrency=2)
+
+    assert outcomes == {f"venkat/repo-{i}": "built" for i in range(5)}
+    assert github.max_in_flight == 2
+    assert all(n == 1 for n in github.fetches.values())
+    assert all(rag.index_manager.has_repo_index(slug) for slug in outcomes)
+
+    again = await rag.warm_repo_indexes(concurrency=2)
+    assert set(again.values()) == {"cached"}
+    assert all(n == 1 for n in github.fetches.values())
+
+
+@pytest.mark.asyncio
+async def test_request_during_warmup_joins_the_build(engine):
+    rag, github = engine
+    warmup = asyncio.create_task(rag.warm_repo_indexes(concurrency=1))
+    await asyncio.sleep(0.01)  # repo-0 build is in flight
+
+    store = await rag.ensure_repo_index("venkat/repo-0")
+    await warmup
+
+    assert store is not None and store.size == 1
+    assert github.fetches["venkat/repo-0"] == 1
+
+
+@pytest.mark.asyncio
+async def test_warmup_stops_when_quota_is_low(engine):
+    rag, github = engine
+    github.quota_low = True
+    outcomes = await rag.warm_repo_indexes()
+
+    assert set(outcomes.values()) == {"skipped"}
+    assert github.fetches == {}
+
+
+@pytest.mark.asyncio
+async def test_repo_build_does_not_block_the_event_loop(engine, fake_model):
+    rag, github = engine
+    github.latency = 0
+    fake_model.delay = 0.3
+
+    gaps = []
+
+    async def ticker():
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    store = await rag.ensure_repo_index("venkat/repo-1")
+    tick.cancel()
+
+    assert store is not None and store.size == 1
+    assert max(gaps) < 0.15  # a blocking 0.3s encode on the loop would show up here
+
+
+@pytest.mark.asyncio
+async def test_refresh_goes_through_the_index_manager(engine):
+    rag, github = engine
+    await rag.ensure_repo_index("venkat/repo-0")
+    assert await rag.refresh_repo_index("venkat/repo-0") == "unchanged"
+
+    (rag.index_manager._repo_indexes.path_for("venkat/repo-0") / "repo_state.json").unlink()
+    assert await rag.refresh_repo_index("venkat/repo-0") == "rebuilt"  # cached before blob tracking
+    assert rag.index_manager.load_repo_state("venkat/repo-0") is not None
+    assert github.fetches["venkat/repo-0"] == 3
+    rag.close()
@@ -0,0 +1,176 @@
+"""
+tests/test_rate_limiter.py
+───────────────────────────
+Sliding-window rate limiter: Lua script (via fakeredis when installed), leases
+and the in-process fallback.
+"""
+
+import asyncio
+import time
+import pytest
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from app.config import settings
+from app.security.rate_limiter import RELEASE_LUA, SLIDING_WINDOW_LUA, RateLimiter, TokenBucket
+from app.utils.redis_pool import set_redis_pool
+
+
+class FakeScript:
+    """Python port of SLIDING_WINDOW_LUA over an in-memory sorted set."""
+
+    def __init__(self, store: dict):
+        self.store = store
+        self.calls = 0
+
+    async def __call__(self, keys, args):
+        self.calls += 1
+        now = int(time.time() * 1000)  # the server clock
+        window, limit, member, lease_max = args
+        entries = [(score, m) for score, m in self.store.get(keys[0], []) if score > now - window]
+        if len(entries) >= limit:
+            self.store[keys[0]] = entries
+            return [0, 0, min(s for s, _ in entries) + window - now, 0]
+        spare = limit - len(entries) - 1
+        lease = min(lease_max, spare // 4)
+        entries += [(now, f"{member}:{i}") for i in range(lease + 1)]
+        self.store[keys[0]] = entries
+        return [1, spare - lease, 0, lease]
+
+
+class FakeRedis:
+    def __init__(self, fail: bool = False):
+        self.store = {}
+        self.script = FakeScript(self.store)
+        self.released = []
+        self.fail = fail
+
+    def register_script(self, lua):
+        async def sliding_window(keys, args):
+            if self.fail:
+                raise ConnectionError("redis down")
+            return await self.script(keys=keys, args=args)
+
+        async def release(keys, args):
+            self.released.extend(args)
+            self.store[keys[0]] = [(s, m) for s, m in self.store.get(keys[0], []) if m not in args]
+            return len(args)
+
+        assert lua in (SLIDING_WINDOW_LUA, RELEASE_LUA)
+        return sliding_window if lua == SLIDING_WINDOW_LUA else release
+
+
+@pytest.mark.asyncio
+async def test_limit_enforced_with_retry_after():
+    limiter = RateLimiter(max_requests=5, window_seconds=60, redis_client=FakeRedis())
+    for _ in range(5):
+        await limiter.check("1.2.3.4")
+    with pytest.raises(HTTPException) as exc:
+        await limiter.check("1.2.3.4")
+    assert exc.value.status_code == 429
+    assert 1 <= int(exc.value.headers["Retry-After"]) <= 60
+    await limiter.check("5.6.7.8")  # other clients unaffected
+
+
+@pytest.mark.asyncio
+async def test_lease_skips_redis_but_never_exceeds_limit(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_LEASE_MAX", 4)
+    redis = FakeRedis()
+    limiter = RateLimiter(max_requests=20, window_seconds=60, redis_client=redis)
+    allowed = [(await limiter.acquire("ip"))[0] for _ in range(25)]
+    assert allowed == [True] * 20 + [False] * 5
+    assert redis.script.calls < 20  # leased slots were served locally
+    assert len(redis.store["venkatgpt:rl:ip"]) == 20
+
+
+@pytest.mark.asyncio
+async def test_unused_leased_slots_are_released(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_LEASE_TTL", 0.05)
+    redis = FakeRedis()
+    limiter = RateLimiter(max_requests=20, window_seconds=60, redis_client=redis)
+    await limiter.acquire("ip")
+    await limiter.acquire("ip")  # burst → 4 extra slots leased
+    assert len(redis.store["venkatgpt:rl:ip"]) == 6
+    await asyncio.sleep(0.1)
+    assert len(redis.released) == 4
+    assert len(redis.store["venkatgpt:rl:ip"]) == 2  # only the real requests count
+    await limiter.acquire("ip")
+    assert redis.script.calls == 3  # expired lease wasn't used
+
+
+@pytest.mark.asyncio
+async def test_sparse_clients_get_the_full_limit(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_LEASE_TTL", 0.001)
+    redis = FakeRedis()
+    limiter = RateLimiter(max_requests=20, window_seconds=60, redis_client=redis)
+    allowed = []
+    for _ in range(20):
+        allowed.append((await limiter.acquire("ip"))[0])
+        await asyncio.sleep(0.002)  # never a burst → no leases
+    assert all(allowed)
+    assert redis.script.calls == 20 and not redis.released
+
+
+@pytest.mark.asyncio
+async def test_redis_error_falls_back_to_local_bucket(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_REDIS_RETRY", 60.0)
+    redis = FakeRedis(fail=True)
+    limiter = RateLimiter(max_requests=3, window_seconds=60, redis_client=redis)
+    allowed = [(await limiter.acquire("ip"))[0] for _ in range(4)]
+    assert allowed == [True, True, True, False]  # still limited, not fail-open
+
+    redis.fail = False
+    await limiter.acquire("other")
+    assert redis.script.calls == 0  # Redis not retried until RATE_LIMIT_REDIS_RETRY passes
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(capacity=2, window=10)  # one token per 5s
+    assert bucket.acquire("k", now=0.0)[0]
+    assert bucket.acquire("k", now=0.0)[0]
+    allowed, retry = bucket.acquire("k", now=1.0)
+    assert not allowed and retry == pytest.approx(4.0)
+    assert bucket.acquire("k", now=5.0)[0]
+
+
+@pytest.mark.asyncio
+async def test_lua_script_on_fakeredis():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis runs Lua through lupa
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    limiter = RateLimiter(max_requests=10, window_seconds=60, redis_client=client)
+    allowed = [(await limiter.acquire("ip"))[0] for _ in range(12)]
+    assert allowed == [True] * 10 + [False] * 2
+    assert await client.zcard("venkatgpt:rl:ip") == 10
+    assert 0 < await client.pttl("venkatgpt:rl:ip") <= 60_000
+    seconds, micros = await client.time()
+    scores = [score for _, score in await client.zrange("venkatgpt:rl:ip", 0, -1, withscores=True)]
+    assert all(abs(score - (seconds * 1000 + micros // 1000)) < 5_000 for score in scores)  # Redis clock
+
+
+@pytest.mark.asyncio
+async def test_uses_shared_pool_when_set():
+    limiter = RateLimiter(max_requests=3, window_seconds=60)
+    await limiter.acquire("ip")  # no pool yet → local bucket
+    redis = FakeRedis()
+    set_redis_pool(redis)
+    try:
+        await limiter.acquire("ip")
+    finally:
+        set_redis_pool(None)
+    assert redis.script.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_lease_release_on_fakeredis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    monkeypatch.setattr(settings, "RATE_LIMIT_LEASE_TTL", 0.05)
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    limiter = RateLimiter(max_requests=20, window_seconds=60, redis_client=client)
+    await limiter.acquire("ip")
+    await limiter.acquire("ip")
+    assert await client.zcard("venkatgpt:rl:ip") == 6
+    await asyncio.sleep(0.1)
+    assert await client.zcard("venkatgpt:rl:ip") == 2
@@ -0,0 +1,122 @@
+"""
+tests/test_redis_pool.py
+─────────────────────────
+Shared Redis pool: auto-pipelining, scripts and metrics (fake client, no server).
+"""
+
+import asyncio
+import hashlib
+import pytest
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("redis")
+
+from redis.exceptions import ConnectionError, NoScriptError
+from app.utils.redis_pool import RedisPool, create_redis_pool
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def execute_command(self, *args):
+        self.commands.append(args)
+
+    async def execute(self, raise_on_error=True):
+        self.client.round_trips.append(self.commands)
+        results = []
+        for args in self.commands:
+            try:
+                results.append(self.client.run(args))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+class FakeClient:
+    def __init__(self, down: bool = False):
+        self.round_trips = []
+        self.data = {}
+        self.scripts = set()
+        self.down = down
+
+    def run(self, args):
+        if self.down:
+            raise ConnectionError("connection refused")
+        name = args[0]
+        if name == "SET":
+            self.data[args[1]] = args[2]
+            return True
+        if name == "GET":
+            return self.data.get(args[1])
+        if name == "EVALSHA":
+            if args[1] not in self.scripts:
+                raise NoScriptError("NOSCRIPT No matching script")
+            return list(args[3:])
+        raise AssertionError(name)
+
+    async def execute_command(self, *args):
+        self.round_trips.append([args])
+        return self.run(args)
+
+    def pipeline(self, transaction=True):
+        assert not transaction
+        return FakePipeline(self)
+
+    async def script_load(self, lua):
+        self.round_trips.append([("SCRIPT", "LOAD")])
+        self.scripts.add(hashlib.sha1(lua.encode()).hexdigest())
+
+
+@pytest.fixture
+def pool():
+    pool = RedisPool("redis://localhost:6379/0", max_connections=4)
+    pool.client = FakeClient()
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_commands_in_one_tick_share_a_round_trip(pool):
+    results = await asyncio.gather(
+        pool.execute("SET", "a", "1"),
+        pool.execute("SET", "b", "2"),
+        pool.execute("GET", "missing"),
+    )
+    assert results == [True, True, None]
+    assert len(pool.client.round_trips) == 1
+    assert await pool.execute("GET", "a") == "1"  # a lone command skips the pipeline
+    stats = pool.stats()
+    assert stats["commands"] == 4 and stats["round_trips"] == 2
+    assert stats["commands_per_round_trip"] == 2.0
+    assert stats["latency_ms_p50"] is not None
+
+
+@pytest.mark.asyncio
+async def test_script_loaded_on_noscript(pool):
+    script = pool.register_script("return ARGV")
+    assert await script(keys=["k"], args=[1, 2]) == ["k", 1, 2]
+    assert await script(keys=["k"], args=[3]) == ["k", 3]
+    assert [cmd[0][0] for cmd in pool.client.round_trips] == ["EVALSHA", "SCRIPT", "EVALSHA", "EVALSHA"]
+
+
+@pytest.mark.asyncio
+async def test_connection_error_reaches_every_caller(pool):
+    pool.client.down = True
+    results = await asyncio.gather(
+        pool.execute("GET", "a"), pool.execute("GET", "b"), return_exceptions=True,
+    )
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert pool.stats()["errors"] == 2
+    assert not await pool.ping()
+
+
+def test_no_url_means_no_pool():
+    assert create_redis_pool(url="") is None
@@ -0,0 +1,167 @@
+"""
+tests/test_reloader.py
+───────────────────────
+Hot reload: snapshot swap, stale-index rebuild, file watcher, admin endpoint
+(no network, no model download — the encoder is faked).
+"""
+
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import admin
+from app.config import settings
+from app.core.rag_engine import RAGEngine
+from app.core.reloader import Reloader, install_snapshot, load_snapshot
+from app.ingestion.github_fetcher import GitHubFetcher
+
+
+@pytest.fixture
+def env(fake_model, index_settings, portfolio_path):
+    app = SimpleNamespace(state=SimpleNamespace())
+    return app, portfolio_path, fake_model
+
+
+def edit_portfolio(path, name: str) -> None:
+    data = json.loads(path.read_text())
+    data["identity"]["email"] = name
+    data["projects"][0]["description"] = f"Rewritten by {name}"
+    path.write_text(json.dumps(data))
+    later = time.time() + 5  # newer than the index, whatever the filesystem's mtime granularity
+    os.utime(path, (later, later))
+
+
+@pytest.mark.asyncio
+async def test_reload_swaps_snapshot_and_keeps_old_one_usable(env):
+    app, portfolio_path, model = env
+    github = GitHubFetcher()
+    install_snapshot(app, load_snapshot(github))
+    old_rag = app.state.rag_engine  # what an in-flight request holds
+    old_version = old_rag.version
+
+    edit_portfolio(portfolio_path, "new@example.com")
+    encoded_before = model.encoded
+    reloader = Reloader(app, github, grace_seconds=60)
+    result = await reloader.reload("test")
+
+    new_rag = app.state.rag_engine
+    assert new_rag is not old_rag
+    assert app.state.portfolio is new_rag.portfolio
+    assert app.state.index_manager is new_rag.index_manager
+    assert "new@example.com" in new_rag.identity_block
+    assert "new@example.com" not in old_rag.identity_block
+    assert result["version"] == new_rag.version != old_version
+    assert model.encoded - encoded_before == 1  # only the edited project's chunk, rest from the embedding cache
+
+    # The old snapshot still answers until its grace period ends
+    assert await old_rag.retrieve("What projects have you built?", mode="technical")
+    await reloader.aclose()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_sources_reload_without_rebuilding(env):
+    app, _, model = env
+    github = GitHubFetcher()
+    install_snapshot(app, load_snapshot(github))
+    encoded = model.encoded
+
+    await Reloader(app, github).reload()
+    assert model.encoded == encoded
+
+
+@pytest.mark.asyncio
+async def test_watcher_reloads_on_file_change(env):
+    app, portfolio_path, _ = env
+    github = GitHubFetcher()
+    install_snapshot(app, load_snapshot(github))
+    reloader = Reloader(app, github)
+
+    watcher = asyncio.create_task(reloader.watch(0.02))
+    await asyncio.sleep(0.05)
+    assert reloader.reloads == 0
+    edit_portfolio(portfolio_path, "watched@example.com")
+    for _ in range(200):
+        if reloader.reloads:
+            break
+        await asyncio.sleep(0.02)
+    watcher.cancel()
+
+    assert reloader.reloads == 1
+    assert "watched@example.com" in app.state.rag_engine.identity_block
+    await reloader.aclose()
+
+
+@pytest.mark.asyncio
+async def test_reload_moves_warmup_to_new_engine(env, monkeypatch):
+    app, portfolio_path, _ = env
+    warming = []
+
+    async def fake_warmup(self, concurrency=2, delay=0.0):
+        warming.append(self)
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(RAGEngine, "warm_repo_indexes", fake_warmup)
+    monkeypatch.setattr(settings, "REPO_WARMUP_ENABLED", True)
+    github = GitHubFetcher()
+    install_snapshot(app, load_snapshot(github))
+    reloader = Reloader(app, github, grace_seconds=60)
+    reloader.start_warmup(app.state.rag_engine)
+    first = reloader.warmup
+    await asyncio.sleep(0)
+
+    edit_portfolio(portfolio_path, "warm@example.com")
+    await reloader.reload("test")
+    await asyncio.sleep(0)
+    assert first.cancelled()  # the retiring engine no longer schedules builds
+    assert warming == [warming[0], app.state.rag_engine] and warming[0] is not app.state.rag_engine
+
+    await reloader.aclose()
+    assert reloader.warmup.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_closes_retiring_engines(env, monkeypatch):
+    app, portfolio_path, _ = env
+    closed = []
+    monkeypatch.setattr(RAGEngine, "close", lambda self: closed.append(self))
+    github = GitHubFetcher()
+    install_snapshot(app, load_snapshot(github))
+    old_rag = app.state.rag_engine
+    reloader = Reloader(app, github, grace_seconds=3600)
+
+    edit_portfolio(portfolio_path, "closing@example.com")
+    await reloader.reload("test")
+    assert closed == []  # still in its grace period
+
+    await reloader.aclose()
+    assert closed == [old_rag]
+
+
+class StubReloader:
+    def __init__(self):
+        self.calls = 0
+
+    async def reload(self, reason: str = "manual") -> dict:
+        self.calls += 1
+        return {"reason": reason, "version": "v2"}
+
+
+def test_admin_reload_requires_token(monkeypatch):
+    api = FastAPI()
+    api.include_router(admin.router, prefix="/api/v1")
+    api.state.reloader = StubReloader()
+    client = TestClient(api)
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+    assert client.post("/api/v1/admin/reload").status_code == 404
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/api/v1/admin/reload", headers={"X-Admin-Token": "nope"}).status_code == 401
+    r = client.post("/api/v1/admin/reload", headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 200 and r.json()["version"] == "v2"
+    assert api.state.reloader.calls == 1
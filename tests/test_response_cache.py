@@ -0,0 +1,82 @@
+"""
+tests/test_response_cache.py
+─────────────────────────────
+Semantic response cache unit tests.
+"""
+
+import numpy as np
+import pytest
+
+from app.core.response_cache import SemanticResponseCache
+
+
+def _unit(*values) -> np.ndarray:
+    v = np.zeros(8, dtype="float32")
+    v[: len(values)] = values
+    return v / np.linalg.norm(v)
+
+
+@pytest.fixture
+def cache():
+    return SemanticResponseCache(
+        threshold=0.9, max_entries=4, ttl_seconds=60, max_bytes=1024, dimension=8
+    )
+
+
+def test_similar_query_hits(cache):
+    cache.put("hr", _unit(1, 0), "v1", "My stack is Python + FastAPI.", ["portfolio/skills"])
+    hit = cache.get("hr", _unit(1, 0.1), "v1")
+    assert hit is not None
+    assert hit.response == "My stack is Python + FastAPI."
+    assert hit.context_sources == ["portfolio/skills"]
+
+
+def test_dissimilar_query_misses(cache):
+    cache.put("hr", _unit(1, 0), "v1", "answer")
+    assert cache.get("hr", _unit(0, 1), "v1") is None
+
+
+def test_modes_are_isolated(cache):
+    cache.put("hr", _unit(1, 0), "v1", "hr answer")
+    assert cache.get("technical", _unit(1, 0), "v1") is None
+
+
+def test_version_change_invalidates(cache):
+    cache.put("hr", _unit(1, 0), "v1", "answer")
+    assert cache.get("hr", _unit(1, 0), "v2") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_by_entry_count(cache):
+    for i in range(5):
+        cache.put("hr", _unit(*([0] * i + [1])), "v1", f"answer {i}")
+    assert cache.get("hr", _unit(1), "v1") is None  # oldest evicted
+    assert cache.get("hr", _unit(0, 0, 0, 0, 1), "v1").response == "answer 4"
+
+
+def test_byte_budget_evicts_oldest(cache):
+    cache.put("hr", _unit(1, 0), "v1", "a" * 600)
+    cache.put("hr", _unit(0, 1), "v1", "b" * 600)
+    assert cache.get("hr", _unit(1, 0), "v1") is None
+    assert cache.stats()["bytes"] <= 1024
+
+
+def test_expired_entries_miss():
+    cache = SemanticResponseCache(threshold=0.9, max_entries=4, ttl_seconds=1, max_bytes=1024, dimension=8)
+    cache.put("hr", _unit(1, 0), "v1", "answer")
+    cache._entries[next(iter(cache._entries))].created_at -= 5
+    assert cache.get("hr", _unit(1, 0), "v1") is None
+
+
+def test_projects_are_isolated(cache):
+    cache.put("technical", _unit(1, 0), "v1", "X uses JWT auth.", project="me/x")
+    assert cache.get("technical", _unit(1, 0.05), "v1", project="me/y") is None
+    assert cache.get("technical", _unit(1, 0.05), "v1") is None  # no project detected
+    assert cache.get("technical", _unit(1, 0.05), "v1", project="me/x").response == "X uses JWT auth."
+
+
+def test_explicit_zero_settings_are_kept():
+    cache = SemanticResponseCache(threshold=0.0, ttl_seconds=0, max_entries=4, max_bytes=1024, dimension=8)
+    assert cache.threshold == 0.0 and cache.ttl == 0
+    cache.put("hr", _unit(1, 0), "v1", "answer")
+    assert cache.get("hr", _unit(1, 0), "v1") is None  # ttl=0 → already expired
@@ -0,0 +1,77 @@
+"""
+tests/test_singleflight.py
+───────────────────────────
+Single-flight de-duplication tests.
+"""
+
+import asyncio
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def build():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return "index"
+
+    results = await asyncio.gather(*(flight.do("u/repo", build) for _ in range(10)))
+    assert results == ["index"] * 10
+    assert calls == 1
+    assert not flight.in_flight("u/repo")
+
+
+@pytest.mark.asyncio
+async def test_failures_are_shared_and_negative_cached():
+    flight = SingleFlight(failure_ttl=60)
+    calls = 0
+
+    async def broken():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("github down")
+
+    results = await asyncio.gather(*(flight.do("u/repo", broken) for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    with pytest.raises(RuntimeError):
+        await flight.do("u/repo", broken)  # within TTL → not retried
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_retried_after_ttl():
+    flight = SingleFlight(failure_ttl=0.01)
+    outcomes = iter([RuntimeError("flaky"), "ok"])
+
+    async def flaky():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    with pytest.raises(RuntimeError):
+        await flight.do("k", flaky)
+    await asyncio.sleep(0.02)
+    assert await flight.do("k", flaky) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_build():
+    flight = SingleFlight()
+
+    async def build():
+        await asyncio.sleep(0.03)
+        return "done"
+
+    impatient = asyncio.create_task(flight.do("k", build))
+    patient = asyncio.create_task(flight.do("k", build))
+    await asyncio.sleep(0.005)
+    impatient.cancel()
+    assert await patient == "done"
@@ -0,0 +1,235 @@
+"""
+tests/test_snapshot.py
+───────────────────────
+Versioned index snapshots: manifest, reuse/pruning, embedding-model check,
+and delta S3 upload/download against an in-memory S3 stand-in.
+"""
+
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import pytest
+
+import app.ingestion.embedder as embedder_mod
+from app.config import settings
+from app.core.reloader import load_snapshot
+from app.ingestion.github_fetcher import GitHubFetcher
+from app.vectorstore.faiss_store import FAISSStore
+from app.vectorstore.index_manager import IndexManager
+from app.vectorstore.snapshot import (
+    SNAPSHOTS_DIR, SnapshotMismatch, current_snapshot, read_manifest, set_current, write_snapshot,
+)
+from app.vectorstore.snapshot_sync import download_snapshot, upload_snapshot
+
+
+class FakeS3:
+    """The subset of the boto3 S3 client the snapshot sync uses, kept in memory."""
+
+    def __init__(self, page_size: int = 1000):
+        self.objects: dict[str, bytes] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.calls: list[str] = []
+        self.page_size = page_size
+        self.fail_parts = False
+        self._lock = threading.Lock()
+
+    def _log(self, name):
+        with self._lock:
+            self.calls.append(name)
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._log("put_object")
+        self.objects[Key] = Body if isinstance(Body, bytes) else Body.read()
+        return {"ETag": '"x"'}
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken=None):
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + self.page_size]
+        truncated = start + self.page_size < len(keys)
+        out = {"Contents": [{"Key": k} for k in page], "IsTruncated": truncated}
+        if truncated:
+            out["NextContinuationToken"] = str(start + self.page_size)
+        return out
+
+    def create_multipart_upload(self, Bucket, Key):
+        self._log("create_multipart_upload")
+        upload_id = f"up-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._log("upload_part")
+        if self.fail_parts:
+            raise ConnectionError("connection reset")
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = MultipartUpload["Parts"]
+        assert [p["PartNumber"] for p in parts] == list(range(1, len(parts) + 1))
+        uploaded = self.uploads.pop(UploadId)
+        self.objects[Key] = b"".join(uploaded[p["PartNumber"]] for p in parts)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._log("abort_multipart_upload")
+        self.uploads.pop(UploadId, None)
+
+
+@pytest.fixture
+def env(index_settings, portfolio_path):
+    return index_settings
+
+
+def chunks(n: int, tag: str = "") -> list[dict]:
+    return [{"text": f"chunk {i} {tag}", "source": f"src{i}", "type": "portfolio"} for i in range(n)]
+
+
+def store_of(texts: list[dict]) -> FAISSStore:
+    store = FAISSStore()
+    store.add(texts, embedder_mod.Embedder())
+    return store
+
+
+def test_snapshot_manifest_reuse_and_pruning(env, monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_KEEP", 2)
+    first = write_snapshot(env, {"portfolio": store_of(chunks(5)), "resume": store_of(chunks(2))})
+
+    manifest = read_manifest(first)
+    assert current_snapshot(env) == first
+    assert manifest["embedding_model"] == settings.EMBEDDING_MODEL
+    assert manifest["dimension"] == settings.EMBEDDING_DIMENSION
+    assert manifest["indexes"]["portfolio"] == {
+        "vectors": 5, "chunks": 5, "index_type": "flat", "storage": "float32",
+    }
+    assert manifest["sources"]["portfolio.json"] and manifest["sources"]["missing.pdf"] is None
+    for rel, info in manifest["files"].items():
+        assert (first / rel).stat().st_size == info["size"]
+
+    # Same content → the live snapshot is kept, nothing new on disk
+    again = write_snapshot(env, {"portfolio": store_of(chunks(5)), "resume": store_of(chunks(2))})
+    assert again == first
+
+    versions = [
+        write_snapshot(env, {"portfolio": store_of(chunks(5, tag)), "resume": store_of(chunks(2))}).name
+        for tag in ("a", "b", "c")
+    ]
+    on_disk = sorted(p.name for p in (env / SNAPSHOTS_DIR).iterdir())
+    assert on_disk == sorted(versions[-2:])
+    assert current_snapshot(env).name == versions[-1]
+
+
+def test_index_manager_serves_current_snapshot(env):
+    manager = IndexManager()
+    manager.build_base_indexes(chunks(4), chunks(3))
+    version = manager.version
+
+    loaded = IndexManager()
+    loaded.load_all()
+    assert loaded.version == version == read_manifest(current_snapshot(env))["version"]
+    assert (loaded.portfolio_index.size, loaded.resume_index.size) == (4, 3)
+    assert not loaded.sources_changed()
+
+    Path(settings.PORTFOLIO_JSON_PATH).write_text('{"projects": []}')
+    assert loaded.sources_changed()
+
+
+def test_model_mismatch_rebuilds_or_refuses(env, monkeypatch):
+    github = GitHubFetcher()
+    first = load_snapshot(github).index_manager.version
+
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL", "another-model")
+    with pytest.raises(SnapshotMismatch):
+        IndexManager().load_all()
+
+    monkeypatch.setattr(settings, "SNAPSHOT_MODEL_MISMATCH", "refuse")
+    with pytest.raises(SnapshotMismatch):
+        load_snapshot(github)
+
+    monkeypatch.setattr(settings, "SNAPSHOT_MODEL_MISMATCH", "rebuild")
+    rebuilt = load_snapshot(github).index_manager
+    assert rebuilt.version != first
+    assert rebuilt.manifest["embedding_model"] == "another-model"
+    assert rebuilt.portfolio_index.size > 0
+
+
+def test_concurrent_reloads_build_one_snapshot(env, monkeypatch):
+    github = GitHubFetcher()
+    load_snapshot(github)
+    data = json.loads(Path(settings.PORTFOLIO_JSON_PATH).read_text())
+    data["projects"][0]["description"] = "Edited while two workers watch"
+    Path(settings.PORTFOLIO_JSON_PATH).write_text(json.dumps(data))
+
+    builds = []
+    build = IndexManager.build_base_indexes
+
+    def slow_build(self, *args, **kwargs):
+        builds.append(threading.current_thread().name)
+        time.sleep(0.2)  # the other worker sees the stale snapshot meanwhile
+        return build(self, *args, **kwargs)
+
+    monkeypatch.setattr(IndexManager, "build_base_indexes", slow_build)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(lambda _: load_snapshot(github), range(2)))
+
+    assert len(builds) == 1  # one worker built, the other loaded its snapshot
+    versions = {r.index_manager.version for r in results}
+    assert versions == {read_manifest(current_snapshot(env))["version"]}
+    assert not any(r.index_manager.sources_changed() for r in results)
+
+
+def test_set_current_from_concurrent_writers(env):
+    env.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: set_current(env, f"v{i}"), range(200)))  # a shared temp name raised here
+    assert (env / "CURRENT").read_text().strip().startswith("v")
+    assert [p.name for p in env.iterdir()] == ["CURRENT"]
+
+
+def test_upload_sends_only_changed_objects_and_round_trips(env, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "S3_MULTIPART_THRESHOLD", 64 * 1024)
+    monkeypatch.setattr(settings, "S3_MULTIPART_PART_SIZE", 16 * 1024)
+    s3 = FakeS3(page_size=3)  # forces list pagination
+
+    resume = store_of(chunks(3))
+    first = write_snapshot(env, {"portfolio": store_of(chunks(60)), "resume": resume})
+    stats = upload_snapshot(s3, "bucket", first)
+    assert stats["uploaded"] == len({f["sha256"] for f in read_manifest(first)["files"].values()})
+    assert stats["multipart"] >= 1  # the 60 × 384 float index is > 64 KB
+    assert s3.objects["indexes/CURRENT"].decode() == read_manifest(first)["version"]
+
+    # Only the portfolio index changes: the resume files are already in the bucket
+    second = write_snapshot(env, {"portfolio": store_of(chunks(60, "v2")), "resume": resume})
+    s3.calls.clear()
+    stats = upload_snapshot(s3, "bucket", second)
+    manifest = read_manifest(second)
+    resume_files = [rel for rel in manifest["files"] if rel.startswith("resume/")]
+    assert resume_files and stats["skipped"] >= len(resume_files)
+    assert stats["uploaded"] < len(manifest["files"])
+
+    pulled = download_snapshot(s3, "bucket", tmp_path / "elsewhere")
+    assert pulled.name == manifest["version"]
+    assert current_snapshot(tmp_path / "elsewhere") == pulled
+    for rel in manifest["files"]:
+        assert (pulled / rel).read_bytes() == (second / rel).read_bytes()
+    assert json.loads((pulled / "manifest.json").read_text()) == manifest
+
+
+def test_failed_multipart_upload_is_aborted(env, monkeypatch):
+    monkeypatch.setattr(settings, "S3_MULTIPART_THRESHOLD", 64 * 1024)
+    monkeypatch.setattr(settings, "S3_MULTIPART_PART_SIZE", 16 * 1024)
+    s3 = FakeS3()
+    s3.fail_parts = True
+
+    snapshot = write_snapshot(env, {"portfolio": store_of(chunks(60)), "resume": store_of(chunks(1))})
+    with pytest.raises(ConnectionError):
+        upload_snapshot(s3, "bucket", snapshot)
+    assert "abort_multipart_upload" in s3.calls
+    assert not s3.uploads
+    assert "indexes/CURRENT" not in s3.objects  # never points at an incomplete snapshot
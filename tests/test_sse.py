@@ -0,0 +1,73 @@
+"""
+tests/test_sse.py
+──────────────────
+SSE frame encoding and token coalescing for the chat stream.
+"""
+
+import asyncio
+import json
+import pytest
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.sse import DONE_FRAME, coalesce, error_frame, token_frame
+
+
+def _event(frame: bytes) -> dict:
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    return json.loads(frame[len(b"data: "):])
+
+
+def test_frames_keep_the_event_protocol():
+    assert _event(token_frame('He said "hi"\n — ok')) == {"type": "token", "data": 'He said "hi"\n — ok'}
+    assert _event(DONE_FRAME) == {"type": "done", "data": ""}
+    assert _event(error_frame("Stream interrupted.")) == {"type": "error", "data": "Stream interrupted."}
+
+
+async def _tokens(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+async def _collect(source, **kwargs):
+    return [chunk async for chunk in coalesce(source, **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_burst_is_merged_after_an_immediate_first_token():
+    tokens = [f"t{i} " for i in range(50)]
+    chunks = await _collect(_tokens(tokens), max_chars=1000, window_ms=50)
+    assert chunks[0] == "t0 "
+    assert "".join(chunks) == "".join(tokens)
+    assert len(chunks) == 2
+
+
+@pytest.mark.asyncio
+async def test_flush_on_size_and_window():
+    # 1s window: only the size threshold can flush the paced tokens early
+    paced = await _collect(_tokens(["a", "bb", "cc", "dd", "e"], delay=0.005), max_chars=4, window_ms=1000)
+    assert paced == ["a", "bbcc", "dde"]
+
+    slow = await _collect(_tokens(["a", "b", "c"], delay=0.03), max_chars=1000, window_ms=1)
+    assert slow == ["a", "b", "c"]  # each token outlives the window
+
+
+@pytest.mark.asyncio
+async def test_passthrough_when_disabled():
+    assert await _collect(_tokens(["a", "b", "c"]), max_chars=0) == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_buffered_tokens_flushed_before_error():
+    async def failing():
+        yield "first"
+        yield "second"
+        raise RuntimeError("upstream died")
+
+    seen = []
+    with pytest.raises(RuntimeError):
+        async for chunk in coalesce(failing(), max_chars=1000, window_ms=50):
+            seen.append(chunk)
+    assert seen == ["first", "second"]
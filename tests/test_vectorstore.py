@@ -0,0 +1,283 @@
+"""
+tests/test_vectorstore.py
+──────────────────────────
+FAISSStore tests on synthetic vectors (no embedding model needed).
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import faiss
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.ingestion.embedder import Embedder
+from app.vectorstore.build_executor import IndexBuildExecutor
+from app.vectorstore.faiss_store import FAISSStore, choose_index_type
+
+
+def _vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    vecs = np.random.default_rng(seed).standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(vecs)
+    return vecs
+
+
+def _chunks(n: int) -> list[dict]:
+    return [{"text": f"chunk {i}", "source": f"src/{i % 3}", "type": "prose"} for i in range(n)]
+
+
+def test_auto_selection_by_size():
+    assert choose_index_type(100) == "flat"
+    assert choose_index_type(50_000) == "hnsw"
+    assert choose_index_type(5_000_000) == "ivf"
+
+
+def test_auto_keeps_small_indexes_exact():
+    store = FAISSStore(dimension=32)
+    store.add_embeddings(_chunks(50), _vectors(50))
+    assert store.index_type == "flat"
+
+
+@pytest.mark.parametrize("index_type,knob", [("hnsw", "efSearch"), ("ivf", "nprobe")])
+def test_ann_params_persist_across_save_load(tmp_path, index_type, knob):
+    vecs = _vectors(2000)
+    store = FAISSStore(dimension=32, index_type=index_type)
+    store.add_embeddings(_chunks(2000), vecs)
+    store.params[knob] = 7
+    store.save(str(tmp_path))
+
+    loaded = FAISSStore.load(str(tmp_path))
+    assert loaded.index_type == index_type
+    assert loaded.params[knob] == 7
+
+    results = loaded.search(vecs[42], k=3)
+    assert results[0]["text"] == "chunk 42"
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-3)
+
+
+def test_ivfpq_falls_back_to_ivf_below_codebook_size(tmp_path):
+    vecs = _vectors(50)
+    store = FAISSStore(dimension=32, index_type="ivfpq")
+    store.add_embeddings(_chunks(50), vecs)  # 50 < 2**IVF_PQ_BITS training points
+    assert store.index_type == "ivf" and store.storage_label == "float32"
+    store.save(str(tmp_path / "small"))
+
+    loaded = FAISSStore.load(str(tmp_path / "small"))
+    assert loaded.index_type == "ivf"
+    assert loaded.search(vecs[7], k=1)[0].text == "chunk 7"
+
+
+def test_ivfpq_with_enough_training_vectors(monkeypatch):
+    monkeypatch.setattr(settings, "IVF_PQ_M", 8)
+    vecs = _vectors(2000)
+    store = FAISSStore(dimension=32, index_type="ivfpq")
+    store.add_embeddings(_chunks(2000), vecs)
+    assert store.index_type == "ivfpq" and store.storage_label == "pq"
+    assert "chunk 42" in [r.text for r in store.search(vecs[42], k=5)]
+
+
+def test_unknown_index_type_rejected():
+    with pytest.raises(ValueError):
+        FAISSStore(dimension=32, index_type="annoy")
+    with pytest.raises(ValueError):
+        FAISSStore(dimension=32, storage="int4")
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+@pytest.mark.parametrize("storage,ratio", [("fp16", 0.5), ("int8", 0.25)])
+def test_quantized_storage_is_smaller_and_persists(tmp_path, index_type, storage, ratio):
+    vecs = _vectors(1000)
+    exact = FAISSStore(dimension=32, index_type=index_type, storage="float32")
+    exact.add_embeddings(_chunks(1000), vecs)
+    exact.save(str(tmp_path / "exact"))
+    store = FAISSStore(dimension=32, index_type=index_type, storage=storage)
+    store.add_embeddings(_chunks(1000), vecs)
+    store.save(str(tmp_path / storage))
+
+    loaded = FAISSStore.load(str(tmp_path / storage), mmap=True)
+    assert (loaded.index_type, loaded.storage) == (index_type, storage)
+    if index_type == "flat":
+        codes = lambda d: (d / "index.faiss").stat().st_size
+        assert codes(tmp_path / storage) <= ratio * codes(tmp_path / "exact") + 1024
+    hit = loaded.search(vecs[42], k=1)[0]
+    assert hit.text == "chunk 42" and hit.score == pytest.approx(1.0, abs=0.02)
+
+    # Rebuilds start from the reconstructed (approximate) vectors
+    chunks, kept = loaded.without_sources({"src/0"})
+    assert len(chunks) == len(kept) and np.allclose(kept, vecs[[i for i in range(1000) if i % 3]], atol=0.05)
+
+
+def test_mmap_load_shares_read_only_store(tmp_path):
+    vecs = _vectors(100)
+    store = FAISSStore(dimension=32)
+    store.add_embeddings(_chunks(100), vecs)
+    store.save(str(tmp_path))
+
+    mapped = FAISSStore.load(str(tmp_path), mmap=True)
+    assert mapped.read_only
+    assert len(mapped.metadata) == 100
+    hit = mapped.search(vecs[7], k=1)[0]
+    assert hit.text == "chunk 7" and hit.source == "src/1" and hit.type == "prose"
+    with pytest.raises(RuntimeError):
+        mapped.add_embeddings(_chunks(1), vecs[:1])
+
+    in_memory = FAISSStore.load(str(tmp_path), mmap=False)
+    assert not in_memory.read_only
+    in_memory.add_embeddings(_chunks(1), vecs[:1])
+    assert in_memory.size == 101
+
+
+def test_save_swaps_directory_atomically(tmp_path):
+    target = tmp_path / "repo"
+    old_vecs = _vectors(20, seed=1)
+    old = FAISSStore(dimension=32)
+    old.add_embeddings(_chunks(20), old_vecs)
+    old.save(str(target), extra_files={"repo_state.json": "{}"})
+    mapped = FAISSStore.load(str(target), mmap=True)
+
+    new = FAISSStore(dimension=32)
+    new.add_embeddings(_chunks(5), _vectors(5, seed=2))
+    new.save(str(target))
+
+    assert target.is_symlink()  # now a link to the version directory
+    assert not (target / "repo_state.json").exists()  # the whole directory was replaced
+    assert FAISSStore.load(str(target)).size == 5
+    # A reader that mapped the old files keeps a consistent view
+    assert mapped.search(old_vecs[3], k=1)[0].text == "chunk 3"
+
+    for n in (6, 7, 8):
+        newer = FAISSStore(dimension=32)
+        newer.add_embeddings(_chunks(n), _vectors(n, seed=n))
+        newer.save(str(target))
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert len(names) == 3 and names[-1] == "repo"  # the live version + the one it replaced, no staging dirs
+    assert FAISSStore.load(str(target)).size == 8
+
+
+def test_readers_never_see_a_missing_or_mixed_index(tmp_path):
+    target = tmp_path / "repo"
+
+    def store_of(n: int) -> FAISSStore:
+        store = FAISSStore(dimension=32)
+        store.add_embeddings([{"text": f"v{n}", "source": "s", "type": "prose"}] * n, _vectors(n, seed=n))
+        return store
+
+    store_of(10).save(str(target), versioned=True)
+    stores = [store_of(n) for n in range(11, 41)]
+    seen, errors, stop = [], [], threading.Event()
+
+    def read():
+        while not stop.is_set():
+            try:
+                loaded = FAISSStore.load(str(target))
+            except Exception as e:
+                errors.append(e)
+                return
+            seen.append((loaded.size, len(loaded.metadata), loaded.metadata[0]["text"]))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for store in stores:
+            store.save(str(target), versioned=True)
+    finally:
+        stop.set()
+        reader.join()
+    assert not errors
+    assert seen and all(size == rows and text == f"v{size}" for size, rows, text in seen)
+
+
+def test_legacy_pickle_metadata_still_loads(tmp_path):
+    import pickle
+
+    store = FAISSStore(dimension=32)
+    store.add_embeddings(_chunks(5), _vectors(5))
+    faiss.write_index(store.index, str(tmp_path / "index.faiss"))
+    with open(tmp_path / "metadata.pkl", "wb") as f:
+        pickle.dump(store.metadata, f)
+
+    loaded = FAISSStore.load(str(tmp_path))
+    assert loaded.metadata[3]["text"] == "chunk 3"
+
+
+def test_legacy_pickle_refuses_code(tmp_path):
+    import os
+    import pickle
+
+    store = FAISSStore(dimension=32)
+    store.add_embeddings(_chunks(1), _vectors(1))
+    faiss.write_index(store.index, str(tmp_path / "index.faiss"))
+    with open(tmp_path / "metadata.pkl", "wb") as f:
+        pickle.dump([{"text": os.getcwd}], f)  # references a global → must be rejected
+
+    with pytest.raises(pickle.UnpicklingError):
+        FAISSStore.load(str(tmp_path))
+
+
+def test_columnar_store_roundtrip(tmp_path):
+    from app.vectorstore.chunk_store import ChunkStore, write_chunk_store
+
+    records = [
+        {"text": "héllo wörld", "source": "github/a/b.py", "type": "code", "lang": "py"},
+        {"text": "", "source": "portfolio/skills", "type": "prose"},
+        {"text": "third", "source": "github/a/b.py", "type": "code", "lang": "py"},
+    ]
+    write_chunk_store(tmp_path, records)
+    store = ChunkStore(tmp_path)
+
+    assert len(store) == 3
+    assert [r.to_dict() for r in store] == records
+    assert store.record(2, score=0.5).score == 0.5
+    assert store[-1].text == "third"
+
+
+def test_repo_cache_loads_lazily_and_evicts_by_budget(tmp_path):
+    from app.vectorstore.repo_index_cache import RepoIndexCache
+
+    for i, slug in enumerate(["u/a", "u/b", "u/c"]):
+        store = FAISSStore(dimension=32)
+        store.add_embeddings(_chunks(200), _vectors(200, seed=i))
+        store.save(str(tmp_path / slug.replace("/", "__")))
+    one_repo = FAISSStore.load(str(tmp_path / "u__a")).nbytes
+
+    cache = RepoIndexCache(tmp_path, max_bytes=int(one_repo * 2.5))
+    assert len(cache) == 0  # nothing loaded up front
+    assert cache.get("u/missing") is None
+
+    assert cache.get("u/a") is not None
+    assert cache.get("u/b") is not None
+    assert cache.get("u/a") is not None  # hit, a becomes most recent
+    assert cache.get("u/c") is not None  # evicts b
+
+    assert "u/b" not in cache and "u/a" in cache
+    assert cache.get("u/b") is not None  # reloaded from disk
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["loads"] == 4
+    assert stats["evictions"] == 2
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+@pytest.mark.asyncio
+async def test_broken_process_pool_falls_back_to_a_thread(index_settings, fake_model):
+    builder = IndexBuildExecutor(Embedder(), mode="process", workers=1)
+    # Same spawn pool the executor starts, but every worker dies during start-up
+    builder._pool = ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=os._exit, initargs=(1,),
+    )
+    vectors = await builder.embed(["alpha", "beta"])
+
+    assert vectors.shape == (2, 384) and fake_model.encoded == 2  # embedded in-process instead
+    assert builder.mode == "thread" and builder._pool is None
+    assert (await builder.embed(["gamma"])).shape == (1, 384)
+    builder.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_process_pool_that_cannot_start_falls_back_to_a_thread(index_settings, fake_model):
+    builder = IndexBuildExecutor(Embedder(), mode="process", workers=-1)  # ProcessPoolExecutor raises ValueError
+    assert (await builder.embed(["alpha"])).shape == (1, 384)
+    assert builder.mode == "thread" and builder._pool is None
+    builder.shutdown()